@@ -2,9 +2,15 @@ import json, os
 import streamlit as st
 import pandas as pd
 
-from engine import compute
-from utils import to_excel_bytes, to_pdf_bytes
-from input_formats import parse_money, parse_percent, fmt_money, fmt_number, fmt_percent
+from engine import ComputeSession
+from store import STORE, put_config
+from cache import EXPORT_CACHE, SHARED_CACHE, config_key
+from library import shared_library
+from instrument import RECORDER, enabled as tracing, section, trace_json
+from sensitivity import METRICS as SENS_METRICS, LABELS as SENS_LABELS, axis, heatmap, heatmap_figure, tornado, tornado_figure
+from utils import snapshot_metrics, to_excel_bytes, to_pdf_bytes
+from waterfall import TIER_KINDS, Tier
+from input_formats import parse_money, parse_percent, fmt_money, fmt_number, fmt_percent, unwrap_config
 
 st.set_page_config(page_title="Treehouse Deal Calculator v3.1 (hints-in-JSON)", layout="wide")
 
@@ -57,6 +63,8 @@ H = {
 
     "investor_pct": "**Ownership percentage for this investor.** Example: 25%. *Impact:* Controls their share of dividends and exit economics.",
     "investor_contrib": "**Cash this investor puts in at close.** Example: 175,000. *Impact:* Adds to Sources; used for payback and equity multiple.",
+    "investor_class": "**LP or GP.** Example: the sponsor is GP. *Impact:* GP investors receive the GP side of catch-up and split tiers; with no tiers, class has no effect.",
+    "waterfall": "**Distribution tier.** return_of_capital repays contributed capital, pref pays the preferred return, catch_up sends GP % to the GP until it holds the target share of profits, split divides the rest. *Impact:* Reallocates dividends between investors; total distributions are unchanged.",
 
     "sba_principal": "**Loan amount from SBA lender.** Example: 1,800,000. *Impact:* Larger loans raise debt service and DSCR pressure.",
     "sba_rate": "**SBA loan annual interest rate.** Example: 10.00%. *Impact:* Higher rates increase payments, lowering FCFE.",
@@ -80,7 +88,7 @@ H = {
     "Debt Service": "**Total required loan payments** (SBA + Seller). *Impact:* The fixed hurdle CFADS must clear.",
     "Distributable": "**Cash available to pay investors** (after retention). *Impact:* Drives investor dividends.",
     "Retained": "**Positive FCFE held in the business.** *Impact:* Builds runway and resilience.",
-    "Cash Balance": "**Cumulative cash on hand** (starts with the buffer). *Impact:* Safety net to survive bumps.",
+    "Cash Balance": "**Cumulative cash on hand** (starts with the buffer; retained FCFE adds to it, negative FCFE draws it down). *Impact:* Safety net to survive bumps.",
     "Follow-on Inflow": "**Additional equity injected during operations.** *Impact:* Temporarily boosts cash and speeds payback."
 }
 
@@ -106,10 +114,18 @@ DEFAULT = {
     "refi":{"enable":False,"year":3,"new_rate_pct":8.5,"new_term_months":120}
 }
 
-if "library" not in st.session_state:
-    st.session_state["library"] = {}
-cfg = st.session_state.get("cfg", DEFAULT)
-
+# Each rerun gets a fresh trace (sessions share the recorder, so traces are only
+# meaningful with one active user)
+section(None)  # a rerun interrupted by st.experimental_rerun can leave one open
+RECORDER.reset()
+section("app:setup")
+# Sessions keep only references: the config and stage outputs live in the shared store
+if "engine" not in st.session_state:
+    st.session_state["engine"] = ComputeSession(store=STORE)
+cfg_ref = st.session_state.get("cfg_ref")
+cfg = cfg_ref.get() if cfg_ref is not None else DEFAULT
+
+section("app:sidebar")
 # Sidebar: definitions + library + export/import
 with st.sidebar:
     st.header("ⓘ Definitions (Quick Guide)")
@@ -135,20 +151,29 @@ with st.sidebar:
         st.markdown("\n".join([
             f"- **SBA Loan** — {H['sba_principal']} | {H['sba_rate']} | {H['sba_term']} | {H['sba_io']}",
             f"- **Seller Note** — {H['seller_principal']} | {H['seller_rate']} | {H['seller_term']} | {H['seller_standby']}",
-            f"- **Investors** — {H['investor_pct']} | {H['investor_contrib']}",
+            f"- **Investors** — {H['investor_pct']} | {H['investor_contrib']} | {H['investor_class']}",
+            f"- **Waterfall** — {H['waterfall']}",
             f"- **Retained %** — {H['retain_pct']}",
             f"- **Refinance** — {H['refi']}",
         ]))
 
     st.markdown("---")
     st.header("Scenario Library")
+    library = shared_library()
     name = st.text_input("Scenario name")
     if st.button("Save to Library") and name:
-        st.session_state["library"][name] = json.loads(json.dumps(cfg))
+        library.save(name, cfg)
         st.success(f"Saved '{name}'")
-    pick = st.selectbox("Load scenario", ["-- select --"] + list(st.session_state["library"].keys()))
+    search = st.text_input("Search by name", key="lib_search")
+    min_dscr = st.number_input("Min DSCR", value=0.0, step=0.05, key="lib_min_dscr")
+    filters = {"min_dscr": (min_dscr, None)} if min_dscr > 0 else None
+    total = library.count(filters, search)
+    pages = max((total - 1) // 25 + 1, 1)
+    page = st.number_input(f"Page (of {pages}, {total} scenarios)", min_value=1, max_value=pages, value=1, key="lib_page")
+    rows = library.list(page - 1, 25, filters=filters, name_like=search)
+    pick = st.selectbox("Load scenario", ["-- select --"] + [r["name"] for r in rows])
     if pick and pick != "-- select --":
-        st.session_state["cfg"] = json.loads(json.dumps(st.session_state["library"][pick]))
+        st.session_state["cfg_ref"] = put_config(library.load(pick))
         st.experimental_rerun()
 
     st.markdown("---")
@@ -156,10 +181,7 @@ with st.sidebar:
     if up:
         try:
             data = json.loads(up.getvalue().decode("utf-8"))
-            if isinstance(data, dict) and "config" in data:
-                st.session_state["cfg"] = data["config"]
-            else:
-                st.session_state["cfg"] = data
+            st.session_state["cfg_ref"] = put_config(unwrap_config(data))
             st.success("Scenario loaded.")
             st.experimental_rerun()
         except Exception as e:
@@ -175,6 +197,7 @@ with st.sidebar:
 
     st.caption("Your export now includes a `_hints` block so others see the same tooltips.")
 
+section("app:inputs")
 # Tabs & inputs (same as v3.1 UI) — abbreviated here for brevity
 tabs = st.tabs(["Deal Setup", "Pro-forma SDE & NWC", "Investors", "Debt & Funding", "Follow-on", "Advanced"])
 
@@ -202,16 +225,25 @@ with tabs[1]:
         cfg["nwc_days"]["ap"] = n3.number_input("AP Days", 0, value=int(cfg["nwc_days"]["ap"]), step=1, help=H["ap_days"])
 
 with tabs[2]:
-    st.subheader("Investors (up to 5)")
+    st.subheader("Investors")
+    st.caption("One row per investor; mark the sponsor as GP to receive catch-up and carried interest tiers.")
+    df_inv_in = pd.DataFrame(cfg.get("investors") or [{"name": "Investor 1", "pct": 0.0, "contribution": 0.0}],
+                             columns=["name", "pct", "contribution", "class"])
+    df_inv_in["class"] = df_inv_in["class"].fillna("lp")
+    edited_inv = st.data_editor(df_inv_in, num_rows="dynamic", use_container_width=True,
+        column_config={
+            "name": st.column_config.TextColumn("Name", help="Investor display name for tables."),
+            "pct": st.column_config.NumberColumn("Ownership %", help=H["investor_pct"], format="%.2f"),
+            "contribution": st.column_config.NumberColumn("Equity contribution ($ at close)", help=H["investor_contrib"], format="%,.0f"),
+            "class": st.column_config.SelectboxColumn("Class", options=["lp", "gp"], help=H["investor_class"]),
+        })
     invs = []
-    for i in range(5):
-        default = cfg["investors"][i] if i < len(cfg["investors"]) else {"name": f"Investor {i+1}", "pct": 0.0, "contribution": 0.0}
-        with st.expander(f"Investor {i+1}", expanded=(i < len(cfg["investors"]))):
-            name = st.text_input("Name", value=str(default["name"]), key=f"name{i}", help="Investor display name for tables.")
-            pct = percent_input("Ownership %", float(default["pct"]), key=f"pct{i}", help=H["investor_pct"])
-            contrib = money_input("Equity contribution ($ at close)", float(default["contribution"]), key=f"contrib{i}", help=H["investor_contrib"])
-            invs.append({"name": name, "pct": pct, "contribution": contrib})
-    cfg["investors"] = [x for x in invs if x["pct"] > 0 or x["contribution"] > 0]
+    for idx, row in enumerate(edited_inv.to_dict(orient="records")):
+        pct, contrib = (float(v) if v == v and v is not None else 0.0 for v in (row.get("pct"), row.get("contribution")))
+        if pct > 0 or contrib > 0:
+            invs.append({"name": str(row.get("name") or f"Investor {idx+1}"), "pct": pct, "contribution": contrib,
+                         "class": row.get("class") or "lp"})
+    cfg["investors"] = invs
 
 with tabs[3]:
     st.subheader("SBA Loan")
@@ -242,6 +274,29 @@ with tabs[4]:
 with tabs[5]:
     st.subheader("Advanced Options")
     cfg["retain_pct"] = percent_input("Retain % of FCFE before distributions", cfg["retain_pct"], key="ret", help=H["retain_pct"])
+    with st.expander("Distribution waterfall", expanded=bool(cfg.get("waterfall"))):
+        st.caption("Tiers run in order each month; whatever is left is split by ownership %. No tiers = pro-rata.")
+        df_wf = pd.DataFrame(cfg.get("waterfall") or [], columns=["kind", "rate_pct", "gp_pct", "target_pct"])
+        edited_wf = st.data_editor(df_wf, num_rows="dynamic", use_container_width=True,
+            column_config={
+                "kind": st.column_config.SelectboxColumn("Tier", options=list(TIER_KINDS), help=H["waterfall"]),
+                "rate_pct": st.column_config.NumberColumn("Pref rate %", help="Annual preferred return (pref tiers).", format="%.2f", min_value=0.0),
+                "gp_pct": st.column_config.NumberColumn("GP %", help="GP share of cash in catch-up and split tiers.", format="%.2f", min_value=0.0, max_value=100.0),
+                "target_pct": st.column_config.NumberColumn("Catch-up target %", help="GP share of profits at which catch-up ends (below 100).", format="%.2f", min_value=0.0, max_value=99.99),
+            })
+        # Invalid tiers (e.g. from an imported config) are left out with a warning instead of failing the page
+        tiers = []
+        for n, t in enumerate(edited_wf.to_dict(orient="records"), start=1):
+            if not t.get("kind"):
+                continue
+            t = {k: (v if v == v else 0.0) for k, v in t.items()}
+            try:
+                Tier.from_dict(t)
+            except ValueError as e:
+                st.warning(f"Tier {n} ignored: {e}")
+                continue
+            tiers.append(t)
+        cfg["waterfall"] = tiers
     with st.expander("Refinance (SBA)", expanded=False):
         en = st.checkbox("Enable refinance", value=bool(cfg["refi"]["enable"]), help=H["refi"])
         cfg["refi"]["enable"] = en
@@ -250,18 +305,20 @@ with tabs[5]:
             cfg["refi"]["new_rate_pct"] = percent_input("New SBA rate %", float(cfg["refi"]["new_rate_pct"]), key="refir")
             cfg["refi"]["new_term_months"] = st.number_input("New SBA term (months)", 12, value=int(cfg["refi"]["new_term_months"]), step=1)
 
-st.session_state["cfg"] = cfg
+st.session_state["cfg_ref"] = put_config(cfg)
 
-outs = compute(cfg)
+section("app:compute")
+outs = SHARED_CACHE.get_or_compute(cfg, st.session_state["engine"].compute_result)
 
 m1, m2, m3, m4 = st.columns(4)
-m1.metric("Total Uses @ Close", fmt_money(outs["total_uses"], 0))
-m2.metric("Total Sources @ Close", fmt_money(outs["total_sources"], 0))
-m3.metric("Sources - Uses", fmt_money(outs["total_sources"] - outs["total_uses"], 0))
-m4.metric("Pro-forma SDE (Y1)", fmt_money(outs["proforma_sde_y1"], 0))
+m1.metric("Total Uses @ Close", fmt_money(outs.total_uses, 0))
+m2.metric("Total Sources @ Close", fmt_money(outs.total_sources, 0))
+m3.metric("Sources - Uses", fmt_money(outs.total_sources - outs.total_uses, 0))
+m4.metric("Pro-forma SDE (Y1)", fmt_money(outs.proforma_sde_y1, 0))
 
+section("app:y1_table")
 st.markdown("### Year 1 • Monthly Cash Flow")
-df_y1 = pd.DataFrame(outs["y1"])
+df_y1 = outs.y1_table()
 col_config_y1 = {
     "Month": st.column_config.NumberColumn("Month"),
     "SDE": st.column_config.NumberColumn("SDE", help=H["SDE"], format="%,.0f"),
@@ -279,11 +336,12 @@ col_config_y1 = {
 }
 for c in df_y1.columns:
     if isinstance(c, str) and c.startswith("Dividend •"):
-        col_config_y1[c] = st.column_config.NumberColumn(c, help="Pro-rata investor dividend for the month.", format="%,.0f")
+        col_config_y1[c] = st.column_config.NumberColumn(c, help="Investor dividend for the month, after any waterfall tiers.", format="%,.0f")
 st.dataframe(df_y1, use_container_width=True, column_config=col_config_y1)
 
+section("app:annual_table")
 st.markdown("### Years 1–5 • Annual Summary")
-df_y = pd.DataFrame(outs["years"])
+df_y = outs.years_table()
 col_config_y = {
     "Year": st.column_config.NumberColumn("Year"),
     "Pro-forma SDE": st.column_config.NumberColumn("Pro-forma SDE", help=H["SDE"], format="%,.0f"),
@@ -302,11 +360,12 @@ col_config_y = {
 }
 for c in df_y.columns:
     if isinstance(c, str) and c.startswith("Investor Dividend •"):
-        col_config_y[c] = st.column_config.NumberColumn(c, help="Pro-rata investor dividend for the year.", format="%,.0f")
+        col_config_y[c] = st.column_config.NumberColumn(c, help="Investor dividend for the year, after any waterfall tiers.", format="%,.0f")
 st.dataframe(df_y, use_container_width=True, column_config=col_config_y)
 
+section("app:investor_table")
 st.markdown("### Investor Summary (5 years)")
-df_inv = pd.DataFrame(outs["investors"])
+df_inv = outs.investors_table()
 col_config_inv = {
     "Investor": st.column_config.TextColumn("Investor"),
     "Ownership %": st.column_config.NumberColumn("Ownership %", help=H["investor_pct"], format="%.2f%%"),
@@ -317,20 +376,65 @@ col_config_inv = {
 }
 st.dataframe(df_inv, use_container_width=True, column_config=col_config_inv)
 
+section("app:sensitivity")
+st.markdown("### Sensitivity")
+cfg_key = config_key(cfg)
+
+# Charts are cached per config content (`_cfg` is not hashed; `key` stands in for it)
+@st.cache_data(max_entries=32, show_spinner=False)
+def sensitivity_tornado(key: str, metric: str, bump: int, _cfg: dict):
+    return tornado_figure(tornado(_cfg, metric=metric, bump_pct=bump), metric)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def sensitivity_heatmap(key: str, x_key: str, y_key: str, metric: str, _cfg: dict):
+    return heatmap_figure(heatmap(_cfg, x_key, axis(_cfg, x_key), y_key, axis(_cfg, y_key), metric), metric)
+
+# Off by default: the analysis only runs (and reruns) while this is ticked
+if st.checkbox("Show tornado & heatmap", value=False, help="Runs a batch of bumped scenarios and a 50×50 grid for the current inputs."):
+    s1, s2 = st.columns(2)
+    t_metric = s1.selectbox("Tornado metric", list(SENS_METRICS), index=0)
+    bump = s2.slider("Bump (± % of value)", 1, 50, 10, help="Rates, percentages and month counts move by fixed steps instead.")
+    st.plotly_chart(sensitivity_tornado(cfg_key, t_metric, bump, cfg), use_container_width=True)
+    h1, h2, h3 = st.columns(3)
+    keys = list(SENS_LABELS)
+    hx = h1.selectbox("X axis", keys, index=keys.index("sba_rate"), format_func=SENS_LABELS.get)
+    hy = h2.selectbox("Y axis", keys, index=keys.index("purchase_price"), format_func=SENS_LABELS.get)
+    h_metric = h3.selectbox("Heatmap metric", list(SENS_METRICS), index=list(SENS_METRICS).index("Min DSCR"))
+    if hx != hy:
+        st.plotly_chart(sensitivity_heatmap(cfg_key, hx, hy, h_metric, cfg), use_container_width=True)
+    else:
+        st.info("Pick two different inputs.")
+
+section("app:downloads")
 st.markdown("### Download Results")
 def to_csv_bytes(df: pd.DataFrame) -> bytes:
     return df.to_csv(index=False).encode("utf-8")
 c1, c2, c3, c4 = st.columns(4)
 with c1: st.download_button("CSV • Year 1 Monthly", data=to_csv_bytes(df_y1), file_name="year1_monthly.csv", use_container_width=True)
 with c2: st.download_button("CSV • Years 1–5 Annual", data=to_csv_bytes(df_y), file_name="years1_5_annual.csv", use_container_width=True)
+# Excel/PDF are rendered only on request and cached per config, so reruns skip them
+export_key = cfg_key
 with c3:
-    excel = to_excel_bytes({"Year1_Monthly": df_y1, "Years1_5_Annual": df_y, "Investor_Summary": df_inv})
-    st.download_button("Excel • All Tabs", data=excel, file_name="treehouse_outputs.xlsx", use_container_width=True)
+    excel = EXPORT_CACHE.get(f"xlsx:{export_key}")
+    if excel is None and st.button("Prepare Excel", use_container_width=True):
+        excel = EXPORT_CACHE.get_or_build(f"xlsx:{export_key}", lambda: to_excel_bytes(
+            {"Year1_Monthly": df_y1, "Years1_5_Annual": df_y, "Investor_Summary": df_inv}), "export:excel")
+    if excel is not None:
+        st.download_button("Excel • All Tabs", data=excel, file_name="treehouse_outputs.xlsx", use_container_width=True)
 with c4:
-    metrics = {
-        "Total Uses @ Close": fmt_money(outs["total_uses"], 0),
-        "Total Sources @ Close": fmt_money(outs["total_sources"], 0),
-        "Pro-forma SDE (Y1)": fmt_money(outs["proforma_sde_y1"], 0),
-    }
-    pdf = to_pdf_bytes("Treehouse Deal — Snapshot", metrics, {"Year 1 Monthly": df_y1, "Investor Summary": df_inv})
-    st.download_button("PDF • Snapshot", data=pdf, file_name="treehouse_snapshot.pdf", use_container_width=True)
+    pdf = EXPORT_CACHE.get(f"pdf:{export_key}")
+    if pdf is None and st.button("Prepare PDF", use_container_width=True):
+        pdf = EXPORT_CACHE.get_or_build(f"pdf:{export_key}", lambda: to_pdf_bytes(
+            "Treehouse Deal — Snapshot", snapshot_metrics(outs), {"Year 1 Monthly": df_y1, "Investor Summary": df_inv}),
+            "export:pdf")
+    if pdf is not None:
+        st.download_button("PDF • Snapshot", data=pdf, file_name="treehouse_snapshot.pdf", use_container_width=True)
+section(None)
+
+# Diagnostics panel: only present when TREEHOUSE_TRACE is set
+if tracing():
+    with st.sidebar.expander("Diagnostics", expanded=False):
+        st.dataframe(pd.DataFrame(RECORDER.summary()), use_container_width=True)
+        st.json(RECORDER.counters)
+        st.json({"results": SHARED_CACHE.stats(), "exports": EXPORT_CACHE.stats(), "store": STORE.stats()})
+        st.download_button("Trace JSON", data=trace_json(), file_name="treehouse_trace.json")
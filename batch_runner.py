@@ -0,0 +1,240 @@
+"""Headless batch runner: stream deal configs through the engine into CSV/Parquet.
+
+Usage:
+    python batch_runner.py deals.jsonl --summary summary.csv --monthly monthly.parquet
+    cat deals.jsonl | python batch_runner.py - --summary summary.csv
+    python batch_runner.py listings.xlsx --base sample_scenario.json --summary summary.csv --errors errors.csv
+"""
+from __future__ import annotations
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from engine import HORIZON_MONTHS, MONTHLY_FIELDS, compute_batch, evaluate, min_dscr
+from importer import chunk_inputs, iter_sheet
+from input_formats import iter_config_files, unwrap_config
+
+Batch = List[Tuple[str, int, Dict[str, Any]]]
+SHEET_EXTENSIONS = (".csv", ".xlsx", ".xlsm")
+
+
+def summarize_batch(batch: Batch, months: int = HORIZON_MONTHS) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Evaluate one batch of (source, index, config) with the array engine.
+
+    Returns a one-row-per-deal summary and a long monthly table.
+    """
+    res = compute_batch([cfg for _, _, cfg in batch], months=months)
+    return _summarize(res, np.array([i for _, i, _ in batch]), [src for src, _, _ in batch], months)
+
+
+def summarize_inputs(x: Dict[str, Any], index: np.ndarray, sources: List[str],
+                     months: int = HORIZON_MONTHS) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """`summarize_batch` for ready-made batch inputs (e.g. a parsed broker sheet chunk)."""
+    return _summarize(evaluate(x, months), index, sources, months)
+
+
+def _summarize(res: Dict[str, Any], index: np.ndarray, sources: List[str],
+               months: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    dscr = res["years"]["DSCR"]
+    # Deals with no debt service in any year have no DSCR at all
+    lowest = min_dscr(res)
+    summary = {
+        "index": index,
+        "source": sources,
+        "working_cap_buffer": res["working_cap_buffer"],
+        "total_uses": res["total_uses"],
+        "total_sources": res["total_sources"],
+        "sources_minus_uses": np.round(res["total_sources"] - res["total_uses"], 2),
+        "proforma_sde_y1": res["proforma_sde_y1"],
+        "min_dscr": np.where(np.isinf(lowest), np.nan, lowest),
+        "cash_floor": res["monthly"]["Cash Balance"].min(axis=1),
+        "ending_cash": res["monthly"]["Cash Balance"][:, -1],
+        "total_distributable": np.round(res["monthly"]["Distributable"].sum(axis=1), 2),
+    }
+    for y in range(dscr.shape[1]):
+        summary[f"dscr_y{y + 1}"] = dscr[:, y]
+    n, m = res["n"], months
+    monthly = {"index": np.repeat(index, m), "Month": np.tile(res["monthly"]["Month"], n)}
+    monthly.update({k: res["monthly"][k].ravel() for k in MONTHLY_FIELDS})
+    return pd.DataFrame(summary), pd.DataFrame(monthly)
+
+
+class TableWriter:
+    """Append DataFrames incrementally to a CSV or Parquet file."""
+
+    def __init__(self, path: str, fmt: Optional[str] = None):
+        self.path = path
+        self.fmt = fmt or ("parquet" if path.endswith((".parquet", ".pq")) else "csv")
+        self._parquet = None
+        self._first = True
+        if self.fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as exc:
+                raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from exc
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.fmt == "csv":
+            df.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        self._first = False
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        elif self._first and self.fmt == "csv":
+            open(self.path, "w").close()
+
+
+def _batches(items: Iterable[Tuple[str, Dict[str, Any]]], size: int) -> Iterator[Batch]:
+    it = ((src, i, cfg) for i, (src, cfg) in enumerate(items))
+    while True:
+        batch = list(itertools.islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _jobs(paths: List[str], batch_size: int, months: int, base: Optional[Dict[str, Any]],
+          mapping: Optional[Dict[str, str]], on_errors) -> Iterator[Tuple[Any, tuple]]:
+    """(function, args) per batch: JSON configs go through `summarize_batch`, broker sheets are
+    parsed column-wise straight into batch inputs for `summarize_inputs`."""
+    offset = 0
+    for is_sheet, group in itertools.groupby(paths, key=lambda p: p.lower().endswith(SHEET_EXTENSIONS)):
+        if not is_sheet:
+            for batch in _batches(iter_config_files(list(group)), batch_size):
+                yield summarize_batch, ([(src, offset + i, cfg) for src, i, cfg in batch], months)
+                offset += len(batch)
+            continue
+        if base is None:
+            raise ValueError("Broker sheets need a base config that supplies every unmapped field")
+        for path in group:
+            for chunk in iter_sheet(path, mapping, batch_size):
+                if chunk.errors:
+                    on_errors(chunk.errors)
+                keep = chunk.valid.nonzero()[0]
+                if keep.size:
+                    index = offset + np.arange(keep.size)
+                    yield summarize_inputs, (chunk_inputs(chunk, base), index,
+                                             [chunk.names[i] for i in keep], months)
+                    offset += keep.size
+
+
+def run(paths: List[str], summary_path: Optional[str], monthly_path: Optional[str], fmt: Optional[str] = None,
+        batch_size: int = 500, workers: Optional[int] = 0, months: int = HORIZON_MONTHS,
+        progress_every: float = 2.0, log=sys.stderr, base: Optional[Dict[str, Any]] = None,
+        mapping: Optional[Dict[str, str]] = None, errors_path: Optional[str] = None) -> int:
+    """Stream every config in `paths` through the engine; returns the number processed.
+
+    JSON inputs hold configs; .csv/.xlsx inputs are broker sheets overlaid on
+    `base`, with unparseable cells written to `errors_path` (rows with any
+    bad cell are skipped). At most 2 x workers batches are in flight, so
+    memory stays bounded by batch size rather than input size. Output order
+    matches input order.
+    """
+    writers = [TableWriter(p, fmt) if p else None for p in (summary_path, monthly_path)]
+    start = last = time.perf_counter()
+    done = 0
+
+    def emit(out: Tuple[pd.DataFrame, pd.DataFrame]) -> None:
+        nonlocal done, last
+        for writer, df in zip(writers, out):
+            if writer is not None:
+                writer.write(df)
+        done += len(out[0])
+        now = time.perf_counter()
+        if log is not None and now - last >= progress_every:
+            log.write(f"{done:,} deals  {done / (now - start):,.0f}/s\n")
+            last = now
+
+    error_file = open(errors_path, "w", newline="", encoding="utf-8") if errors_path else None
+    error_csv = csv.writer(error_file) if error_file else None
+    if error_csv:
+        error_csv.writerow(["source", "row", "column", "field", "value", "message"])
+    bad_cells = 0
+
+    def on_errors(errors) -> None:
+        nonlocal bad_cells
+        bad_cells += len(errors)
+        if error_csv:
+            error_csv.writerows([e.source, e.row, e.column, e.field, e.value, e.message] for e in errors)
+
+    jobs = _jobs(paths, batch_size, months, base, mapping, on_errors)
+    try:
+        if not workers:
+            for fn, args in jobs:
+                emit(fn(*args))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = [pool.submit(fn, *args) for fn, args in itertools.islice(jobs, 2 * workers)]
+                while pending:
+                    emit(pending.pop(0).result())
+                    nxt = next(jobs, None)
+                    if nxt is not None:
+                        pending.append(pool.submit(nxt[0], *nxt[1]))
+    finally:
+        for writer in writers:
+            if writer is not None:
+                writer.close()
+        if error_file:
+            error_file.close()
+    if log is not None and bad_cells:
+        log.write(f"{bad_cells:,} unparseable cells; those rows were skipped"
+                  f"{f' (see {errors_path})' if errors_path else ''}\n")
+    if log is not None:
+        elapsed = time.perf_counter() - start
+        log.write(f"done: {done:,} deals in {elapsed:.2f}s ({done / elapsed if elapsed else 0:,.0f}/s)\n")
+    return done
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Score deal configs (JSON, JSON arrays or JSONL; '-' for stdin).")
+    p.add_argument("inputs", nargs="+", help="config files, or - for stdin")
+    p.add_argument("--summary", help="summary output (.csv or .parquet)")
+    p.add_argument("--monthly", help="monthly output (.csv or .parquet)")
+    p.add_argument("--format", choices=("csv", "parquet"), help="override format inferred from extension")
+    p.add_argument("--batch-size", type=int, default=500)
+    p.add_argument("--workers", type=int, default=0, help="worker processes (0 = in-process)")
+    p.add_argument("--months", type=int, default=HORIZON_MONTHS)
+    p.add_argument("--quiet", action="store_true")
+    p.add_argument("--base", help="config supplying every field a broker sheet (.csv/.xlsx) doesn't")
+    p.add_argument("--map", action="append", default=[], metavar="HEADER=FIELD",
+                   help="map a sheet column to a config field, e.g. 'Ask=purchase_price'")
+    p.add_argument("--errors", help="write unparseable sheet cells to this CSV")
+    args = p.parse_args(argv)
+    if not (args.summary or args.monthly):
+        p.error("give --summary and/or --monthly")
+    if not args.base and any(path.lower().endswith(SHEET_EXTENSIONS) for path in args.inputs):
+        p.error("broker sheets (.csv/.xlsx) need --base, a config that supplies every unmapped field")
+    base = None
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            doc = json.load(f)
+        base = unwrap_config(doc)
+    mapping = dict(m.split("=", 1) for m in args.map)
+    workers = os.cpu_count() if args.workers < 0 else args.workers
+    try:
+        run(args.inputs, args.summary, args.monthly, args.format, args.batch_size, workers, args.months,
+            log=None if args.quiet else sys.stderr, base=base, mapping=mapping, errors_path=args.errors)
+    except ImportError as exc:
+        p.exit(1, f"{exc}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
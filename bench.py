@@ -0,0 +1,186 @@
+"""Benchmark suite: single-deal latency, batch throughput, peak memory and export sizes.
+
+Usage:
+    python bench.py --out bench.json                      # run and save results
+    python bench.py --compare bench.json --threshold 0.25 # run and fail on regressions
+    python bench.py --quick                               # skip the 100k batch
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from engine import LoanSchedule, compute, compute_batch, pmt, stitch_refi
+from input_formats import unwrap_config
+from utils import result_tables, snapshot_metrics, to_excel_bytes, to_pdf_bytes
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_scenario.json")
+BATCH_SIZES = (1_000, 10_000, 100_000)
+CHUNK = 10_000
+
+
+def load_sample(path: str = SAMPLE) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return unwrap_config(data)
+
+
+def generate_configs(n: int, seed: int = 0, base: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """`n` deals jittered around the sample scenario (price, SDE, rates, standby, refi on/off)."""
+    base = base or load_sample()
+    rng = np.random.default_rng(seed)
+    scale = rng.uniform(0.5, 2.0, n)
+    sde = rng.uniform(0.7, 1.3, n)
+    sba_rate = rng.uniform(7.0, 13.0, n)
+    standby = rng.integers(0, 37, n)
+    refi = rng.random(n) < 0.3
+    out = []
+    for i in range(n):
+        cfg = json.loads(json.dumps(base))
+        for k in ("purchase_price", "closing_costs", "sba_principal", "seller_principal"):
+            cfg[k] = round(float(cfg[k]) * scale[i], 2)
+        cfg["hist_sde"] = round(float(cfg["hist_sde"]) * scale[i] * sde[i], 2)
+        cfg["sba_rate"] = round(float(sba_rate[i]), 3)
+        cfg["seller_standby_months"] = int(standby[i])
+        cfg["refi"] = dict(cfg.get("refi", {}), enable=bool(refi[i]))
+        out.append(cfg)
+    return out
+
+
+def _time(fn: Callable[[], Any], repeat: int, number: int = 1) -> Dict[str, float]:
+    fn()  # warm-up
+    runs = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - t) / number)
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "repeat": repeat, "number": number}
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _batch_job(n: int, chunk: int) -> Dict[str, float]:
+    """Score n generated deals in chunks; runs in a fresh process so peak RSS is its own."""
+    before = _rss_mb()
+    t = time.perf_counter()
+    gen = 0.0
+    for start in range(0, n, chunk):
+        g = time.perf_counter()
+        configs = generate_configs(min(chunk, n - start), seed=start)
+        gen += time.perf_counter() - g
+        compute_batch(configs)
+    elapsed = time.perf_counter() - t - gen
+    return {"median_s": elapsed, "min_s": elapsed, "repeat": 1, "number": 1,
+            "throughput_per_s": n / elapsed if elapsed else float("inf"),
+            "peak_mb": _rss_mb() - before}
+
+
+def single_deal(repeat: int = 20) -> Dict[str, Dict[str, Any]]:
+    cfg = load_sample()
+    sba = LoanSchedule("SBA", cfg["sba_principal"], cfg["sba_rate"], cfg["sba_term_months"], cfg["sba_io_months"])
+    rows = sba.build(months=60)
+    results = {
+        "pmt": _time(lambda: pmt(0.1 / 12, 120, 1_800_000.0), repeat, 1000),
+        "LoanSchedule.build": _time(lambda: sba.build(months=60), repeat, 50),
+        "stitch_refi": _time(lambda: stitch_refi(rows, 24, 8.5, 120), repeat, 50),
+        "compute": _time(lambda: compute(cfg), repeat, 10),
+    }
+    outs = compute(cfg)
+    tables = result_tables(outs)
+    pdf_tables = {"Year 1 Monthly": tables["Year1_Monthly"], "Investor Summary": tables["Investor_Summary"]}
+    excel = to_excel_bytes(tables)
+    pdf = to_pdf_bytes("Treehouse Deal — Snapshot", snapshot_metrics(outs), pdf_tables)
+    results["to_excel_bytes"] = dict(_time(lambda: to_excel_bytes(tables), max(repeat // 4, 3)), bytes=len(excel))
+    results["to_pdf_bytes"] = dict(
+        _time(lambda: to_pdf_bytes("Treehouse Deal — Snapshot", snapshot_metrics(outs), pdf_tables), max(repeat // 4, 3)),
+        bytes=len(pdf))
+    return results
+
+
+def batch(sizes: Sequence[int] = BATCH_SIZES, chunk: int = CHUNK) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    ctx = multiprocessing.get_context("spawn")
+    for n in sizes:
+        with ctx.Pool(1) as pool:
+            results[f"compute_batch[{n}]"] = pool.apply(_batch_job, (n, chunk))
+    return results
+
+
+def run(sizes: Sequence[int] = BATCH_SIZES, repeat: int = 20) -> Dict[str, Any]:
+    results = single_deal(repeat)
+    results.update(batch(sizes))
+    return {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25) -> List[str]:
+    """Names of stages whose median time grew by more than `threshold` (0.25 = 25%) over the baseline."""
+    regressions = []
+    for name, base in baseline["results"].items():
+        cur = current["results"].get(name)
+        if cur is None or not base.get("median_s"):
+            continue
+        ratio = cur["median_s"] / base["median_s"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {base['median_s'] * 1e3:.3f} ms -> {cur['median_s'] * 1e3:.3f} ms "
+                               f"({(ratio - 1) * 100:+.0f}%)")
+    return regressions
+
+
+def _report(data: Dict[str, Any], out=sys.stdout) -> None:
+    for name, r in data["results"].items():
+        extra = "".join([f"  {r['throughput_per_s']:,.0f}/s" if "throughput_per_s" in r else "",
+                         f"  peak {r['peak_mb']:,.1f} MB" if "peak_mb" in r else "",
+                         f"  {r['bytes']:,} B" if "bytes" in r else ""])
+        out.write(f"{name:<24} {r['median_s'] * 1e3:>12.3f} ms{extra}\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Treehouse engine and export benchmarks.")
+    p.add_argument("--out", help="write results JSON here")
+    p.add_argument("--compare", metavar="BASELINE", help="baseline results JSON to check against")
+    p.add_argument("--current", help="compare this results JSON instead of running the suite")
+    p.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown as a fraction (default 0.25)")
+    p.add_argument("--sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    p.add_argument("--quick", action="store_true", help="skip the largest batch size")
+    p.add_argument("--repeat", type=int, default=20)
+    args = p.parse_args(argv)
+
+    if args.current:
+        with open(args.current, encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        sizes = [s for s in args.sizes if not (args.quick and s >= 100_000)]
+        data = run(sizes, args.repeat)
+    _report(data)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(data, json.load(f), args.threshold)
+        for line in regressions:
+            sys.stderr.write(f"REGRESSION {line}\n")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
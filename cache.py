@@ -0,0 +1,145 @@
+"""Content-hashed, LRU-bounded memoization of engine results."""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from engine import compute_result
+from results import DealResult
+from instrument import count, span
+
+
+def normalize(value: Any) -> Any:
+    """Canonical form of a config: numbers as floats, dict keys sorted on dump."""
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if hasattr(value, "item"):  # numpy / pandas scalars from data editors
+        return normalize(value.item())
+    return str(value)
+
+
+def config_key(config: Dict[str, Any]) -> str:
+    """Stable SHA-256 of the normalized config; 3 and 3.0 hash the same."""
+    blob = json.dumps(normalize(config), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _size(value: Any) -> Optional[int]:
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, DealResult):
+        return value.nbytes
+    return None
+
+
+class ResultCache:
+    """Thread-safe LRU cache with entry and byte budgets.
+
+    Cached results are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                count("cache_misses")
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            count("cache_hits")
+            return item[0]
+
+    def put(self, key: str, value: Any, size: Optional[int] = None) -> None:
+        if size is None:
+            size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def get_or_compute(self, config: Dict[str, Any], fn: Callable[[Dict[str, Any]], Any] = compute_result) -> Any:
+        with span("cache:key"):
+            key = config_key(config)
+        return self.get_or_build(key, lambda: fn(config), "compute")
+
+    def get_or_build(self, key: str, build: Callable[[], Any], label: str = "build") -> Any:
+        """Cached value for `key`, calling `build()` (timed as `label`) on a miss.
+
+        bytes values are sized by length and DealResults by their arrays rather than by pickling.
+        """
+        hit = self.get(key)
+        if hit is not None:
+            return hit
+        with span(label):
+            value = build()
+        with span("cache:put"):
+            self.put(key, value, _size(value))
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self._data), "bytes": self._bytes,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+
+# Module-level instance: Streamlit imports modules once per server process,
+# so every session shares it.
+SHARED_CACHE = ResultCache(
+    max_entries=int(os.getenv("TREEHOUSE_CACHE_ENTRIES", "256")),
+    max_bytes=int(os.getenv("TREEHOUSE_CACHE_BYTES", str(64 * 1024 * 1024))),
+)
+
+# Rendered Excel/PDF bytes, keyed by "<kind>:<config hash>"; filled only when a user asks for an export
+EXPORT_CACHE = ResultCache(
+    max_entries=int(os.getenv("TREEHOUSE_EXPORT_ENTRIES", "64")),
+    max_bytes=int(os.getenv("TREEHOUSE_EXPORT_BYTES", str(32 * 1024 * 1024))),
+)
+
+
+def cached_result(config: Dict[str, Any]) -> DealResult:
+    """`compute_result` through the shared process-wide cache."""
+    return SHARED_CACHE.get_or_compute(config, compute_result)
+
+
+def cached_compute(config: Dict[str, Any]) -> Dict[str, Any]:
+    """`compute` through the shared process-wide cache (the cache holds the DealResult)."""
+    return cached_result(config).legacy()
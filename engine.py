@@ -1,7 +1,14 @@
 from __future__ import annotations
+import hashlib
 from dataclasses import dataclass
-from typing import List, Dict, Any
-import copy
+from typing import List, Dict, Any, Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from instrument import count, span
+from money import from_cents, money_mode, to_cents
+from results import ANNUAL_FIELDS, MONTHLY_FIELDS, DealResult
+from waterfall import allocate, allocate_cents, config_tiers, tier_array
 
 # ----------------------------
 # Helper functions
@@ -15,6 +22,240 @@ def pmt(rate: float, nper: int, pv: float) -> float:
     return (rate * pv) / (1 - (1 + rate) ** (-nper))
 
 
+PHASES = ("standby", "interest_only", "amortization")
+SCHEDULE_FIELDS = ("begin_balance", "payment", "interest", "principal", "end_balance")
+
+
+def pmt_array(rate: np.ndarray, nper: np.ndarray, pv: np.ndarray) -> np.ndarray:
+    """Vectorized `pmt` over arrays of loans."""
+    rate, nper, pv = np.asarray(rate, float), np.asarray(nper), np.asarray(pv, float)
+    n = np.maximum(nper, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = np.where(rate == 0, pv / n, (rate * pv) / (1 - (1 + rate) ** (-n)))
+    return np.where(nper > 0, annuity, 0.0)
+
+
+def _segment(P, r, term, io, s, accrue, t) -> Dict[str, np.ndarray]:
+    """Closed-form schedule rows at month offset `t` of a loan segment; all arguments broadcast.
+
+    `r` is the monthly rate. Standby (s months) compounds the balance if
+    `accrue`, interest-only (io months) pays interest, then the post-standby
+    balance amortizes over term - io - s months.
+    """
+    g = 1 + r
+    n = np.maximum(0, term - io - s)
+    in_standby = t < s
+    in_io = (t >= s) & (t < s + io)
+    in_amort = (t >= s + io) & (t < s + io + n)
+    # Phases with no rows here are skipped
+    has_sb, has_io = bool(in_standby.any()), bool(in_io.any())
+
+    # Standby: balance compounds (or not) with no payments
+    if has_sb:
+        sb_begin = np.where(accrue, P * g ** np.minimum(t, s), P)
+        sb_interest = sb_begin * r
+    bal_s = np.where(accrue, P * g ** s, P) if np.any(s > 0) else P
+
+    # Amortization: level payment on the post-standby balance
+    pay = pmt_array(r, n, bal_s)
+    k = np.maximum(0, t - s - io)
+    gk = g ** k
+    with np.errstate(divide="ignore", invalid="ignore"):
+        am_begin = np.where(r == 0, bal_s - pay * k, bal_s * gk - pay * (gk - 1) / r)
+    am_begin = np.maximum(am_begin, 0.0)
+    am_interest = am_begin * r
+    am_principal = np.minimum(pay - am_interest, am_begin)
+
+    # Phases are disjoint, so nested `where` picks the same values as `np.select` at a fraction of the overhead
+    def by_phase(standby, io_, amort, other=0.0):
+        out = np.where(in_amort, amort, other)
+        if has_io:
+            out = np.where(in_io, io_(), out)
+        return np.where(in_standby, standby(), out) if has_sb else out
+
+    interest = by_phase(lambda: sb_interest, lambda: bal_s * r, am_interest)
+    principal_paid = np.where(in_amort, am_principal, 0.0)
+    payment = np.where(in_standby, 0.0, interest + principal_paid) if has_sb else interest + principal_paid
+    begin = by_phase(lambda: sb_begin, lambda: bal_s, am_begin)
+    end = by_phase(lambda: np.where(accrue, sb_begin + sb_interest, sb_begin), lambda: bal_s, am_begin - am_principal)
+    phase = by_phase(lambda: 0, lambda: 1, 2, -1).astype(np.int8)
+    return {
+        "phase": phase,
+        "begin_balance": begin,
+        "payment": payment,
+        "interest": interest,
+        "principal": principal_paid,
+        "end_balance": end,
+    }
+
+
+def _loan_params(principal, annual_rate_pct, term_months, interest_only_months, standby_months,
+                 accrue_during_standby) -> Tuple[np.ndarray, ...]:
+    """Broadcast loan arguments to (N,) arrays: principal, monthly rate, term, io, standby, accrue."""
+    args = [np.atleast_1d(np.asarray(v, dt)) for v, dt in (
+        (principal, float), (annual_rate_pct, float), (term_months, np.int64), (interest_only_months, np.int64),
+        (standby_months, np.int64), (accrue_during_standby, bool))]
+    args[1] = args[1] / 100 / 12
+    n = np.broadcast_shapes(*(a.shape for a in args))[0]
+    # Fresh arrays; scalars (the single-loan case) are filled rather than broadcast
+    return tuple(a.copy() if len(a) == n else np.full(n, a[0]) for a in args)
+
+
+def amortize(principal, annual_rate_pct, term_months, interest_only_months=0, standby_months=0,
+             accrue_during_standby=True, months: int = 60) -> Dict[str, np.ndarray]:
+    """Closed-form schedules for N loans at once.
+
+    Every argument broadcasts to shape (N,). Returns (N, months) arrays for
+    `phase` (index into PHASES, -1 once the loan is finished) and each of
+    SCHEDULE_FIELDS, plus `length` (N,) = rows the loan actually has.
+    """
+    P, r, term, io, s, accrue = _loan_params(principal, annual_rate_pct, term_months, interest_only_months,
+                                             standby_months, accrue_during_standby)
+    out = _segment(P[:, None], r[:, None], term[:, None], io[:, None], s[:, None], accrue[:, None],
+                   np.arange(months)[None, :])
+    out["length"] = s + io + np.maximum(0, term - io - s)
+    return out
+
+
+# Debt events, applied after the month they name (month 0 = before the first payment)
+EVENT_KINDS = ("refinance", "prepay", "rate_reset", "standby")
+EVENT_FIELDS = ("month", "kind", "rate_pct", "term_months", "io_months", "amount", "months")
+
+
+@dataclass(frozen=True)
+class DebtEvent:
+    """One change to a loan at the end of `month`.
+
+    refinance: new `rate_pct` and `term_months` (optionally `io_months`) on the cent-rounded balance.
+    prepay: pay down `amount`; the payment is recast over the remaining term.
+    rate_reset: new `rate_pct`; the payment is recast over the remaining term.
+    standby: pause payments for `months` more months; maturity extends by as much.
+    """
+    month: int
+    kind: str
+    rate_pct: float = 0.0
+    term_months: int = 0
+    io_months: int = 0
+    amount: float = 0.0
+    months: int = 0
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "DebtEvent":
+        if d.get("kind") not in EVENT_KINDS:
+            raise ValueError(f"Unknown debt event '{d.get('kind')}'; choose among {EVENT_KINDS}")
+        return cls(int(_num(d.get("month"))), d["kind"], _num(d.get("rate_pct")), int(_num(d.get("term_months"))),
+                   int(_num(d.get("io_months"))), _num(d.get("amount")), int(_num(d.get("months"))))
+
+
+def rate_curve_events(curve: Dict[int, float], margin_pct: float = 0.0) -> List[DebtEvent]:
+    """Rate resets from an index curve {month: index rate %}, each at index + margin."""
+    return [DebtEvent(int(m), "rate_reset", rate_pct=float(r) + margin_pct) for m, r in sorted(curve.items())]
+
+
+def event_array(event_lists: Sequence[Sequence[DebtEvent]]) -> np.ndarray:
+    """(N, K, len(EVENT_FIELDS)) array of per-loan events sorted by month; padding has kind -1."""
+    width = max(map(len, event_lists), default=0)
+    out = np.zeros((len(event_lists), width, len(EVENT_FIELDS)))
+    out[:, :, 1] = -1
+    for n, events in enumerate(event_lists):
+        for k, e in enumerate(sorted(events, key=lambda e: e.month)):  # stable: same-month events keep list order
+            out[n, k] = (e.month, EVENT_KINDS.index(e.kind), e.rate_pct, e.term_months, e.io_months, e.amount, e.months)
+    return out
+
+
+def amortize_events(principal, annual_rate_pct, term_months, interest_only_months=0, standby_months=0,
+                    accrue_during_standby=True, events: Optional[np.ndarray] = None,
+                    months: int = 60) -> Dict[str, np.ndarray]:
+    """`amortize` with per-loan debt events, in one forward pass over event slots.
+
+    `events` is an `event_array` (N, K, fields), sorted by month per loan.
+    Each slot only updates per-loan segment state (balance, rate and months
+    left in each phase) from the closed form, so the pass is O(N x K); the
+    (N, months) schedule is then evaluated once with every month mapped to
+    its segment, at about the cost of a plain `amortize`.
+    """
+    if events is None or events.shape[1] == 0:
+        return amortize(principal, annual_rate_pct, term_months, interest_only_months, standby_months,
+                        accrue_during_standby, months)
+    bal, r, term, io, sb, accrue = _loan_params(principal, annual_rate_pct, term_months, interest_only_months,
+                                                standby_months, accrue_during_standby)
+    n_loans, n_slots = events.shape[:2]
+    amort = np.maximum(0, term - io - sb)
+    start = np.zeros(n_loans, np.int64)
+    # Segment state per slot; slot 0 is the loan as originated
+    state = {"bal": [bal], "r": [r], "s": [sb], "io": [io], "n": [amort], "start": [start]}
+    # Latest segment starting at each month, propagated forward below
+    seg_at = np.zeros((n_loans, months), np.int64)
+
+    for k in range(n_slots):
+        m = events[:, k, 0].astype(np.int64)
+        kind = events[:, k, 1].astype(np.int64)
+        rate_pct, new_term, new_io = events[:, k, 2], events[:, k, 3].astype(np.int64), events[:, k, 4].astype(np.int64)
+        elapsed = m - start
+        live = (kind >= 0) & (m >= 0) & (m < months) & ((elapsed < sb + io + amort) | (elapsed == 0))
+        # Roll the segment forward to the end of month m
+        end = _segment(bal, r, sb + io + amort, io, sb, accrue, np.maximum(elapsed - 1, 0))["end_balance"]
+        b = np.round(np.where(elapsed > 0, end, bal), 2)
+        s_left = np.maximum(sb - elapsed, 0)
+        used = np.maximum(elapsed - sb, 0)
+        io_left = np.maximum(io - used, 0)
+        n_left = np.maximum(amort - np.maximum(used - io, 0), 0)
+
+        refi = kind == 0
+        r_new = np.where(refi | (kind == 2), rate_pct / 100 / 12, r)
+        s_left = np.where(refi, 0, s_left + np.where(kind == 3, events[:, k, 6].astype(np.int64), 0))
+        io_left = np.where(refi, new_io, io_left)
+        n_left = np.where(refi, np.maximum(new_term - new_io, 0), n_left)
+        b = np.where(kind == 1, np.maximum(b - events[:, k, 5], 0.0), b)
+        done = b <= 0
+        s_left, io_left, n_left = (np.where(done, 0, v) for v in (s_left, io_left, n_left))
+
+        bal, r = np.where(live, b, bal), np.where(live, r_new, r)
+        sb, io, amort = np.where(live, s_left, sb), np.where(live, io_left, io), np.where(live, n_left, amort)
+        start = np.where(live, m, start)
+        for key, v in zip(state, (bal, r, sb, io, amort, start)):
+            state[key].append(v)
+        rows = np.nonzero(live)[0]
+        seg_at[rows, m[rows]] = k + 1
+
+    seg = np.maximum.accumulate(seg_at, axis=1)
+    p = {key: np.take_along_axis(np.stack(v, axis=1), seg, axis=1) for key, v in state.items()}
+    out = _segment(p["bal"], p["r"], p["s"] + p["io"] + p["n"], p["io"], p["s"], accrue[:, None],
+                   np.arange(months)[None, :] - p["start"])
+    out["length"] = start + sb + io + amort
+    return out
+
+
+@dataclass
+class ScheduleColumns:
+    """Struct-of-arrays loan schedule; one entry per month."""
+    month: np.ndarray
+    phase: np.ndarray
+    begin_balance: np.ndarray
+    payment: np.ndarray
+    interest: np.ndarray
+    principal: np.ndarray
+    end_balance: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.month)
+
+    def row(self, month: int) -> int:
+        """Row index of `month` (months are contiguous), or -1 if outside the schedule."""
+        idx = month - int(self.month[0]) if len(self.month) else -1
+        return idx if 0 <= idx < len(self.month) else -1
+
+    def to_rows(self) -> List[Dict[str, float]]:
+        """Legacy list-of-dicts view, rounded to cents."""
+        cols = [np.round(getattr(self, f), 2).tolist() for f in SCHEDULE_FIELDS]
+        phases = [PHASES[p] for p in self.phase.tolist()]
+        return [
+            {"month": m, "phase": ph, "begin_balance": b, "payment": pay,
+             "interest": i, "principal": p, "end_balance": e}
+            for m, ph, b, pay, i, p, e in zip(self.month.tolist(), phases, *cols)
+        ]
+
+
 @dataclass
 class LoanSchedule:
     name: str
@@ -24,152 +265,723 @@ class LoanSchedule:
     interest_only_months: int = 0
     standby_months: int = 0
     accrue_during_standby: bool = True
+    events: Tuple[DebtEvent, ...] = ()
+
+    def build_columns(self, months: int = 60, start_month: int = 1) -> ScheduleColumns:
+        """Generate the schedule as columns in one vectorized pass, applying `events` in month order."""
+        a = amortize_events(self.principal, self.annual_rate_pct, self.term_months, self.interest_only_months,
+                            self.standby_months, self.accrue_during_standby,
+                            event_array([self.events]) if self.events else None, months=months)
+        n = int(min(months, a["length"][0]))
+        return ScheduleColumns(np.arange(start_month, start_month + n), a["phase"][0, :n],
+                               *(a[f][0, :n] for f in SCHEDULE_FIELDS))
 
     def build(self, months: int = 60, start_month: int = 1) -> List[Dict[str, float]]:
         """Generate loan schedule for each month."""
-        bal = float(self.principal)
-        r = float(self.annual_rate_pct) / 100 / 12
-        sched: List[Dict[str, float]] = []
-
-        # Standby period
-        for _ in range(self.standby_months):
-            m = start_month + len(sched)
-            interest = bal * r
-            if self.accrue_during_standby:
-                bal += interest
-            sched.append({
-                "month": m,
-                "phase": "standby",
-                "begin_balance": round(bal - interest, 2),
-                "payment": 0.0,
-                "interest": round(interest, 2),
-                "principal": 0.0,
-                "end_balance": round(bal, 2)
-            })
-
-        # Interest-only period
-        for _ in range(self.interest_only_months):
-            m = start_month + len(sched)
-            interest = bal * r
-            sched.append({
-                "month": m,
-                "phase": "interest_only",
-                "begin_balance": round(bal, 2),
-                "payment": round(interest, 2),
-                "interest": round(interest, 2),
-                "principal": 0.0,
-                "end_balance": round(bal, 2)
-            })
-
-        # Amortization period
-        remaining_term = max(0, self.term_months - self.interest_only_months - self.standby_months)
-        if remaining_term > 0:
-            payment = pmt(r, remaining_term, bal)
-            for _ in range(remaining_term):
-                m = start_month + len(sched)
-                interest = bal * r
-                principal = payment - interest
-                if principal > bal:
-                    principal = bal
-                    payment = interest + principal
-                bal -= principal
-                sched.append({
-                    "month": m,
-                    "phase": "amortization",
-                    "begin_balance": round(bal + principal, 2),
-                    "payment": round(payment, 2),
-                    "interest": round(interest, 2),
-                    "principal": round(principal, 2),
-                    "end_balance": round(bal, 2)
-                })
-        return sched[:months]
+        return self.build_columns(months, start_month).to_rows()
 
 
 def stitch_refi(original: List[Dict[str, float]], refi_month: int,
                 new_rate_pct: float, new_term_months: int) -> List[Dict[str, float]]:
     """Stitch a refinance schedule starting at refi_month."""
-    if refi_month <= 0:
+    if refi_month <= 0 or not original:
         return original
-    rem_bal = None
-    for row in original:
-        if row["month"] == refi_month:
-            rem_bal = row["end_balance"]
-            break
-    if rem_bal is None:
+    # Schedules are contiguous by month, so the refi row is found by offset
+    idx = refi_month - int(original[0]["month"])
+    if idx < 0 or idx >= len(original):
         return original
+    rem_bal = original[idx]["end_balance"]
 
     new_loan = LoanSchedule("Refi", rem_bal, new_rate_pct, new_term_months)
-    new_sched = new_loan.build(months=600, start_month=refi_month + 1)
-    return [r for r in original if r["month"] <= refi_month] + new_sched
+    new_sched = new_loan.build(months=new_term_months, start_month=refi_month + 1)
+    return original[:idx + 1] + new_sched
+
+
+def stitch_refi_columns(original: ScheduleColumns, refi_month: int, new_rate_pct: float,
+                        new_term_months: int, months: Optional[int] = None) -> ScheduleColumns:
+    """Columnar `stitch_refi`; builds only the refi rows needed to reach `months` total."""
+    if refi_month <= 0 or not len(original):
+        return original
+    idx = refi_month - int(original.month[0])
+    if idx < 0 or idx >= len(original):
+        return original
+    rem_bal = round(float(original.end_balance[idx]), 2)
+    n = new_term_months if months is None else max(0, min(new_term_months, months - idx - 1))
+    new = LoanSchedule("Refi", rem_bal, new_rate_pct, new_term_months).build_columns(n, refi_month + 1)
+    return ScheduleColumns(*(np.concatenate([getattr(original, f)[:idx + 1], getattr(new, f)])
+                             for f in ("month", "phase") + SCHEDULE_FIELDS))
 
 
 # ----------------------------
-# Core compute function
+# Array core (shared by compute and compute_batch)
+# ----------------------------
+HORIZON_MONTHS = 60
+
+
+def _num(val: Any) -> float:
+    """Float from a config/editor cell; None, "" and NaN read as 0."""
+    try:
+        out = float(val)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if out != out else out
+
+
+def _get(cfg: Dict[str, Any], key: str) -> float:
+    """Read a possibly dotted key (e.g. "nwc_days.ar") from a config as float."""
+    head, _, tail = key.partition(".")
+    val = cfg.get(head, 0)
+    if tail:
+        val = (val or {}).get(tail, 0)
+    return _num(val)
+
+
+def _pad(arr: np.ndarray, months: int) -> np.ndarray:
+    """Zero-pad or truncate the last axis to `months`."""
+    arr = arr[..., :months]
+    short = months - arr.shape[-1]
+    if short <= 0:
+        return arr
+    return np.concatenate([arr, np.zeros(arr.shape[:-1] + (short,))], axis=-1)
+
+
+def operating_lines(sde_y1, growth_pct, revenue_y1, cogs_pct, ar_days, inv_days, ap_days,
+                    months: int = HORIZON_MONTHS) -> Tuple[np.ndarray, np.ndarray]:
+    """Monthly SDE and ΔNWC, each (N, months), from (N,) inputs.
+
+    SDE and revenue grow by `growth_pct` from Year 2; ΔNWC is the
+    year-over-year change in AR + Inventory − AP, spread evenly over the
+    year's months (zero in Year 1, when NWC is acquired with the business).
+    """
+    year = np.arange(months) // 12
+    n_years = int(year[-1]) + 1 if months else 0
+    growth = (1 + growth_pct / 100)[:, None] ** np.arange(n_years)[None, :]
+    revenue = revenue_y1[:, None] * growth
+    cogs = revenue * (cogs_pct / 100)[:, None]
+    nwc = (revenue * ar_days[:, None] + cogs * (inv_days - ap_days)[:, None]) / 365
+    d_nwc = np.diff(nwc, axis=1, prepend=nwc[:, :1])
+    return (sde_y1[:, None] * growth / 12)[:, year], (d_nwc / 12)[:, year]
+
+
+def cash_waterfall(sde_m, d_nwc_m, maint_m, growth_m, debt_service, retain, wc_buf, inflow) -> Dict[str, np.ndarray]:
+    """Monthly CFADS → FCFE → distributable / retained → cash, all (N, months).
+
+    Cash grows by retained FCFE and follow-on inflows; a month with negative
+    FCFE draws the shortfall from cash.
+    """
+    cfads = sde_m - maint_m[:, None] - d_nwc_m
+    fcfe = cfads - debt_service - growth_m[:, None]
+    distributable = np.maximum(0.0, fcfe * (1 - retain)[:, None])
+    retained = np.where(fcfe > 0, np.maximum(0.0, fcfe) - distributable, 0.0)
+    cash = wc_buf[:, None] + np.cumsum(fcfe - distributable + inflow, axis=1)
+    return {"cfads": cfads, "fcfe": fcfe, "distributable": distributable, "retained": retained, "cash": cash}
+
+
+def cash_waterfall_cents(sde_m, d_nwc_m, maint_m, growth_m, debt_service, retain, wc_buf,
+                         inflow) -> Dict[str, np.ndarray]:
+    """`cash_waterfall` on int64 cents; only distributable is rounded (half to even)."""
+    cfads = sde_m - maint_m[:, None] - d_nwc_m
+    fcfe = cfads - debt_service - growth_m[:, None]
+    distributable = np.maximum(0, np.rint(fcfe * (1 - retain)[:, None]).astype(np.int64))
+    retained = np.where(fcfe > 0, fcfe - distributable, 0)
+    cash = wc_buf[:, None] + np.cumsum(fcfe - distributable + inflow, axis=1)
+    return {"cfads": cfads, "fcfe": fcfe, "distributable": distributable, "retained": retained, "cash": cash}
+
+
+def annualize(arr: np.ndarray) -> np.ndarray:
+    """Sum the trailing month axis into years by reshape (partial years dropped)."""
+    years = arr.shape[-1] // 12
+    return arr[..., :years * 12].reshape(arr.shape[:-1] + (years, 12)).sum(axis=-1)
+
+
+def dscr(cfads: np.ndarray, debt_service: np.ndarray) -> np.ndarray:
+    """CFADS / debt service; NaN where there is no debt service."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(debt_service > 0, cfads / debt_service, np.nan)
+
+
+def min_dscr(res: Dict[str, Any]) -> np.ndarray:
+    """(N,) lowest annual DSCR of `evaluate` results; +inf with no debt service (or no full year)."""
+    dscr = res["years"]["DSCR"]
+    return np.where(np.isnan(dscr), np.inf, dscr).min(axis=1, initial=np.inf)
+
+
+def investor_rollup(dividends_y: np.ndarray, contributed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Equity multiple and payback year (0 = not within horizon) from (..., I, years) dividends."""
+    cum = np.cumsum(dividends_y, axis=-1)
+    paid = (cum >= contributed[..., None]) & (contributed[..., None] > 0)
+    # Horizons shorter than a year have no year columns (argmax needs at least one)
+    first = paid.argmax(axis=-1) if paid.shape[-1] else np.zeros(paid.shape[:-1], np.int64)
+    payback = np.where(paid.any(axis=-1), first + 1, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        multiple = np.where(contributed > 0, dividends_y.sum(axis=-1) / contributed, np.nan)
+    return multiple, payback
+
+
 # ----------------------------
-def compute(config: Dict[str, Any]) -> Dict[str, Any]:
-    """Compute simplified Treehouse deal cashflow summary."""
-    cfg = copy.deepcopy(config)
+# Compute stages
+# ----------------------------
+def _freeze(val: Any) -> Any:
+    """Immutable copy of a config value so in-place edits can't alias snapshots."""
+    if isinstance(val, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in val.items()))
+    if isinstance(val, (list, tuple)):
+        return tuple(_freeze(v) for v in val)
+    return val
+
 
-    # --- Basic variables ---
+def _read(cfg: Dict[str, Any], key: str) -> Any:
+    """Read a config path; "investors.*.pct" yields a tuple over the list."""
+    head, _, rest = key.partition(".")
+    val = cfg.get(head)
+    if not rest:
+        return val
+    if rest.startswith("*."):
+        field_name = rest[2:]
+        return tuple(item.get(field_name) for item in (val or []))
+    return (val or {}).get(rest)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One named step of `compute`: reads `keys` from the config and the outputs of `deps`."""
+    name: str
+    keys: Tuple[str, ...]
+    deps: Tuple[str, ...]
+    fn: Callable[[Dict[str, Any], Dict[str, Any]], Any]
+
+    def snapshot(self, cfg: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(_freeze(_read(cfg, k)) for k in self.keys)
+
+
+def _vec(cfg: Dict[str, Any], key: str) -> np.ndarray:
+    return np.array([_get(cfg, key)])
+
+
+def _uses_sources(cfg: Dict[str, Any], up: Dict[str, Any]) -> Dict[str, float]:
     purchase = float(cfg.get("purchase_price", 0))
     closing = float(cfg.get("closing_costs", 0))
     wc_buf = float(cfg.get("wc_months", 0)) * float(cfg.get("wc_monthly_opex", 0))
-    total_uses = purchase + closing + wc_buf
+    investor_equity = [float(i.get("contribution", 0)) for i in cfg.get("investors", [])]
+    total_sources = sum(investor_equity) + float(cfg.get("sba_principal", 0)) + float(cfg.get("seller_principal", 0))
+    return {"wc_buf": wc_buf, "total_uses": purchase + closing + wc_buf, "total_sources": total_sources}
+
+
+def _proforma(cfg: Dict[str, Any], up: Dict[str, Any]) -> float:
+    return float(cfg.get("hist_sde", 0)) - float(cfg.get("gm_salary", 0)) + float(cfg.get("normalized_adj", 0))
 
+
+def _operations(cfg: Dict[str, Any], up: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    sde, d_nwc = operating_lines(np.array([up["proforma"]]), _vec(cfg, "sde_growth_pct"), _vec(cfg, "revenue_y1"),
+                                 _vec(cfg, "cogs_pct"), _vec(cfg, "nwc_days.ar"), _vec(cfg, "nwc_days.inv"),
+                                 _vec(cfg, "nwc_days.ap"))
+    return {"sde": sde[0], "d_nwc": d_nwc[0]}
+
+
+def _loan_events(cfg: Dict[str, Any], key: str) -> List[DebtEvent]:
+    return [DebtEvent.from_dict(e) for e in cfg.get(key) or []]
+
+
+def _refi_event(cfg: Dict[str, Any]) -> List[DebtEvent]:
+    """The legacy `refi` block as a refinance at the start of its year."""
+    refi = cfg.get("refi") or {}
+    month = (int(refi.get("year", 0)) - 1) * 12
+    if not refi.get("enable") or month <= 0:
+        return []
+    return [DebtEvent(month, "refinance", float(refi.get("new_rate_pct", 0)), int(refi.get("new_term_months", 0)))]
+
+
+def _sba_schedule(cfg: Dict[str, Any], up: Dict[str, Any]) -> ScheduleColumns:
+    return LoanSchedule("SBA", float(cfg.get("sba_principal", 0)), float(cfg.get("sba_rate", 0)),
+                        int(cfg.get("sba_term_months", 0)), int(cfg.get("sba_io_months", 0)),
+                        events=tuple(_refi_event(cfg) + _loan_events(cfg, "sba_events"))).build_columns(HORIZON_MONTHS)
+
+
+def _seller_schedule(cfg: Dict[str, Any], up: Dict[str, Any]) -> ScheduleColumns:
+    return LoanSchedule("Seller", float(cfg.get("seller_principal", 0)), float(cfg.get("seller_rate", 0)),
+                        int(cfg.get("seller_term_months", 0)), 0, int(cfg.get("seller_standby_months", 0)), True,
+                        events=tuple(_loan_events(cfg, "seller_events"))).build_columns(HORIZON_MONTHS)
+
+
+def _follow_on(cfg: Dict[str, Any], up: Dict[str, Any]) -> Dict[str, Any]:
+    inflow = np.zeros(HORIZON_MONTHS)
+    by_name: Dict[str, float] = {}
+    for fo in cfg.get("follow_on", []) or []:
+        m = (int(_num(fo.get("year"))) - 1) * 12 + int(_num(fo.get("month")))
+        amount = _num(fo.get("amount"))
+        if 1 <= m <= HORIZON_MONTHS and amount:
+            inflow[m - 1] += amount
+            by_name[fo.get("name")] = by_name.get(fo.get("name"), 0.0) + amount
+    return {"inflow": inflow, "by_name": by_name}
+
+
+def _waterfall(cfg: Dict[str, Any], up: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Months 1-60 on array columns."""
+    # Payments are cent-rounded before use, as in the row-wise schedule
+    sba_pay = _pad(np.round(up["sba_schedule"].payment, 2), HORIZON_MONTHS)
+    seller_pay = _pad(np.round(up["seller_schedule"].payment, 2), HORIZON_MONTHS)
+    maint_m = _vec(cfg, "maint_capex") / 12
+    growth_m = _vec(cfg, "growth_capex") / 12
+    ops, inflow = up["operations"], up["follow_on"]["inflow"]
+    w = cash_waterfall(ops["sde"][None], ops["d_nwc"][None], maint_m, growth_m, (sba_pay + seller_pay)[None],
+                       _vec(cfg, "retain_pct") / 100, np.array([up["uses_sources"]["wc_buf"]]), inflow[None])
+    out = {k: v[0] for k, v in w.items()}
+    out.update({"sba_payment": sba_pay, "seller_payment": seller_pay, "debt_service": sba_pay + seller_pay,
+                "maint": np.full(HORIZON_MONTHS, maint_m[0]), "growth": np.full(HORIZON_MONTHS, growth_m[0])})
+    return out
+
+
+def _is_gp(investor: Dict[str, Any]) -> bool:
+    return str(investor.get("class") or "").lower() == "gp"
+
+
+def _dividends(cfg: Dict[str, Any], up: Dict[str, Any]) -> Dict[str, Any]:
     investors = cfg.get("investors", [])
-    investor_equity = [float(i.get("contribution", 0)) for i in investors]
-    investor_pcts = [float(i.get("pct", 0)) / 100 for i in investors]
-    total_sources = sum(investor_equity) + float(cfg.get("sba_principal", 0)) + float(cfg.get("seller_principal", 0))
+    names = [inv.get("name", f"Investor {idx+1}") for idx, inv in enumerate(investors)]
+    pcts = np.array([float(i.get("pct", 0)) for i in investors]).reshape(-1)
+    by_name = up["follow_on"]["by_name"]
+    # A follow-on is credited to the first investor with its name, as in `batch_inputs`
+    first = {n: idx for idx, n in reversed(list(enumerate(names)))}
+    contributed = np.array([float(i.get("contribution", 0)) + (by_name.get(n, 0.0) if first[n] == idx else 0.0)
+                            for idx, (i, n) in enumerate(zip(investors, names))]).reshape(-1)
+    capital_in = up["follow_on"]["inflow"].copy()
+    capital_in[0] += sum(float(i.get("contribution", 0)) for i in investors)
+    gp = np.array([_is_gp(i) for i in investors], bool)
+    monthly = allocate(up["waterfall"]["distributable"][None], pcts[None], contributed[None], gp[None],
+                       capital_in[None], tier_array([config_tiers(cfg)]))[0]
+    annual = annualize(monthly)
+    multiple, payback = investor_rollup(annual, contributed)
+    return {"names": names, "pcts": pcts, "contributed": contributed, "monthly": monthly, "annual": annual,
+            "multiple": multiple, "payback": payback}
+
+
+# Topologically ordered; each stage lists every config path it reads
+STAGES: Tuple[Stage, ...] = (
+    Stage("uses_sources", ("purchase_price", "closing_costs", "wc_months", "wc_monthly_opex",
+                           "investors.*.contribution", "sba_principal", "seller_principal"), (), _uses_sources),
+    Stage("proforma", ("hist_sde", "gm_salary", "normalized_adj"), (), _proforma),
+    Stage("operations", ("sde_growth_pct", "revenue_y1", "cogs_pct", "nwc_days.ar", "nwc_days.inv", "nwc_days.ap"),
+          ("proforma",), _operations),
+    Stage("sba_schedule", ("sba_principal", "sba_rate", "sba_term_months", "sba_io_months",
+                           "refi.enable", "refi.year", "refi.new_rate_pct", "refi.new_term_months", "sba_events"), (),
+          _sba_schedule),
+    Stage("seller_schedule", ("seller_principal", "seller_rate", "seller_term_months",
+                              "seller_standby_months", "seller_events"), (), _seller_schedule),
+    Stage("follow_on", ("follow_on.*.name", "follow_on.*.year", "follow_on.*.month", "follow_on.*.amount"),
+          (), _follow_on),
+    Stage("waterfall", ("maint_capex", "growth_capex", "retain_pct"),
+          ("uses_sources", "operations", "sba_schedule", "seller_schedule", "follow_on"), _waterfall),
+    Stage("dividends", ("investors.*.name", "investors.*.pct", "investors.*.contribution", "investors.*.class",
+                        "waterfall"), ("waterfall", "follow_on"), _dividends),
+)
+
+
+def _result(cfg: Dict[str, Any], out: Dict[str, Any]) -> DealResult:
+    """Pack stage outputs into a DealResult; money rounded to cents, DSCR left unrounded."""
+    us, w, d = out["uses_sources"], out["waterfall"], out["dividends"]
+    inflow = out["follow_on"]["inflow"]
+    ops = out["operations"]
+    monthly = np.stack([ops["sde"], w["maint"], w["growth"], w["sba_payment"], w["seller_payment"],
+                        w["debt_service"], w["cfads"], w["fcfe"], inflow, w["retained"], w["distributable"],
+                        w["cash"]])
+    years = annualize(np.stack([ops["sde"], ops["d_nwc"], w["maint"], w["growth"], w["sba_payment"],
+                                w["seller_payment"], w["debt_service"], w["cfads"], w["fcfe"], inflow,
+                                w["retained"], w["distributable"]]))
+    annual = np.vstack([np.round(years, 2), dscr(years[7], years[6])[None, :]])
+    investors = np.array([
+        d["pcts"].tolist(),
+        [round(c, 2) for c in d["contributed"].tolist()],
+        [round(t, 2) for t in d["annual"].sum(axis=1).tolist()],
+        [m if m != m else round(m, 2) for m in d["multiple"].tolist()],
+        d["payback"].tolist(),
+    ], dtype=float).reshape(5, len(d["names"]))
+    scalars = np.array([round(us["wc_buf"], 2), round(us["total_uses"], 2), round(us["total_sources"], 2),
+                        round(out["proforma"], 2)])
+    return DealResult(scalars, np.round(monthly, 2), annual, np.round(d["monthly"], 2), np.round(d["annual"], 2),
+                      investors, d["names"])
+
+
+# ----------------------------
+# Core compute function
+# ----------------------------
+def _batch_result(x: Dict[str, Any], res: Dict[str, Any], i: int) -> DealResult:
+    """Scenario `i` of an `evaluate` result as a DealResult, rounded like `_result`."""
+    names = res["investor_names"][i]
+    k = len(names)
+    inv = res["investors"]
+    monthly = np.stack([res["monthly"][f][i] for f in MONTHLY_FIELDS])
+    annual = np.stack([res["years"][f][i] for f in ANNUAL_FIELDS + ("DSCR",)])
+    investors = np.stack([x["investor_pct"][i, :k], inv["contributed"][i, :k], inv["total_dividends"][i, :k],
+                          np.round(inv["equity_multiple"][i, :k], 2), inv["payback_year"][i, :k]])
+    scalars = np.array([res[f][i] for f in ("working_cap_buffer", "total_uses", "total_sources", "proforma_sde_y1")])
+    return DealResult(scalars, monthly, annual, res["dividends"][i, :k], res["dividends_annual"][i, :k],
+                      investors, names)
+
+
+def compute_result(config: Dict[str, Any], money: Optional[str] = None) -> DealResult:
+    """Compute the Treehouse deal cashflow over a 60-month horizon as a columnar DealResult.
+
+    In the integer-cents mode (see money.py) the deal runs through the batch
+    engine, so it matches `compute_batch` to the bit.
+    """
+    if money_mode(money) == "cents":
+        x = batch_inputs([config])
+        with span("evaluate", n=1, months=HORIZON_MONTHS):
+            return _batch_result(x, evaluate(x, HORIZON_MONTHS, "cents"), 0)
+    # Config is only read, never mutated, so no defensive deep copy is needed
+    out: Dict[str, Any] = {}
+    for stage in STAGES:
+        with span(f"stage:{stage.name}"):
+            out[stage.name] = stage.fn(config, out)
+    with span("assemble"):
+        return _result(config, out)
+
+
+def compute(config: Dict[str, Any], money: Optional[str] = None) -> Dict[str, Any]:
+    """Compute the Treehouse deal cashflow over a 60-month horizon (legacy dict of row lists)."""
+    return compute_result(config, money).legacy()
+
+
+def _stage_key(stage: Stage, snap: Tuple[Any, ...], dep_keys: Dict[str, str]) -> str:
+    """Content key of a stage output: its name, config snapshot and the keys of its inputs."""
+    blob = repr((stage.name, snap, tuple(dep_keys[d] for d in stage.deps)))
+    return f"stage:{stage.name}:{hashlib.sha256(blob.encode('utf-8')).hexdigest()}"
+
+
+class ComputeSession:
+    """Stateful `compute` that re-runs only stages whose inputs changed.
+
+    After each call, `recomputed` and `reused` list the stage names in
+    each bucket. With a `store` (anything with `get(key)` / `put(key,
+    value)`, such as a cache.ResultCache) stage outputs live there under
+    content keys instead of in the session, so sessions that share loan
+    terms or investor lists share those outputs, and the session itself
+    holds nothing. The integer-cents mode has no stages and runs the
+    whole deal each call (leaving both lists empty).
+    """
+
+    def __init__(self, store: Optional[Any] = None) -> None:
+        self.store = store
+        self._snapshots: Dict[str, Tuple[Any, ...]] = {}
+        self._outputs: Dict[str, Any] = {}
+        self.recomputed: List[str] = []
+        self.reused: List[str] = []
+
+    def compute(self, config: Dict[str, Any], money: Optional[str] = None) -> Dict[str, Any]:
+        return self.compute_result(config, money).legacy()
+
+    def compute_result(self, config: Dict[str, Any], money: Optional[str] = None) -> DealResult:
+        self.recomputed, self.reused = [], []
+        if money_mode(money) == "cents":
+            return compute_result(config, "cents")
+        outputs = self._outputs if self.store is None else {}
+        keys: Dict[str, str] = {}
+        for stage in STAGES:
+            snap = stage.snapshot(config)
+            if self.store is None:
+                stale = (stage.name not in outputs or self._snapshots[stage.name] != snap
+                         or any(d in self.recomputed for d in stage.deps))
+            else:
+                keys[stage.name] = _stage_key(stage, snap, keys)
+                hit = self.store.get(keys[stage.name])
+                stale = hit is None
+                if not stale:
+                    outputs[stage.name] = hit
+            if stale:
+                with span(f"stage:{stage.name}"):
+                    outputs[stage.name] = stage.fn(config, outputs)
+                if self.store is None:
+                    self._snapshots[stage.name] = snap
+                else:
+                    self.store.put(keys[stage.name], outputs[stage.name])
+                self.recomputed.append(stage.name)
+            else:
+                self.reused.append(stage.name)
+        count("stages_recomputed", len(self.recomputed))
+        count("stages_reused", len(self.reused))
+        with span("assemble"):
+            return _result(config, outputs)
+
+    def reset(self) -> None:
+        self._snapshots.clear()
+        self._outputs.clear()
+
+
+# ----------------------------
+# Batched compute
+# ----------------------------
+BATCH_KEYS = (
+    "purchase_price", "closing_costs", "wc_months", "wc_monthly_opex",
+    "hist_sde", "gm_salary", "normalized_adj", "maint_capex", "growth_capex",
+    "revenue_y1", "cogs_pct", "nwc_days.ar", "nwc_days.ap", "nwc_days.inv",
+    "sba_principal", "sba_rate", "sba_term_months", "sba_io_months",
+    "seller_principal", "seller_rate", "seller_term_months", "seller_standby_months",
+    "sde_growth_pct", "retain_pct",
+    "refi.enable", "refi.year", "refi.new_rate_pct", "refi.new_term_months",
+)
+
+
+def _padded(rows: List[List[float]], width: int) -> np.ndarray:
+    out = np.zeros((len(rows), width))
+    for n, r in enumerate(rows):
+        out[n, :len(r)] = r
+    return out
+
+
+def batch_inputs(configs: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Pull N configs into per-key (N,) arrays plus padded (N, I) investor matrices.
+
+    Follow-on injections become padded (N, F) arrays of absolute month and amount.
+    """
+    cols: Dict[str, Any] = {k: np.array([_get(c, k) for c in configs]) for k in BATCH_KEYS}
+    invs = [c.get("investors", []) for c in configs]
+    width = max(map(len, invs), default=0)
+    cols["investor_pct"] = _padded([[float(i.get("pct", 0)) for i in v] for v in invs], width)
+    cols["investor_contribution"] = _padded([[float(i.get("contribution", 0)) for i in v] for v in invs], width)
+    cols["investor_gp"] = _padded([[float(_is_gp(i)) for i in v] for v in invs], width).astype(bool)
+    names = [[i.get("name", f"Investor {idx+1}") for idx, i in enumerate(v)] for v in invs]
+    cols["investor_names"] = names
+    cols["waterfall"] = tier_array([config_tiers(c) for c in configs])
+
+    fos = [c.get("follow_on", []) or [] for c in configs]
+    fo_width = max(map(len, fos), default=0)
+    cols["follow_on_month"] = _padded([[(int(_num(f.get("year"))) - 1) * 12 + int(_num(f.get("month"))) for f in v]
+                                       for v in fos], fo_width).astype(np.int64)
+    cols["follow_on_amount"] = _padded([[_num(f.get("amount")) for f in v] for v in fos], fo_width)
+    # Follow-ons are credited to the first investor with the matching name (index -1: no match)
+    fo_inv = np.full((len(configs), fo_width), -1, np.int64)
+    for n, (v, inv_names) in enumerate(zip(fos, names)):
+        for k, f in enumerate(v):
+            if f.get("name") in inv_names:
+                fo_inv[n, k] = inv_names.index(f.get("name"))
+    cols["follow_on_investor"] = fo_inv
+    # The legacy refi block stays in the refi.* columns (sweepable) and is merged in by `evaluate`
+    cols["sba_events"] = event_array([_loan_events(c, "sba_events") for c in configs])
+    cols["seller_events"] = event_array([_loan_events(c, "seller_events") for c in configs])
+    return cols
+
+
+ROW_KEYS = ("investor_pct", "investor_contribution", "investor_gp", "follow_on_month", "follow_on_amount",
+            "follow_on_investor", "sba_events", "seller_events", "waterfall")
+
+
+LEVERAGE_KEYS = ("sba_principal", "seller_principal")
+
+
+def leverage_ratios(base: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """SBA and seller principal per dollar of purchase price in batch inputs (prices under $1 count as $1)."""
+    price = np.maximum(base["purchase_price"], 1.0)
+    return {k: base[k] / price for k in LEVERAGE_KEYS}
+
+
+def scale_leverage(x: Dict[str, Any], base: Dict[str, Any], keys: Sequence[str] = LEVERAGE_KEYS) -> None:
+    """Set `keys` of batch inputs `x` to its purchase prices at `base`'s leverage ratios, in place.
+
+    `base` holds one scenario or as many as `x`.
+    """
+    ratios = leverage_ratios(base)
+    for k in keys:
+        x[k] = x["purchase_price"] * ratios[k]
+
+
+def repeat_inputs(x: Dict[str, Any], k: int) -> Dict[str, Any]:
+    """Repeat each scenario of batch inputs k times in a row (columns are fresh copies)."""
+    cols: Dict[str, Any] = {key: np.repeat(x[key], k, axis=0) for key in BATCH_KEYS + ROW_KEYS}
+    cols["investor_names"] = [names for names in x["investor_names"] for _ in range(k)]
+    return cols
+
+
+def tile_inputs(one: Dict[str, Any], n: int) -> Dict[str, Any]:
+    """Repeat single-scenario batch inputs n times (columns are fresh copies)."""
+    return repeat_inputs(one, n)
+
+
+def grid_inputs(base: Dict[str, Any], sweep: Dict[str, Sequence[float]]) -> Dict[str, Any]:
+    """Cartesian product of swept axes over a base config, as batch inputs.
+
+    Scenarios are ordered like `itertools.product(*sweep.values())`; the swept
+    value of each axis per scenario is returned under `"sweep"`.
+    """
+    unknown = set(sweep) - set(BATCH_KEYS)
+    if unknown:
+        raise ValueError(f"Cannot sweep {sorted(unknown)}; sweepable keys are {BATCH_KEYS}")
+    axes = [np.asarray(v, float) for v in sweep.values()]
+    mesh = [m.ravel() for m in np.meshgrid(*axes, indexing="ij")] if axes else []
+    cols = tile_inputs(batch_inputs([base]), mesh[0].size if mesh else 1)
+    cols.update(dict(zip(sweep, mesh)))
+    cols["sweep"] = dict(zip(sweep, mesh))
+    return cols
+
+
+def _with_refi(events: np.ndarray, x: Dict[str, Any]) -> np.ndarray:
+    """Prepend each scenario's refi.* columns as a refinance event, keeping events sorted by month."""
+    refi = np.zeros((len(events), 1, len(EVENT_FIELDS)))
+    month = (x["refi.year"] - 1) * 12
+    refi[:, 0, 0] = month
+    refi[:, 0, 1] = np.where((x["refi.enable"] != 0) & (month > 0), 0, -1)
+    refi[:, 0, 2] = x["refi.new_rate_pct"]
+    refi[:, 0, 3] = x["refi.new_term_months"]
+    merged = np.concatenate([refi, events], axis=1)
+    key = np.where(merged[:, :, 1] >= 0, merged[:, :, 0], np.inf)
+    order = np.argsort(key, axis=1, kind="stable")
+    return np.take_along_axis(merged, order[:, :, None], axis=1)
+
+
+def evaluate(x: Dict[str, Any], months: int = HORIZON_MONTHS, money: Optional[str] = None) -> Dict[str, Any]:
+    """Run the array engine over prepared batch inputs for a `months` horizon.
+
+    `money` is "float" or "cents" (default: TREEHOUSE_MONEY, else float);
+    see money.py for the cents rounding policy.
+    """
+    n = len(x["purchase_price"])
+    wc_buf = x["wc_months"] * x["wc_monthly_opex"]
+    total_uses = x["purchase_price"] + x["closing_costs"] + wc_buf
+    total_sources = x["investor_contribution"].sum(axis=1) + x["sba_principal"] + x["seller_principal"]
+    sde_y1 = x["hist_sde"] - x["gm_salary"] + x["normalized_adj"]
+
+    sba = amortize_events(x["sba_principal"], x["sba_rate"], x["sba_term_months"].astype(np.int64),
+                          x["sba_io_months"].astype(np.int64), 0, True, _with_refi(x["sba_events"], x), months)
+    seller = amortize_events(x["seller_principal"], x["seller_rate"], x["seller_term_months"].astype(np.int64),
+                             0, x["seller_standby_months"].astype(np.int64), True, x["seller_events"], months)
+    inflow = np.zeros((n, months))
+    fo_m, fo_amt = x["follow_on_month"], x["follow_on_amount"]
+    ok = (fo_m >= 1) & (fo_m <= months) & (fo_amt != 0)
+    np.add.at(inflow, (np.nonzero(ok)[0], fo_m[ok] - 1), fo_amt[ok])
+    # Investors are credited with the same follow-ons that flow in within the horizon
+    fo_inv = x["follow_on_investor"]
+    credited = ok & (fo_inv >= 0)
+    contributed = x["investor_contribution"].copy()
+    np.add.at(contributed, (np.nonzero(credited)[0], fo_inv[credited]), fo_amt[credited])
+
+    sde_m, d_nwc_m = operating_lines(sde_y1, x["sde_growth_pct"], x["revenue_y1"], x["cogs_pct"],
+                                     x["nwc_days.ar"], x["nwc_days.inv"], x["nwc_days.ap"], months)
+    maint_m, growth_m = x["maint_capex"] / 12, x["growth_capex"] / 12
+    if money_mode(money) == "cents":
+        lines = {"sde": sde_m, "d_nwc": d_nwc_m, "maint": maint_m, "growth": growth_m, "sba": sba["payment"],
+                 "seller": seller["payment"], "inflow": inflow, "wc_buf": wc_buf, "total_uses": total_uses,
+                 "total_sources": total_sources, "proforma": sde_y1}
+        return _evaluate_cents(x, months, {k: to_cents(v) for k, v in lines.items()}, contributed)
+
+    # Payments are cent-rounded before use, as in the row-wise schedule
+    sba_pay = np.round(sba["payment"], 2)
+    seller_pay = np.round(seller["payment"], 2)
+    debt_service = sba_pay + seller_pay
+    w = cash_waterfall(sde_m, d_nwc_m, maint_m, growth_m, debt_service, x["retain_pct"] / 100, wc_buf, inflow)
+    capital_in = inflow.copy()
+    capital_in[:, 0] += x["investor_contribution"].sum(axis=1)
+    dividends = allocate(w["distributable"], x["investor_pct"], contributed, x["investor_gp"], capital_in,
+                         x["waterfall"])
+
+    shape = debt_service.shape
+    maint = np.broadcast_to(maint_m[:, None], shape)
+    growth = np.broadcast_to(growth_m[:, None], shape)
+    monthly_src = (sde_m, maint, growth, sba_pay, seller_pay, debt_service, w["cfads"], w["fcfe"], inflow,
+                   w["retained"], w["distributable"], w["cash"])
+    monthly = {"Month": np.arange(1, months + 1)}
+    monthly.update({k: np.round(v, 2) for k, v in zip(MONTHLY_FIELDS, monthly_src)})
+    monthly["ΔNWC"] = np.round(d_nwc_m, 2)
+
+    annual_src = (sde_m, d_nwc_m, maint, growth, sba_pay, seller_pay, debt_service, w["cfads"], w["fcfe"],
+                  inflow, w["retained"], w["distributable"])
+    years = {"Year": np.arange(1, months // 12 + 1)}
+    years.update({k: annualize(v) for k, v in zip(ANNUAL_FIELDS, annual_src)})
+    years["DSCR"] = dscr(years["CFADS"], years["Total Debt Service"])
+    dividends_y = annualize(dividends)
+    multiple, payback = investor_rollup(dividends_y, contributed)
 
-    # --- Pro-forma SDE ---
-    sde_y1 = float(cfg.get("hist_sde", 0)) - float(cfg.get("gm_salary", 0)) + float(cfg.get("normalized_adj", 0))
-    maint_capex = float(cfg.get("maint_capex", 0))
-    growth_capex = float(cfg.get("growth_capex", 0))
-    retain_pct = float(cfg.get("retain_pct", 0)) / 100
-
-    # --- Build loans ---
-    sba = LoanSchedule("SBA", float(cfg.get("sba_principal", 0)), float(cfg.get("sba_rate", 0)),
-                       int(cfg.get("sba_term_months", 0)), int(cfg.get("sba_io_months", 0))).build(60)
-    seller = LoanSchedule("Seller", float(cfg.get("seller_principal", 0)), float(cfg.get("seller_rate", 0)),
-                          int(cfg.get("seller_term_months", 0)), 0,
-                          int(cfg.get("seller_standby_months", 0)), True).build(60)
-
-    # --- Month 1-12 simple summary (no refi or ΔNWC for brevity) ---
-    sde_m = sde_y1 / 12
-    maint_m = maint_capex / 12
-    growth_m = growth_capex / 12
-    monthly = []
-    cash = wc_buf
-    for m in range(1, 13):
-        sba_row = sba[m - 1] if m - 1 < len(sba) else {"payment": 0.0}
-        seller_row = seller[m - 1] if m - 1 < len(seller) else {"payment": 0.0}
-        debt_service = sba_row["payment"] + seller_row["payment"]
-        cfads = sde_m - maint_m
-        fcfe = cfads - debt_service - growth_m
-        distributable = max(0.0, fcfe * (1 - retain_pct))
-        retained = max(0.0, fcfe) - distributable if fcfe > 0 else 0.0
-        cash += retained
-        row = {
-            "Month": m,
-            "SDE": round(sde_m, 2),
-            "Debt Service": round(debt_service, 2),
-            "CFADS": round(cfads, 2),
-            "FCFE": round(fcfe, 2),
-            "Retained": round(retained, 2),
-            "Distributable": round(distributable, 2),
-            "Cash Balance": round(cash, 2)
-        }
-        for idx, inv in enumerate(investors):
-            row[f"Dividend • {inv.get('name', f'Investor {idx+1}') }"] = round(distributable * investor_pcts[idx], 2)
-        monthly.append(row)
-
-    # --- Return simple outputs ---
     return {
-        "working_cap_buffer": round(wc_buf, 2),
-        "total_uses": round(total_uses, 2),
-        "total_sources": round(total_sources, 2),
-        "proforma_sde_y1": round(sde_y1, 2),
-        "y1": monthly,
-        "years": [],
-        "investors": investors
+        "n": n,
+        "working_cap_buffer": np.round(wc_buf, 2),
+        "total_uses": np.round(total_uses, 2),
+        "total_sources": np.round(total_sources, 2),
+        "proforma_sde_y1": np.round(sde_y1, 2),
+        "monthly": monthly,
+        "y1": {k: v[..., :12] for k, v in monthly.items()},
+        "years": {k: (v if k in ("Year", "DSCR") else np.round(v, 2)) for k, v in years.items()},
+        "dividends": np.round(dividends, 2),
+        "dividends_annual": np.round(dividends_y, 2),
+        "investors": {
+            "contributed": np.round(contributed, 2),
+            "total_dividends": np.round(dividends_y.sum(axis=-1), 2),
+            "equity_multiple": multiple,
+            "payback_year": payback,
+        },
+        "investor_names": x["investor_names"],
+        "sweep": x.get("sweep", {}),
     }
+
+
+def _evaluate_cents(x: Dict[str, Any], months: int, c: Dict[str, np.ndarray],
+                    contributed: np.ndarray) -> Dict[str, Any]:
+    """The rest of `evaluate` on int64 cents `c`; floats only in the returned outputs."""
+    n = len(x["purchase_price"])
+    debt_service = c["sba"] + c["seller"]
+    w = cash_waterfall_cents(c["sde"], c["d_nwc"], c["maint"], c["growth"], debt_service, x["retain_pct"] / 100,
+                             c["wc_buf"], c["inflow"])
+    contributed = to_cents(contributed)
+    capital_in = from_cents(c["inflow"])
+    capital_in[:, 0] += x["investor_contribution"].sum(axis=1)
+    dividends = allocate_cents(w["distributable"], x["investor_pct"], from_cents(contributed), x["investor_gp"],
+                               capital_in, x["waterfall"])
+
+    shape = debt_service.shape
+    maint = np.broadcast_to(c["maint"][:, None], shape)
+    growth = np.broadcast_to(c["growth"][:, None], shape)
+    monthly_src = (c["sde"], maint, growth, c["sba"], c["seller"], debt_service, w["cfads"], w["fcfe"], c["inflow"],
+                   w["retained"], w["distributable"], w["cash"])
+    monthly = {"Month": np.arange(1, months + 1)}
+    monthly.update({k: from_cents(v) for k, v in zip(MONTHLY_FIELDS, monthly_src)})
+    monthly["ΔNWC"] = from_cents(c["d_nwc"])
+
+    annual_src = (c["sde"], c["d_nwc"], maint, growth, c["sba"], c["seller"], debt_service, w["cfads"], w["fcfe"],
+                  c["inflow"], w["retained"], w["distributable"])
+    years_c = dict(zip(ANNUAL_FIELDS, (annualize(v) for v in annual_src)))
+    years = {"Year": np.arange(1, months // 12 + 1)}
+    years.update({k: from_cents(v) for k, v in years_c.items()})
+    years["DSCR"] = dscr(years_c["CFADS"], years_c["Total Debt Service"])
+    dividends_y = annualize(dividends)
+    multiple, payback = investor_rollup(dividends_y, contributed)
+
+    return {
+        "n": n,
+        "working_cap_buffer": from_cents(c["wc_buf"]),
+        "total_uses": from_cents(c["total_uses"]),
+        "total_sources": from_cents(c["total_sources"]),
+        "proforma_sde_y1": from_cents(c["proforma"]),
+        "monthly": monthly,
+        "y1": {k: v[..., :12] for k, v in monthly.items()},
+        "years": years,
+        "dividends": from_cents(dividends),
+        "dividends_annual": from_cents(dividends_y),
+        "investors": {
+            "contributed": from_cents(contributed),
+            "total_dividends": from_cents(dividends_y.sum(axis=-1)),
+            "equity_multiple": multiple,
+            "payback_year": payback,
+        },
+        "investor_names": x["investor_names"],
+        "sweep": x.get("sweep", {}),
+    }
+
+
+def compute_batch(configs: Optional[Sequence[Dict[str, Any]]] = None,
+                  base: Optional[Dict[str, Any]] = None,
+                  sweep: Optional[Dict[str, Sequence[float]]] = None,
+                  months: int = HORIZON_MONTHS, money: Optional[str] = None) -> Dict[str, Any]:
+    """Evaluate many deals together; same summary fields as `compute`, indexed by scenario.
+
+    Pass either `configs` (N config dicts) or `base` plus `sweep` axes.
+    Monthly metrics come back as (N, months) arrays under `"monthly"` (with
+    the first 12 under `"y1"`), annual rollups as (N, years) arrays under
+    `"years"`, and investor dividends as an (N, I, months) array (yearly
+    sums under `"dividends_annual"`), zero-padded to the widest investor list. `money` picks the float or
+    integer-cents engine (see `evaluate`).
+    """
+    if configs is not None:
+        x = batch_inputs(configs)
+    elif base is not None:
+        x = grid_inputs(base, sweep or {})
+    else:
+        raise ValueError("compute_batch needs either configs or base")
+    with span("evaluate", n=len(x["purchase_price"]), months=months):
+        return evaluate(x, months, money)
@@ -0,0 +1,205 @@
+"""Bulk import of broker deal sheets (CSV/XLSX) into batch inputs and configs.
+
+Sheet columns are matched to config fields by header (e.g. "Asking Price"
+→ purchase_price, "SDE" / "Cash Flow" → hist_sde); every other field comes
+from a base config. Columns are parsed whole with the vectorized parsers in
+input_formats, and bad cells are reported as CellErrors rather than raised.
+"""
+from __future__ import annotations
+import copy
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from engine import LEVERAGE_KEYS, batch_inputs, repeat_inputs, scale_leverage
+from input_formats import parse_money_column, parse_percent_column
+
+MONEY_FIELDS = ("purchase_price", "closing_costs", "wc_monthly_opex", "hist_sde", "gm_salary", "normalized_adj",
+                "maint_capex", "growth_capex", "revenue_y1", "sba_principal", "seller_principal")
+PERCENT_FIELDS = ("cogs_pct", "sba_rate", "seller_rate", "sde_growth_pct", "retain_pct")
+COUNT_FIELDS = ("wc_months", "nwc_days.ar", "nwc_days.ap", "nwc_days.inv", "sba_term_months", "sba_io_months",
+                "seller_term_months", "seller_standby_months")
+NAME_FIELD = "name"
+# Fields where a negative value (e.g. "(100)" or "-3.2M") is a bad cell; adjustments and growth may be negative
+NONNEGATIVE_FIELDS = tuple(f for f in MONEY_FIELDS + PERCENT_FIELDS + COUNT_FIELDS
+                           if f not in ("normalized_adj", "sde_growth_pct"))
+
+# Normalized header → field; config field names themselves always match too
+ALIASES: Dict[str, str] = {
+    "asking price": "purchase_price", "asking": "purchase_price", "price": "purchase_price",
+    "list price": "purchase_price", "purchase price": "purchase_price",
+    "sde": "hist_sde", "cash flow": "hist_sde", "cashflow": "hist_sde",
+    "seller s discretionary earnings": "hist_sde", "discretionary earnings": "hist_sde",
+    "revenue": "revenue_y1", "gross revenue": "revenue_y1", "annual revenue": "revenue_y1", "sales": "revenue_y1",
+    "cogs": "cogs_pct", "cogs pct": "cogs_pct",
+    "closing costs": "closing_costs", "gm salary": "gm_salary", "manager salary": "gm_salary",
+    "capex": "maint_capex", "maintenance capex": "maint_capex",
+    "sba loan": "sba_principal", "sba principal": "sba_principal", "senior debt": "sba_principal",
+    "sba rate": "sba_rate", "interest rate": "sba_rate",
+    "seller note": "seller_principal", "seller financing": "seller_principal", "seller principal": "seller_principal",
+    "seller rate": "seller_rate", "seller note rate": "seller_rate",
+    "ar days": "nwc_days.ar", "ap days": "nwc_days.ap", "inventory days": "nwc_days.inv",
+    "business name": NAME_FIELD, "listing": NAME_FIELD, "listing title": NAME_FIELD, "deal": NAME_FIELD,
+    "deal name": NAME_FIELD, "title": NAME_FIELD, "name": NAME_FIELD,
+}
+
+
+def _norm(header: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", str(header).lower()).strip()
+
+
+@dataclass
+class CellError:
+    source: str
+    row: int  # 1-based sheet row; the header is row 1
+    column: str
+    field: str
+    value: Any
+    message: str
+
+
+@dataclass
+class SheetChunk:
+    """Parsed rows of one sheet chunk; `valid` rows have no cell errors."""
+    source: str
+    rows: np.ndarray
+    names: List[str]
+    values: Dict[str, np.ndarray]
+    valid: np.ndarray
+    errors: List[CellError] = field(default_factory=list)
+
+
+def map_columns(headers: Sequence[Any], mapping: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """{sheet header: config field}; `mapping` (header → field) overrides the aliases."""
+    known = set(MONEY_FIELDS + PERCENT_FIELDS + COUNT_FIELDS + (NAME_FIELD,))
+    explicit = {_norm(k): v for k, v in (mapping or {}).items()}
+    unknown = set(explicit.values()) - known
+    if unknown:
+        raise ValueError(f"Cannot map to {sorted(unknown)}; importable fields are {sorted(known)}")
+    out: Dict[str, str] = {}
+    taken = set()
+    for h in headers:
+        key = _norm(h)
+        f = explicit.get(key) or ALIASES.get(key) or next((k for k in known if _norm(k) == key), None)
+        if f and f not in taken:
+            out[str(h)] = f
+            taken.add(f)
+    return out
+
+
+def read_sheet(path: str, chunk_size: int = 1000) -> Iterator[pd.DataFrame]:
+    """Yield the sheet in DataFrame chunks of raw cell values (strings for CSV)."""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        yield from _read_xlsx(path, chunk_size)
+        return
+    yield from pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size, skipinitialspace=True)
+
+
+def _read_xlsx(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows()
+        headers = [str(c.value) if c.value is not None else "" for c in next(rows, ())]
+        buf: List[List[Any]] = []
+        for row in rows:
+            # Percent-formatted cells hold fractions; report them the way the sheet shows them
+            vals = [f"{c.value * 100}%" if isinstance(c.value, (int, float)) and "%" in (c.number_format or "")
+                    else c.value for c in row[:len(headers)]]
+            buf.append(vals + [None] * (len(headers) - len(vals)))
+            if len(buf) == chunk_size:
+                yield pd.DataFrame(buf, columns=headers)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=headers)
+    finally:
+        wb.close()
+
+
+def parse_chunk(df: pd.DataFrame, columns: Dict[str, str], first_row: int, source: str = "") -> SheetChunk:
+    """Parse mapped columns of one chunk; `first_row` is the sheet row of df's first row."""
+    n = len(df)
+    rows = np.arange(first_row, first_row + n)
+    values: Dict[str, np.ndarray] = {}
+    valid = np.ones(n, bool)
+    errors: List[CellError] = []
+    names = [f"{source}:{r}" for r in rows]
+    for col, f in columns.items():
+        if col not in df.columns:
+            continue
+        if f == NAME_FIELD:
+            names = [str(v) if v not in (None, "") and v == v else d for v, d in zip(df[col].tolist(), names)]
+            continue
+        parse = parse_percent_column if f in PERCENT_FIELDS else parse_money_column
+        v, ok = parse(df[col], default=np.nan)
+        negative = ok & (v < 0) if f in NONNEGATIVE_FIELDS else np.zeros(n, bool)
+        if f in COUNT_FIELDS:
+            v = np.round(v)
+        bad = np.nonzero(~ok | negative)[0]
+        if bad.size:
+            raw = df[col].to_numpy()
+            kind = "percent" if f in PERCENT_FIELDS else ("count" if f in COUNT_FIELDS else "amount")
+            errors.extend(CellError(source, int(rows[i]), col, f, raw[i],
+                                    "must not be negative" if negative[i] else f"not a valid {kind}") for i in bad)
+            valid[bad] = False
+        values[f] = v
+    errors.sort(key=lambda e: e.row)
+    return SheetChunk(source, rows, names, values, valid, errors)
+
+
+def iter_sheet(path: str, mapping: Optional[Dict[str, str]] = None, chunk_size: int = 1000) -> Iterator[SheetChunk]:
+    """Stream a broker sheet as parsed chunks; raises if no column maps to a config field."""
+    first_row = 2
+    columns: Optional[Dict[str, str]] = None
+    for df in read_sheet(path, chunk_size):
+        if columns is None:
+            columns = map_columns(list(df.columns), mapping)
+            if not set(columns.values()) - {NAME_FIELD}:
+                raise ValueError(f"{path}: no column maps to a deal field (headers: {list(df.columns)})")
+        yield parse_chunk(df, columns, first_row, path)
+        first_row += len(df)
+
+
+def chunk_inputs(chunk: SheetChunk, base: Dict[str, Any], hold_leverage: bool = True) -> Dict[str, Any]:
+    """Batch inputs for the chunk's valid rows: the base config with the sheet's fields overlaid.
+
+    Blank cells keep the base value. With `hold_leverage`, rows that give a
+    price but no debt amounts get the base deal's SBA and seller ratios.
+    """
+    one = batch_inputs([base])
+    keep = np.nonzero(chunk.valid)[0]
+    x = repeat_inputs(one, keep.size)
+    for f, v in chunk.values.items():
+        v = v[keep]
+        x[f] = np.where(np.isnan(v), x[f], v)
+    if hold_leverage and "purchase_price" in chunk.values:
+        scale_leverage(x, one, [f for f in LEVERAGE_KEYS if f not in chunk.values])
+    return x
+
+
+def _set(cfg: Dict[str, Any], key: str, value: Any) -> None:
+    head, _, rest = key.partition(".")
+    if rest:
+        cfg.setdefault(head, {})[rest] = value
+    else:
+        cfg[head] = value
+
+
+def chunk_configs(chunk: SheetChunk, base: Dict[str, Any], hold_leverage: bool = True) -> List[Tuple[str, Dict[str, Any]]]:
+    """(name, config) per valid row, for saving to the library or running `compute`."""
+    x = chunk_inputs(chunk, base, hold_leverage)
+    fields = [f for f in MONEY_FIELDS + PERCENT_FIELDS + COUNT_FIELDS if f in chunk.values]
+    if hold_leverage and "purchase_price" in chunk.values:
+        fields += [f for f in LEVERAGE_KEYS if f not in fields]
+    cols = {f: x[f].tolist() for f in fields}
+    out = []
+    for j, i in enumerate(np.nonzero(chunk.valid)[0]):
+        cfg = copy.deepcopy(base)
+        for f in fields:
+            v = cols[f][j]
+            _set(cfg, f, int(v) if f in COUNT_FIELDS else v)
+        out.append((chunk.names[i], cfg))
+    return out
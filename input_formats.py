@@ -1,5 +1,10 @@
+import json
 import re
-from typing import Tuple
+import sys
+from typing import Any, Dict, Iterable, Iterator, TextIO, Tuple
+
+import numpy as np
+import pandas as pd
 
 MONEY_RE = re.compile(r"[,\s$]")
 PCT_RE = re.compile(r"[,\s%]")
@@ -26,6 +31,45 @@ def parse_percent(s: str, default: float = 0.0) -> Tuple[float, bool]:
     except Exception:
         return default, False
 
+# Broker sheets write "$3.2M", "450K", "(12,000)"; suffixes scale, parentheses negate
+_SUFFIX = {"": 1.0, "K": 1e3, "M": 1e6, "MM": 1e6, "B": 1e9}
+_MONEY_COL_RE = r"^(?P<neg>\()?\s*-?\s*\$?\s*(?P<num>[-+]?(?:\d+\.?\d*|\.\d+))\s*(?P<suffix>K|MM|M|B)?\s*\)?$"
+
+def _clean_column(values: Iterable) -> Tuple[pd.Series, np.ndarray]:
+    """Column as stripped upper-case strings, plus a mask of blank cells."""
+    s = pd.Series(values, dtype=object) if not isinstance(values, pd.Series) else values.astype(object)
+    text = s.where(s.notna(), "").astype(str).str.strip().str.upper()
+    return text, (text == "").to_numpy()
+
+def parse_money_column(values: Iterable, default: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized `parse_money` over a column: (values, ok) arrays.
+
+    Numeric columns pass straight through. Blank cells take `default` and
+    are ok; cells that don't parse take `default` with ok False.
+    """
+    if isinstance(values, pd.Series) and values.dtype.kind in "iuf":
+        v = values.to_numpy(dtype=float)
+        return np.where(np.isnan(v), default, v), np.ones(len(v), bool)
+    text, blank = _clean_column(values)
+    parts = text.str.replace(",", "", regex=False).str.extract(_MONEY_COL_RE)
+    num = pd.to_numeric(parts["num"], errors="coerce").to_numpy(dtype=float)
+    scale = parts["suffix"].fillna("").map(_SUFFIX).to_numpy(dtype=float)
+    negative = parts["neg"].notna().to_numpy() | text.str.startswith("-").to_numpy() | (num < 0)
+    sign = np.where(negative, -1.0, 1.0)
+    out = np.abs(num) * scale * sign
+    ok = blank | ~np.isnan(out)
+    return np.where(np.isnan(out), default, out), ok
+
+def parse_percent_column(values: Iterable, default: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized `parse_percent` over a column: (values in percent, ok) arrays."""
+    if isinstance(values, pd.Series) and values.dtype.kind in "iuf":
+        v = values.to_numpy(dtype=float)
+        return np.where(np.isnan(v), default, v), np.ones(len(v), bool)
+    text, blank = _clean_column(values)
+    num = pd.to_numeric(text.str.replace(PCT_RE.pattern, "", regex=True), errors="coerce").to_numpy(dtype=float)
+    ok = blank | ~np.isnan(num)
+    return np.where(np.isnan(num), default, num), ok
+
 def fmt_money(v: float, decimals: int = 0) -> str:
     if v is None:
         v = 0.0
@@ -40,3 +84,55 @@ def fmt_percent(v: float, decimals: int = 2) -> str:
     if v is None:
         v = 0.0
     return f"{v:.{decimals}f}%"
+
+def unwrap_config(doc: Any) -> Any:
+    """Accept either a bare config or the app's `{"config": ...}` export envelope."""
+    return doc["config"] if isinstance(doc, dict) and "config" in doc else doc
+
+def iter_configs(stream: TextIO, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """Yield configs from a text stream without reading it whole.
+
+    Handles a single JSON object, a JSON array of objects, and JSONL /
+    concatenated objects; envelopes are unwrapped. Raises ValueError on a
+    document that is not an object.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    index = 0
+    while True:
+        # Skip whitespace and array punctuation between documents
+        while pos < len(buf) and buf[pos] in " \t\r\n,[]":
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                return
+            buf, pos = stream.read(chunk_size), 0
+            eof = not buf
+            continue
+        try:
+            doc, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            more = "" if eof else stream.read(chunk_size)
+            if not more:
+                raise
+            eof = False
+            buf, pos = buf[pos:] + more, 0
+            continue
+        doc = unwrap_config(doc)
+        if not isinstance(doc, dict):
+            raise ValueError(f"Config #{index} is a JSON {type(doc).__name__}, not an object: {doc!r:.60}")
+        yield doc
+        index += 1
+        pos = end
+
+def iter_config_files(paths: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(source, config) pairs from files; "-" reads stdin. Errors name the file."""
+    for path in paths:
+        try:
+            if path == "-":
+                yield from (("<stdin>", c) for c in iter_configs(sys.stdin))
+                continue
+            with open(path, "r", encoding="utf-8") as fh:
+                yield from ((path, c) for c in iter_configs(fh))
+        except ValueError as exc:
+            raise ValueError(f"{'<stdin>' if path == '-' else path}: {exc}") from exc
@@ -0,0 +1,178 @@
+"""Opt-in instrumentation: named timing spans, counters and tracemalloc snapshots.
+
+Off by default. Enable with TREEHOUSE_TRACE=1 (TREEHOUSE_TRACE=memory also
+tracks allocations) or `enable()`. While disabled, `span` returns a shared
+no-op context manager and `count` returns immediately.
+
+    with span("compute"):
+        ...
+    count("rows_built", 60)
+    dump("trace.json")   # open in chrome://tracing or ui.perfetto.dev
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+
+_NOOP = nullcontext()
+
+
+class Recorder:
+    """Collects finished spans (as Chrome trace events) and counters."""
+
+    def __init__(self, max_events: int = 100_000):
+        self.max_events = max_events
+        self.events: List[Dict[str, Any]] = []
+        self.counters: Dict[str, float] = {}
+        self.dropped = 0
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self.events) < self.max_events:
+                self.events.append(event)
+            else:
+                self.dropped += 1
+
+    def count(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self) -> None:
+        with self._lock:
+            self.events.clear()
+            self.counters.clear()
+            self.dropped = 0
+            self.origin = time.perf_counter()
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per span name: calls, total / mean / max ms and, with memory tracing, peak KiB; slowest first."""
+        with self._lock:
+            events = list(self.events)
+        agg: Dict[str, Dict[str, Any]] = {}
+        for e in events:
+            a = agg.setdefault(e["name"], {"span": e["name"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            ms = e["dur"] / 1000
+            a["calls"] += 1
+            a["total_ms"] += ms
+            a["max_ms"] = max(a["max_ms"], ms)
+            if "peak_kib" in e["args"]:
+                a["peak_kib"] = max(a.get("peak_kib", 0.0), e["args"]["peak_kib"])
+        for a in agg.values():
+            a["mean_ms"] = a["total_ms"] / a["calls"]
+        return sorted(agg.values(), key=lambda a: a["total_ms"], reverse=True)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        with self._lock:
+            events = [dict(e, pid=pid) for e in self.events]
+            end = max((e["ts"] + e["dur"] for e in events), default=0.0)
+            events += [{"name": k, "ph": "C", "ts": end, "pid": pid, "tid": 0, "args": {k: v}}
+                       for k, v in self.counters.items()]
+            return {"traceEvents": events, "displayTimeUnit": "ms",
+                    "otherData": {"counters": dict(self.counters), "dropped": self.dropped}}
+
+
+class _Span:
+    __slots__ = ("name", "args", "start", "mem")
+
+    def __init__(self, name: str, args: Dict[str, Any]):
+        self.name, self.args = name, args
+
+    def __enter__(self) -> "_Span":
+        if _STATE["memory"]:
+            # tracemalloc has one process-wide peak, so a parent's peak only covers time since its last child began
+            self.mem = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        end = time.perf_counter()
+        args = dict(self.args)
+        if _STATE["memory"]:
+            current, peak = tracemalloc.get_traced_memory()
+            args["alloc_kib"] = round((current - self.mem) / 1024, 1)
+            args["peak_kib"] = round((peak - self.mem) / 1024, 1)
+        RECORDER.add({"name": self.name, "ph": "X", "ts": (self.start - RECORDER.origin) * 1e6,
+                      "dur": (end - self.start) * 1e6, "tid": threading.get_ident(), "args": args})
+
+
+RECORDER = Recorder()
+_STATE = {"enabled": False, "memory": False}
+
+
+def enable(memory: bool = False) -> None:
+    _STATE["enabled"] = True
+    _STATE["memory"] = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    _STATE["enabled"] = False
+    if _STATE["memory"] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _STATE["memory"] = False
+
+
+def enabled() -> bool:
+    return _STATE["enabled"]
+
+
+def span(name: str, **args: Any):
+    """Time the enclosed block under `name`; extra keyword args are attached to the event."""
+    return _Span(name, args) if _STATE["enabled"] else _NOOP
+
+
+_open = threading.local()
+
+
+def section(name: Optional[str]) -> None:
+    """Close the current section span on this thread and open `name` (None just closes).
+
+    For straight-line scripts such as app.py, where wrapping each part in a
+    `with` block would re-indent the whole file.
+    """
+    current = getattr(_open, "span", None)
+    if current is not None:
+        current.__exit__(None, None, None)
+        _open.span = None
+    if name is not None and _STATE["enabled"]:
+        _open.span = _Span(name, {}).__enter__()
+
+
+def count(name: str, n: float = 1) -> None:
+    if _STATE["enabled"]:
+        RECORDER.count(name, n)
+
+
+def memory_top(limit: int = 15) -> List[Dict[str, Any]]:
+    """Largest live allocation sites (needs memory tracing on)."""
+    if not tracemalloc.is_tracing():
+        return []
+    stats = tracemalloc.take_snapshot().statistics("lineno")[:limit]
+    return [{"site": str(s.traceback[0]), "kib": round(s.size / 1024, 1), "blocks": s.count} for s in stats]
+
+
+def trace_json() -> str:
+    """The Chrome trace, plus span summary and top allocations, as a JSON string."""
+    data = RECORDER.chrome_trace()
+    data["otherData"]["summary"] = RECORDER.summary()
+    data["otherData"]["memory_top"] = memory_top()
+    return json.dumps(data)
+
+
+def dump(path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(trace_json())
+
+
+_mode = os.getenv("TREEHOUSE_TRACE", "").lower()
+if _mode and _mode not in ("0", "false", "off"):
+    enable(memory=_mode == "memory")
@@ -0,0 +1,184 @@
+"""Disk-backed scenario library: configs plus indexed summary metrics in SQLite."""
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from engine import compute_batch, min_dscr
+
+# Summary columns stored next to each config; all are filterable and sortable.
+METRICS = ("purchase_price", "total_uses", "equity_required", "min_dscr", "cash_floor",
+           "total_distributable", "proforma_sde_y1")
+INDEXED = ("name", "purchase_price", "min_dscr", "equity_required")
+# Metrics stored as NULL when unbounded above (min_dscr of a deal with no debt service): they
+# pass any lower bound and sort after every number
+NULL_IS_INF = ("min_dscr",)
+SORTABLE = ("name", "updated_at") + METRICS
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    config TEXT NOT NULL,
+    {", ".join(f"{m} REAL" for m in METRICS)},
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+{"".join(f"CREATE INDEX IF NOT EXISTS ix_scenarios_{c} ON scenarios({c});" for c in INDEXED)}
+"""
+
+
+def summarize(configs: Sequence[Dict[str, Any]]) -> List[Dict[str, Optional[float]]]:
+    """Summary metrics for many configs in one batched engine call.
+
+    `equity_required` is total uses less SBA and seller debt; `min_dscr` is
+    None for deals with no debt service, which filters and sorting treat as
+    +inf.
+    """
+    if not configs:
+        return []
+    res = compute_batch(configs)
+    lowest = min_dscr(res)
+    debt = np.array([float(c.get("sba_principal", 0)) + float(c.get("seller_principal", 0)) for c in configs])
+    cols = {
+        "purchase_price": [float(c.get("purchase_price", 0)) for c in configs],
+        "total_uses": res["total_uses"],
+        "equity_required": np.round(res["total_uses"] - debt, 2),
+        "min_dscr": np.where(np.isinf(lowest), np.nan, lowest),
+        "cash_floor": res["monthly"]["Cash Balance"].min(axis=1),
+        "total_distributable": np.round(res["monthly"]["Distributable"].sum(axis=1), 2),
+        "proforma_sde_y1": res["proforma_sde_y1"],
+    }
+    return [{m: (None if v != v else v) for m, v in ((m, float(cols[m][i])) for m in METRICS)}
+            for i in range(len(configs))]
+
+
+def _where(filters: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]],
+           name_like: Optional[str]) -> Tuple[str, List[Any]]:
+    clauses: List[str] = []
+    params: List[Any] = []
+    for col, (lo, hi) in (filters or {}).items():
+        if col not in METRICS:
+            raise ValueError(f"Cannot filter on '{col}'; choose among {METRICS}")
+        if lo is not None:
+            clauses.append(f"({col} IS NULL OR {col} >= ?)" if col in NULL_IS_INF else f"{col} >= ?")
+            params.append(float(lo))
+        if hi is not None:
+            clauses.append(f"{col} <= ?")
+            params.append(float(hi))
+    if name_like:
+        clauses.append("name LIKE ? ESCAPE '\\'")
+        escaped = name_like.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{escaped}%")
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class ScenarioLibrary:
+    """Named scenarios persisted in SQLite.
+
+    Listing and filtering only read the summary columns, so browsing never
+    loads configs into memory; `load` fetches one config by name. `filters`
+    map a metric to an inclusive (low, high) range, either end None.
+    """
+
+    def __init__(self, path: str = "scenarios.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        # Streamlit reruns scripts on worker threads; access is serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def save(self, name: str, config: Dict[str, Any]) -> None:
+        self.save_many([(name, config)])
+
+    def save_many(self, items: Iterable[Tuple[str, Dict[str, Any]]], chunk_size: int = 500) -> int:
+        """Insert or replace scenarios, summarizing each chunk in one batched engine call."""
+        it = iter(items)
+        saved = 0
+        while True:
+            chunk = [item for _, item in zip(range(chunk_size), it)]
+            if not chunk:
+                return saved
+            now = time.time()
+            rows = [(name, json.dumps(cfg), *(m[k] for k in METRICS), now, now)
+                    for (name, cfg), m in zip(chunk, summarize([cfg for _, cfg in chunk]))]
+            cols = ("name", "config") + METRICS + ("created_at", "updated_at")
+            updates = ", ".join(f"{c}=excluded.{c}" for c in cols if c not in ("name", "created_at"))
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO scenarios ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+                    f"ON CONFLICT(name) DO UPDATE SET {updates}", rows)
+            saved += len(rows)
+
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT config FROM scenarios WHERE name = ?", (name,)).fetchone()
+        return json.loads(row["config"]) if row else None
+
+    def delete(self, name: str) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM scenarios WHERE name = ?", (name,)).rowcount > 0
+
+    def count(self, filters: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+              name_like: Optional[str] = None) -> int:
+        where, params = _where(filters, name_like)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM scenarios{where}", params).fetchone()[0]
+
+    def list(self, page: int = 0, page_size: int = 50, order_by: str = "name", descending: bool = False,
+             filters: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+             name_like: Optional[str] = None) -> List[Dict[str, Any]]:
+        """One page of scenario summaries (no configs), zero-based `page`."""
+        if order_by not in SORTABLE:
+            raise ValueError(f"Cannot sort by '{order_by}'; choose among {SORTABLE}")
+        where, params = _where(filters, name_like)
+        direction = "DESC" if descending else "ASC"
+        order = f"{order_by} {direction}"
+        if order_by in NULL_IS_INF:
+            order = f"{order_by} IS NULL {direction}, {order}"
+        sql = (f"SELECT name, {', '.join(METRICS)}, updated_at FROM scenarios{where} "
+               f"ORDER BY {order}, name LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self._conn.execute(sql, params + [page_size, page * page_size]).fetchall()
+        return [dict(r) for r in rows]
+
+    def iter_configs(self, filters: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+                     name_like: Optional[str] = None, chunk_size: int = 500) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Stream (name, config) for matching scenarios in name order, `chunk_size` rows at a time."""
+        where, params = _where(filters, name_like)
+        last = ""
+        while True:
+            sql = (f"SELECT name, config FROM scenarios{where}{' AND' if where else ' WHERE'} name > ? "
+                   f"ORDER BY name LIMIT ?")
+            with self._lock:
+                rows = self._conn.execute(sql, params + [last, chunk_size]).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                yield r["name"], json.loads(r["config"])
+            last = rows[-1]["name"]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_LIBRARY: Optional[ScenarioLibrary] = None
+_LIBRARY_LOCK = threading.Lock()
+
+
+def shared_library() -> ScenarioLibrary:
+    """Process-wide library at $TREEHOUSE_LIBRARY (default ./scenarios.db), opened on first use."""
+    global _LIBRARY
+    with _LIBRARY_LOCK:
+        if _LIBRARY is None:
+            _LIBRARY = ScenarioLibrary(os.getenv("TREEHOUSE_LIBRARY", "scenarios.db"))
+        return _LIBRARY
@@ -0,0 +1,274 @@
+"""Portfolio roll-up: many deals on one monthly calendar, with batched IRR / XIRR.
+
+Each holding is a config plus its close month ("2024-03"). Deal month m
+lands in calendar month close + m; investor equity goes in at close (and at
+follow-on months) and investor dividends come out monthly. Without a
+`terminal` equity value at the horizon, IRRs are cash-yield IRRs.
+
+Usage:
+    python portfolio.py holdings.jsonl --deals deals.csv --investors investors.csv --monthly fund.csv
+
+where each holding is a config with its "close" month ("2024-03") and optionally a "name".
+"""
+from __future__ import annotations
+import argparse
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from engine import HORIZON_MONTHS, batch_inputs, evaluate, min_dscr
+from input_formats import iter_config_files
+
+# Deal-level monthly lines summed into fund totals
+FUND_FIELDS = ("SBA Payment", "Seller Payment", "Debt Service", "CFADS", "FCFE", "Distributable", "Follow-on Inflow")
+
+
+# ----------------------------
+# Batched rate solver
+# ----------------------------
+def npv(flows: np.ndarray, rate: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """NPV of (K, T) flows at (K,) annual rates, with `times` in years, (T,) or (K, T)."""
+    return (flows * (1 + rate[:, None]) ** -times).sum(axis=1)
+
+
+def solve_rate(flows: np.ndarray, times: np.ndarray, tol: float = 1e-10, max_iter: int = 100) -> np.ndarray:
+    """Annual rate r with sum(flows * (1 + r) ** -times) = 0 for every row, solved together.
+
+    Each row keeps a sign-change bracket; Newton steps that leave it are
+    replaced by bisection, so every bracketed row converges. Rows with no
+    sign change between -99.99% and 1e9% (e.g. no outflow) get NaN.
+    """
+    flows = np.atleast_2d(np.asarray(flows, float))
+    times = np.broadcast_to(np.asarray(times, float), flows.shape)
+    k = flows.shape[0]
+    scale = np.abs(flows).sum(axis=1)
+    lo, hi = np.full(k, -0.9999), np.ones(k)
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        f_lo, f_hi = npv(flows, lo, times), npv(flows, hi, times)
+        for _ in range(9):
+            grow = np.sign(f_lo) == np.sign(f_hi)
+            if not grow.any():
+                break
+            hi = np.where(grow, hi * 10, hi)
+            f_hi = np.where(grow, npv(flows, hi, times), f_hi)
+        ok = (np.sign(f_lo) != np.sign(f_hi)) & (scale > 0) & np.isfinite(f_lo)
+        r = np.where((lo < 0.1) & (0.1 < hi), 0.1, (lo + hi) / 2)
+        for _ in range(max_iter):
+            disc = (1 + r[:, None]) ** -times
+            f = (flows * disc).sum(axis=1)
+            df = -(times * flows * disc).sum(axis=1) / (1 + r)
+            done = ~ok | (np.abs(f) <= tol * scale) | (hi - lo <= tol * (1 + np.abs(r)))
+            if done.all():
+                break
+            below = np.sign(f) == np.sign(f_lo)
+            lo, f_lo, hi = np.where(below, r, lo), np.where(below, f, f_lo), np.where(below, hi, r)
+            step = r - f / df
+            inside = np.isfinite(step) & (step > lo) & (step < hi)
+            r = np.where(done, r, np.where(inside, step, (lo + hi) / 2))
+    return np.where(ok, r, np.nan)
+
+
+def irr(flows: np.ndarray, periods_per_year: int = 12) -> np.ndarray:
+    """Annual effective IRR of each row of evenly spaced (K, T) flows."""
+    flows = np.atleast_2d(flows)
+    return solve_rate(flows, np.arange(flows.shape[1]) / periods_per_year)
+
+
+def _days(dates: Any) -> np.ndarray:
+    return np.asarray(dates, "datetime64[D]").astype(np.int64)
+
+
+def xirr(flows: np.ndarray, dates: Any) -> np.ndarray:
+    """XIRR (actual/365 from the first date) of each row of (K, T) flows on (T,) or (K, T) dates."""
+    days = _days(dates)
+    return solve_rate(flows, (days - days[..., :1]) / 365.0)
+
+
+# ----------------------------
+# Roll-up
+# ----------------------------
+def _month_ordinal(close: Any) -> int:
+    return pd.Period(close, freq="M").ordinal
+
+
+def _month_dates(ordinals: np.ndarray) -> np.ndarray:
+    """First day of each month, for month ordinals (months since 1970-01)."""
+    return ordinals.astype("datetime64[M]").astype("datetime64[D]")
+
+
+def _scatter(keys: np.ndarray, weights: np.ndarray, size: int) -> np.ndarray:
+    return np.bincount(keys.ravel(), weights.ravel(), minlength=size)
+
+
+def rollup(configs: Sequence[Dict[str, Any]], closes: Sequence[Any], names: Optional[Sequence[str]] = None,
+           months: int = HORIZON_MONTHS, terminal: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+    """Evaluate every deal in one batch and roll them up on a common monthly calendar.
+
+    `terminal` is an optional equity value per deal at the end of its
+    horizon, split by ownership %. Returns DataFrames "monthly" (fund lines
+    by calendar month), "annual" (by calendar year, with fund DSCR),
+    "deals" and "investors" (investors matched by name across deals, with
+    contributions, distributions, multiple and XIRR), plus "fund" totals.
+    """
+    if len(configs) != len(closes):
+        raise ValueError(f"{len(configs)} configs but {len(closes)} close dates")
+    names = list(names) if names is not None else [f"Deal {i + 1}" for i in range(len(configs))]
+    x = batch_inputs(configs)
+    res = evaluate(x, months)
+    start = np.array([_month_ordinal(c) for c in closes], np.int64).reshape(-1)
+    return _rollup(x, res, start, names, months, None if terminal is None else np.asarray(terminal, float))
+
+
+def _rollup(x: Dict[str, Any], res: Dict[str, Any], start: np.ndarray, names: List[str], months: int,
+            terminal: Optional[np.ndarray]) -> Dict[str, Any]:
+    n = len(start)
+    t0 = int(start.min()) if n else 0
+    offset = start - t0
+    size = int(offset.max()) + months + 1 if n else 1
+    cal = _month_dates(t0 + np.arange(size))
+    cells = offset[:, None] + np.arange(months + 1)  # deal month m -> calendar index
+
+    # Deal equity flows, month 0 = close
+    dividends = res["dividends"]
+    to_investors = dividends.sum(axis=1)
+    follow_on = res["monthly"]["Follow-on Inflow"]
+    paid_in = x["investor_contribution"].sum(axis=1)
+    flows = np.zeros((n, months + 1))
+    flows[:, 0] = -paid_in
+    flows[:, 1:] = to_investors - follow_on
+    if terminal is not None:
+        flows[:, -1] += terminal * x["investor_pct"].sum(axis=1) / 100
+
+    contributed = paid_in + follow_on.sum(axis=1)
+    distributed = flows[:, 1:].sum(axis=1) + follow_on.sum(axis=1)
+    deal_days = _days(_month_dates(start[:, None] + np.arange(months + 1)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deals = pd.DataFrame({
+            "Deal": names,
+            "Close": [str(pd.Period(ordinal=int(s), freq="M")) for s in start],
+            "Contributed": np.round(contributed, 2),
+            "Distributions": np.round(distributed, 2),
+            "Equity Multiple": np.where(contributed > 0, distributed / contributed, np.nan),
+            "IRR": irr(flows),
+            "XIRR": solve_rate(flows, (deal_days - deal_days[:, :1]) / 365.0),
+            "Min DSCR": min_dscr(res),
+        })
+    deals["Min DSCR"] = deals["Min DSCR"].replace(np.inf, np.nan)
+
+    # Fund lines on the calendar
+    lines = {f: _scatter(cells[:, 1:], res["monthly"][f], size) for f in FUND_FIELDS}
+    lines["Investor Distributions"] = _scatter(cells[:, 1:], to_investors, size)
+    equity_in = np.zeros((n, months + 1))
+    equity_in[:, 0] = paid_in
+    equity_in[:, 1:] = follow_on
+    lines["Equity In"] = _scatter(cells, equity_in, size)
+    lines["Net Equity Flow"] = _scatter(cells, flows, size)
+    periods = pd.PeriodIndex([pd.Period(ordinal=int(t0 + i), freq="M") for i in range(size)], name="Month")
+    monthly = pd.DataFrame({k: np.round(v, 2) for k, v in lines.items()}, index=periods)
+    monthly["Active Deals"] = _scatter(cells[:, 1:], np.ones((n, months)), size).astype(np.int64)
+
+    years = periods.year.to_numpy()
+    year_idx = years - years[0]
+    annual = pd.DataFrame({k: np.bincount(year_idx, v) for k, v in lines.items()},
+                          index=pd.Index(np.unique(years), name="Year"))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annual["DSCR"] = np.where(annual["Debt Service"] > 0, annual["CFADS"] / annual["Debt Service"], np.nan)
+    annual[list(lines)] = annual[list(lines)].round(2)
+
+    investors = _investors(x, dividends, cells, offset, cal, size, months, terminal)
+    fund_flow = lines["Net Equity Flow"][None]
+    fund = {
+        "deals": n,
+        "contributed": round(float(contributed.sum()), 2),
+        "distributions": round(float(distributed.sum()), 2),
+        "equity_multiple": float(distributed.sum() / contributed.sum()) if contributed.sum() > 0 else float("nan"),
+        "xirr": float(solve_rate(fund_flow, (_days(cal) - _days(cal)[0]) / 365.0)[0]),
+        "min_dscr": float(annual["DSCR"].min()) if annual["DSCR"].notna().any() else float("nan"),
+    }
+    return {"monthly": monthly, "annual": annual, "deals": deals, "investors": investors, "fund": fund}
+
+
+def _investors(x: Dict[str, Any], dividends: np.ndarray, cells: np.ndarray, offset: np.ndarray, cal: np.ndarray,
+               size: int, months: int, terminal: Optional[np.ndarray]) -> pd.DataFrame:
+    """Per-investor flows across deals (matched by name) on the calendar, with XIRR."""
+    n, width = x["investor_pct"].shape
+    ids: Dict[str, int] = {}
+    inv = np.full((n, width), -1, np.int64)
+    for r, row in enumerate(x["investor_names"]):
+        for i, name in enumerate(row):
+            inv[r, i] = ids.setdefault(name, len(ids))
+    k = len(ids)
+    held = inv >= 0
+    # Close contributions, follow-ons and dividends as (investor, calendar cell) keys
+    out_keys = [(inv * size + offset[:, None])[held]]
+    out_vals = [x["investor_contribution"][held]]
+    fo_m, fo_amt, fo_inv = x["follow_on_month"], x["follow_on_amount"], x["follow_on_investor"]
+    rows = np.broadcast_to(np.arange(n)[:, None], fo_inv.shape)
+    fo_ok = (fo_inv >= 0) & (fo_m >= 1) & (fo_m <= months) & (fo_amt != 0)
+    out_keys.append(inv[rows[fo_ok], fo_inv[fo_ok]] * size + offset[rows[fo_ok]] + fo_m[fo_ok])
+    out_vals.append(fo_amt[fo_ok])
+    paid_in = _scatter(np.concatenate(out_keys), np.concatenate(out_vals), k * size).reshape(k, size)
+
+    div = dividends
+    if terminal is not None:
+        div = div.copy()
+        div[:, :, -1] += terminal[:, None] * x["investor_pct"] / 100
+    div_keys = inv[:, :, None] * size + cells[:, None, 1:]
+    received = _scatter(div_keys[held], div[held], k * size).reshape(k, size)
+
+    contributed, distributed = paid_in.sum(axis=1), received.sum(axis=1)
+    days = _days(cal)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.DataFrame({
+            "Investor": list(ids),
+            "Deals": np.bincount(inv[held], minlength=k),
+            "Contributed": np.round(contributed, 2),
+            "Distributions": np.round(distributed, 2),
+            "Equity Multiple": np.where(contributed > 0, distributed / contributed, np.nan),
+            "XIRR": solve_rate(received - paid_in, (days - days[0]) / 365.0) if k else np.zeros(0),
+        })
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def load_holdings(paths: Sequence[str]) -> Tuple[List[Dict[str, Any]], List[str], List[str]]:
+    """(configs, closes, names) from JSON/JSONL configs that carry "close" and optionally "name"."""
+    configs, closes, names = [], [], []
+    for source, cfg in iter_config_files(paths):
+        name = str(cfg.get("name") or f"Deal {len(configs) + 1}")
+        if not cfg.get("close"):
+            raise ValueError(f"{source}: holding '{name}' has no close month")
+        configs.append(cfg)
+        closes.append(cfg["close"])
+        names.append(name)
+    return configs, closes, names
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Roll up many deals on a common calendar with IRR/XIRR.")
+    p.add_argument("inputs", nargs="+", help="holdings files (JSON/JSONL), or - for stdin")
+    p.add_argument("--deals", help="per-deal CSV")
+    p.add_argument("--investors", help="per-investor CSV")
+    p.add_argument("--monthly", help="fund monthly CSV")
+    p.add_argument("--annual", help="fund annual CSV")
+    p.add_argument("--months", type=int, default=HORIZON_MONTHS)
+    args = p.parse_args(argv)
+
+    configs, closes, names = load_holdings(args.inputs)
+    out = rollup(configs, closes, names, args.months)
+    for key in ("deals", "investors", "monthly", "annual"):
+        path = getattr(args, key)
+        if path:
+            out[key].to_csv(path, index=key in ("monthly", "annual"))
+    f = out["fund"]
+    sys.stdout.write(f"{f['deals']:,} deals  contributed {f['contributed']:,.0f}  distributed "
+                     f"{f['distributions']:,.0f}  multiple {f['equity_multiple']:.2f}x  XIRR {f['xirr']:.2%}  "
+                     f"min DSCR {f['min_dscr']:.2f}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""Columnar deal result: contiguous float64 matrices with cheap pandas views."""
+from __future__ import annotations
+import io
+import json
+from typing import Any, BinaryIO, Dict, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from instrument import count
+
+MONTHLY_FIELDS = ("SDE", "Maint CapEx", "Growth CapEx", "SBA Payment", "Seller Payment", "Debt Service",
+                  "CFADS", "FCFE", "Follow-on Inflow", "Retained", "Distributable", "Cash Balance")
+ANNUAL_FIELDS = ("Pro-forma SDE", "ΔNWC", "Maint CapEx", "Growth CapEx", "SBA Debt Service", "Seller Debt Service",
+                 "Total Debt Service", "CFADS", "FCFE", "Follow-on Inflow", "Retained", "Distributable")
+SCALAR_FIELDS = ("working_cap_buffer", "total_uses", "total_sources", "proforma_sde_y1")
+INVESTOR_FIELDS = ("Ownership %", "Contributed (incl. follow-ons)", "Total Dividends (5y)", "Equity Multiple (5y)",
+                   "Payback Year")
+
+
+def _records(columns: Dict[str, Any], n: int) -> List[Dict[str, Any]]:
+    keys = list(columns)
+    return [dict(zip(keys, r)) for r in zip(*(columns[k] for k in keys))] if keys else [{}] * n
+
+
+class DealResult:
+    """One deal's outputs as matrices rather than per-row dicts.
+
+    `monthly` is (len(MONTHLY_FIELDS), months), `annual` is
+    (len(ANNUAL_FIELDS) + 1, years) with DSCR last (NaN without debt
+    service), `dividends` / `dividends_annual` are investor x month / year,
+    and `investors` is (len(INVESTOR_FIELDS), investors) with payback year 0
+    meaning none. Money is rounded to cents, as in the legacy dict.
+
+    Frame views wrap the matrices without copying. `legacy()` builds the
+    `compute` dict on demand, and `result["total_uses"]` / `result["y1"]`
+    keep dict-style readers working.
+    """
+
+    __slots__ = ("scalars", "monthly", "annual", "dividends", "dividends_annual", "investors", "names")
+
+    def __init__(self, scalars: np.ndarray, monthly: np.ndarray, annual: np.ndarray, dividends: np.ndarray,
+                 dividends_annual: np.ndarray, investors: np.ndarray, names: Sequence[str]):
+        c = np.ascontiguousarray
+        self.scalars = c(scalars, float)
+        self.monthly = c(monthly, float)
+        self.annual = c(annual, float)
+        self.dividends = c(dividends, float).reshape(len(names), self.monthly.shape[1])
+        self.dividends_annual = c(dividends_annual, float).reshape(len(names), self.annual.shape[1])
+        self.investors = c(investors, float).reshape(len(INVESTOR_FIELDS), len(names))
+        self.names = tuple(names)
+
+    # Scalars
+    @property
+    def working_cap_buffer(self) -> float:
+        return float(self.scalars[0])
+
+    @property
+    def total_uses(self) -> float:
+        return float(self.scalars[1])
+
+    @property
+    def total_sources(self) -> float:
+        return float(self.scalars[2])
+
+    @property
+    def proforma_sde_y1(self) -> float:
+        return float(self.scalars[3])
+
+    @property
+    def months(self) -> int:
+        return self.monthly.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, k).nbytes for k in ("scalars", "monthly", "annual", "dividends",
+                                                      "dividends_annual", "investors"))
+
+    def __getitem__(self, key: str) -> Any:
+        if key in SCALAR_FIELDS:
+            return float(self.scalars[SCALAR_FIELDS.index(key)])
+        if key == "y1":
+            return self.y1_rows()
+        if key == "years":
+            return self.year_rows()
+        if key == "investors":
+            return self.investor_rows()
+        raise KeyError(key)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DealResult):
+            return NotImplemented
+        return self.names == other.names and all(
+            np.array_equal(getattr(self, k), getattr(other, k), equal_nan=True)
+            for k in ("scalars", "monthly", "annual", "dividends", "dividends_annual", "investors"))
+
+    def __getstate__(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+
+    # Zero-copy views
+    def monthly_frame(self) -> pd.DataFrame:
+        """Months x MONTHLY_FIELDS view over `monthly` (indexed by Month, no copy)."""
+        return pd.DataFrame(self.monthly.T, columns=list(MONTHLY_FIELDS), copy=False,
+                            index=pd.RangeIndex(1, self.months + 1, name="Month"))
+
+    def dividends_frame(self) -> pd.DataFrame:
+        """Months x investors view over `dividends` (no copy)."""
+        return pd.DataFrame(self.dividends.T, columns=list(self.names), copy=False,
+                            index=pd.RangeIndex(1, self.months + 1, name="Month"))
+
+    # Display tables (same columns as the legacy dict's rows)
+    def y1_table(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.monthly[:, :12].T, columns=list(MONTHLY_FIELDS))
+        df.insert(0, "Month", np.arange(1, 13))
+        for name, div in zip(self.names, self.dividends[:, :12]):
+            df[f"Dividend • {name}"] = div
+        return df
+
+    def years_table(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.annual.T, columns=list(ANNUAL_FIELDS) + ["DSCR"])
+        df.insert(0, "Year", np.arange(1, self.annual.shape[1] + 1))
+        for name, div in zip(self.names, self.dividends_annual):
+            df[f"Investor Dividend • {name}"] = div
+        return df
+
+    def investors_table(self) -> pd.DataFrame:
+        return pd.DataFrame(self._investor_columns(), columns=["Investor"] + list(INVESTOR_FIELDS))
+
+    def tables(self) -> Dict[str, pd.DataFrame]:
+        """The app's three output tables, keyed like `utils.result_tables`."""
+        return {"Year1_Monthly": self.y1_table(), "Years1_5_Annual": self.years_table(),
+                "Investor_Summary": self.investors_table()}
+
+    def _investor_columns(self) -> Dict[str, list]:
+        pct, contrib, total, mult, payback = self.investors
+        return {
+            "Investor": list(self.names),
+            "Ownership %": pct.tolist(),
+            "Contributed (incl. follow-ons)": contrib.tolist(),
+            "Total Dividends (5y)": total.tolist(),
+            "Equity Multiple (5y)": [None if m != m else m for m in mult.tolist()],
+            "Payback Year": [f"Year {int(p)}" if p else "—" for p in payback.tolist()],
+        }
+
+    # Legacy dict
+    def y1_rows(self) -> List[Dict[str, Any]]:
+        cols: Dict[str, Any] = {"Month": list(range(1, 13))}
+        cols.update(zip(MONTHLY_FIELDS, self.monthly[:, :12].tolist()))
+        for name, div in zip(self.names, self.dividends[:, :12].tolist()):
+            cols[f"Dividend • {name}"] = div
+        return _records(cols, 12)
+
+    def year_rows(self) -> List[Dict[str, Any]]:
+        n_years = self.annual.shape[1]
+        cols: Dict[str, Any] = {"Year": list(range(1, n_years + 1))}
+        cols.update(zip(ANNUAL_FIELDS, self.annual[:-1].tolist()))
+        cols["DSCR"] = [None if v != v else v for v in self.annual[-1].tolist()]
+        for name, div in zip(self.names, self.dividends_annual.tolist()):
+            cols[f"Investor Dividend • {name}"] = div
+        return _records(cols, n_years)
+
+    def investor_rows(self) -> List[Dict[str, Any]]:
+        return _records(self._investor_columns(), len(self.names))
+
+    def legacy(self) -> Dict[str, Any]:
+        """The `compute` dict of scalars and row lists, built fresh on each call."""
+        count("rows_built", 12 + self.annual.shape[1])
+        out: Dict[str, Any] = dict(zip(SCALAR_FIELDS, self.scalars.tolist()))
+        out["y1"] = self.y1_rows()
+        out["years"] = self.year_rows()
+        out["investors"] = self.investor_rows()
+        return out
+
+    # Serialization
+    def to_npz(self, target: Union[str, BinaryIO]) -> None:
+        np.savez_compressed(target, names=np.array(self.names, dtype=str),
+                            **{k: getattr(self, k) for k in ("scalars", "monthly", "annual", "dividends",
+                                                             "dividends_annual", "investors")})
+
+    @classmethod
+    def from_npz(cls, source: Union[str, BinaryIO]) -> "DealResult":
+        with np.load(source, allow_pickle=False) as z:
+            return cls(z["scalars"], z["monthly"], z["annual"], z["dividends"], z["dividends_annual"],
+                       z["investors"], z["names"].tolist())
+
+    def to_npz_bytes(self) -> bytes:
+        bio = io.BytesIO()
+        self.to_npz(bio)
+        return bio.getvalue()
+
+    def to_arrow(self) -> bytes:
+        """Arrow IPC stream: one row per month (monthly fields plus one dividend column per
+        investor); scalars, annual and investor matrices ride in the schema metadata."""
+        pa = _pyarrow()
+        cols = [pa.array(v) for v in self.monthly] + [pa.array(v) for v in self.dividends]
+        names = list(MONTHLY_FIELDS) + [f"dividend:{i}" for i in range(len(self.names))]
+        meta = {"names": self.names, "scalars": self.scalars.tolist(), "annual": _nan_to_none(self.annual),
+                "dividends_annual": self.dividends_annual.tolist(), "investors": _nan_to_none(self.investors)}
+        table = pa.Table.from_arrays(cols, names=names).replace_schema_metadata({"deal_result": json.dumps(meta)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    @classmethod
+    def from_arrow(cls, data: bytes) -> "DealResult":
+        pa = _pyarrow()
+        table = pa.ipc.open_stream(data).read_all()
+        meta = json.loads(table.schema.metadata[b"deal_result"])
+        names = meta["names"]
+        monthly = np.array([table.column(f).to_numpy() for f in MONTHLY_FIELDS])
+        dividends = np.array([table.column(f"dividend:{i}").to_numpy() for i in range(len(names))])
+        return cls(np.array(meta["scalars"]), monthly, _none_to_nan(meta["annual"]), dividends,
+                   np.array(meta["dividends_annual"]), _none_to_nan(meta["investors"]), names)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise ImportError("Arrow output needs pyarrow: pip install pyarrow") from exc
+    return pyarrow
+
+
+def _nan_to_none(a: np.ndarray) -> list:
+    return np.where(np.isnan(a), None, a).tolist()
+
+
+def _none_to_nan(rows: list) -> np.ndarray:
+    return np.array(rows, dtype=float)  # None → nan
@@ -0,0 +1,133 @@
+"""Sensitivity analysis: one-at-a-time tornado bumps and 2-D grids in single batched evaluations."""
+from __future__ import annotations
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from engine import BATCH_KEYS, HORIZON_MONTHS, batch_inputs, evaluate, grid_inputs, min_dscr, repeat_inputs
+from engine import scale_leverage
+
+TORNADO_INPUTS = ("hist_sde", "sba_rate", "purchase_price", "cogs_pct", "seller_standby_months", "retain_pct")
+# Absolute bumps for inputs where a relative move is meaningless (rates, percentages, months);
+# everything else moves by `bump_pct` of its base value.
+DEFAULT_STEPS: Dict[str, float] = {
+    "sba_rate": 1.0, "seller_rate": 1.0, "cogs_pct": 5.0, "retain_pct": 10.0, "sde_growth_pct": 2.0,
+    "seller_standby_months": 6, "sba_io_months": 6, "sba_term_months": 12, "seller_term_months": 12,
+    "refi.new_rate_pct": 1.0,
+}
+INTEGER_KEYS = ("sba_term_months", "sba_io_months", "seller_term_months", "seller_standby_months",
+                "wc_months", "refi.year", "refi.new_term_months")
+LABELS = {
+    "hist_sde": "Historical SDE", "sba_rate": "SBA rate %", "purchase_price": "Purchase price",
+    "cogs_pct": "COGS %", "seller_standby_months": "Seller standby (months)", "retain_pct": "Retain %",
+}
+
+
+def _min_dscr(res: Dict[str, Any]) -> np.ndarray:
+    out = min_dscr(res)
+    return np.where(np.isinf(out), np.nan, out)
+
+
+# Scalar outcome per scenario, from an `evaluate` result
+METRICS: Dict[str, Callable[[Dict[str, Any]], np.ndarray]] = {
+    "FCFE (5y)": lambda r: r["monthly"]["FCFE"].sum(axis=1),
+    "FCFE (Y1)": lambda r: r["y1"]["FCFE"].sum(axis=1),
+    "Distributable (5y)": lambda r: r["monthly"]["Distributable"].sum(axis=1),
+    "Min DSCR": _min_dscr,
+    "DSCR (Y1)": lambda r: r["years"]["DSCR"][:, 0],
+    "Cash floor": lambda r: r["monthly"]["Cash Balance"].min(axis=1),
+}
+
+
+def _check(keys: Sequence[str], metric: str) -> None:
+    unknown = set(keys) - set(BATCH_KEYS)
+    if unknown:
+        raise ValueError(f"Cannot vary {sorted(unknown)}; choose among {BATCH_KEYS}")
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}'; choose among {tuple(METRICS)}")
+
+
+def tornado(config: Dict[str, Any], inputs: Sequence[str] = TORNADO_INPUTS, metric: str = "FCFE (5y)",
+            bump_pct: float = 10.0, steps: Optional[Dict[str, float]] = None, hold_leverage: bool = True,
+            months: int = HORIZON_MONTHS) -> pd.DataFrame:
+    """Bump each input down and up one at a time; one engine call for all 2K+1 scenarios.
+
+    Returns one row per input, largest swing first, with the low/high input
+    values, the metric at each, and the base metric. With `hold_leverage`
+    debt principals move with purchase price, otherwise price only changes
+    uses at close.
+    """
+    _check(inputs, metric)
+    steps = {**DEFAULT_STEPS, **(steps or {})}
+    base = batch_inputs([config])
+    x = repeat_inputs(base, 1 + 2 * len(inputs))
+    lows, highs = [], []
+    for i, key in enumerate(inputs):
+        v = float(base[key][0])
+        step = steps[key] if key in steps else abs(v) * bump_pct / 100
+        lo, hi = max(v - step, 0.0), v + step
+        if key in INTEGER_KEYS:
+            lo, hi = float(round(lo)), float(round(hi))
+        x[key][1 + 2 * i], x[key][2 + 2 * i] = lo, hi
+        lows.append(lo)
+        highs.append(hi)
+    if hold_leverage and "purchase_price" in inputs:
+        scale_leverage(x, base)
+    values = METRICS[metric](evaluate(x, months))
+    df = pd.DataFrame({
+        "Input": [LABELS.get(k, k) for k in inputs],
+        "Key": list(inputs),
+        "Low Value": lows,
+        "High Value": highs,
+        "Metric @ Low": values[1::2],
+        "Metric @ High": values[2::2],
+        "Base": values[0],
+    })
+    df["Swing"] = (df["Metric @ High"] - df["Metric @ Low"]).abs()
+    return df.sort_values("Swing", ascending=False, ignore_index=True)
+
+
+def heatmap(config: Dict[str, Any], x_key: str, x_values: Sequence[float], y_key: str, y_values: Sequence[float],
+            metric: str = "Min DSCR", hold_leverage: bool = True, months: int = HORIZON_MONTHS) -> pd.DataFrame:
+    """Metric over the `y_values` x `x_values` grid, one engine call; rows are y, columns x."""
+    _check((x_key, y_key), metric)
+    x = grid_inputs(config, {y_key: y_values, x_key: x_values})
+    if hold_leverage and "purchase_price" in (x_key, y_key):
+        scale_leverage(x, batch_inputs([config]))
+    values = METRICS[metric](evaluate(x, months)).reshape(len(y_values), len(x_values))
+    return pd.DataFrame(values, index=pd.Index(np.asarray(y_values, float), name=y_key),
+                        columns=pd.Index(np.asarray(x_values, float), name=x_key))
+
+
+def axis(config: Dict[str, Any], key: str, spread_pct: float = 25.0, points: int = 50) -> np.ndarray:
+    """`points` evenly spaced values within ±`spread_pct` (or ±DEFAULT_STEPS x 3) of the config value."""
+    v = float(batch_inputs([config])[key][0])
+    half = DEFAULT_STEPS[key] * 3 if key in DEFAULT_STEPS else abs(v) * spread_pct / 100
+    return np.linspace(max(v - half, 0.0), v + half, points)
+
+
+def tornado_figure(df: pd.DataFrame, metric: str = "FCFE (5y)") -> go.Figure:
+    base = float(df["Base"].iloc[0]) if len(df) else 0.0
+    rows = df.iloc[::-1]  # plotly draws the first bar at the bottom
+    fig = go.Figure()
+    for side, color in (("Low", "#d62728"), ("High", "#2ca02c")):
+        fig.add_bar(y=rows["Input"], x=rows[f"Metric @ {side}"] - base, base=base, orientation="h",
+                    name=f"{side} input", marker_color=color,
+                    customdata=rows[f"{side} Value"], hovertemplate="%{y}: %{customdata:,.2f} → %{x:,.0f}<extra></extra>")
+    fig.update_layout(barmode="overlay", title=f"Sensitivity of {metric}", xaxis_title=metric,
+                      height=120 + 40 * len(df), margin=dict(l=10, r=10, t=40, b=10))
+    fig.add_vline(x=base, line_dash="dot")
+    return fig
+
+
+def heatmap_figure(df: pd.DataFrame, metric: str = "Min DSCR") -> go.Figure:
+    fig = go.Figure(go.Heatmap(z=df.values, x=df.columns.values, y=df.index.values, colorscale="RdYlGn",
+                               colorbar=dict(title=metric),
+                               hovertemplate=f"{df.columns.name}=%{{x:,.2f}}<br>{df.index.name}=%{{y:,.2f}}"
+                                             f"<br>{metric}=%{{z:,.2f}}<extra></extra>"))
+    fig.update_layout(xaxis_title=LABELS.get(df.columns.name, df.columns.name),
+                      yaxis_title=LABELS.get(df.index.name, df.index.name),
+                      title=metric, margin=dict(l=10, r=10, t=40, b=10))
+    return fig
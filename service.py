@@ -0,0 +1,360 @@
+"""Local HTTP compute service: asyncio front end over a process pool.
+
+Usage:
+    python service.py --port 8765 --workers 4
+
+Endpoints (JSON in, JSON out unless noted):
+    POST /compute          config or {"config": ...}      -> compute() result
+    POST /compute_batch    {"configs": [...]} or {"base": ..., "sweep": {...}, "months": 60}
+    POST /export/excel     config                         -> .xlsx bytes
+    POST /export/pdf       config                         -> .pdf bytes
+    GET  /metrics          latency / throughput / queue counters
+    GET  /health
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from cache import config_key
+from engine import compute, compute_batch, compute_result
+from input_formats import unwrap_config
+from utils import result_tables, snapshot_metrics, to_excel_bytes, to_pdf_bytes
+
+JSON = "application/json"
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+PDF = "application/pdf"
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def _jsonable(obj: Any) -> Any:
+    """numpy arrays/scalars → lists/floats; NaN → None (JSON has no NaN)."""
+    if isinstance(obj, dict):
+        return {k: _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "f" and np.isnan(obj).any():
+            return _jsonable(obj.astype(object).tolist())
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and obj != obj:
+        return None
+    return obj
+
+
+# Worker jobs (top-level so they pickle into the process pool)
+def _compute_job(cfg: Dict[str, Any]) -> Tuple[bytes, str]:
+    return json.dumps(_jsonable(compute(cfg))).encode("utf-8"), JSON
+
+
+def _batch_job(payload: Dict[str, Any]) -> Tuple[bytes, str]:
+    months = int(payload.get("months", 60))
+    if "configs" in payload:
+        res = compute_batch([unwrap_config(c) for c in payload["configs"]], months=months)
+    else:
+        res = compute_batch(base=unwrap_config(payload["base"]), sweep=payload.get("sweep") or {}, months=months)
+    return json.dumps(_jsonable(res)).encode("utf-8"), JSON
+
+
+def _check_body(path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    """The job argument for `path`, or a 400 if the request body has the wrong shape."""
+    if ROUTES[path][1]:
+        cfg = unwrap_config(body)
+        if not isinstance(cfg, dict):
+            raise _HTTPError(400, "config must be a JSON object")
+        return cfg
+    if "configs" in body:
+        configs = body["configs"]
+        if not isinstance(configs, list) or not all(isinstance(unwrap_config(c), dict) for c in configs):
+            raise _HTTPError(400, '"configs" must be a list of config objects')
+    elif "base" in body:
+        if not isinstance(unwrap_config(body["base"]), dict):
+            raise _HTTPError(400, '"base" must be a config object')
+        sweep = body.get("sweep") or {}
+        if not isinstance(sweep, dict) or not all(isinstance(v, list) for v in sweep.values()):
+            raise _HTTPError(400, '"sweep" must map keys to lists of values')
+    else:
+        raise _HTTPError(400, 'compute_batch needs "configs" or "base"')
+    months = body.get("months", 60)
+    if isinstance(months, bool) or not isinstance(months, int) or months < 1:
+        raise _HTTPError(400, '"months" must be a positive integer')
+    return body
+
+
+def _excel_job(cfg: Dict[str, Any]) -> Tuple[bytes, str]:
+    return to_excel_bytes(result_tables(compute_result(cfg))), XLSX
+
+
+def _pdf_job(cfg: Dict[str, Any]) -> Tuple[bytes, str]:
+    outs = compute_result(cfg)
+    tables = result_tables(outs)
+    return to_pdf_bytes("Treehouse Deal — Snapshot", snapshot_metrics(outs),
+                        {"Year 1 Monthly": tables["Year1_Monthly"],
+                         "Investor Summary": tables["Investor_Summary"]}), PDF
+
+
+ROUTES: Dict[str, Tuple[Callable[[Dict[str, Any]], Tuple[bytes, str]], bool]] = {
+    # path: (job, body is a single config to unwrap)
+    "/compute": (_compute_job, True),
+    "/compute_batch": (_batch_job, False),
+    "/export/excel": (_excel_job, True),
+    "/export/pdf": (_pdf_job, True),
+}
+
+
+class Metrics:
+    """Request counters plus a sliding window of latencies."""
+
+    def __init__(self, window: int = 2048):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.completed = 0
+        self.errors = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.pool_restarts = 0
+        self.by_route: Dict[str, int] = {}
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def snapshot(self, queue_depth: int, in_flight: int) -> Dict[str, Any]:
+        uptime = time.monotonic() - self.started
+        lat = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            "uptime_s": round(uptime, 3),
+            "requests": self.requests,
+            "completed": self.completed,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "coalesced": self.coalesced,
+            "pool_restarts": self.pool_restarts,
+            "by_route": dict(self.by_route),
+            "throughput_rps": round(self.completed / uptime, 3) if uptime else 0.0,
+            "latency_ms": {"p50": float(np.percentile(lat, 50)), "p95": float(np.percentile(lat, 95)),
+                           "p99": float(np.percentile(lat, 99)), "max": float(lat.max())},
+            "queue_depth": queue_depth,
+            "in_flight_keys": in_flight,
+        }
+
+
+class ComputeService:
+    """HTTP/1.1 front end that coalesces identical in-flight jobs and sheds load when full.
+
+    Jobs go through a bounded queue drained by `concurrency` dispatchers
+    into the executor; when the queue is full requests get 503 with
+    Retry-After instead of piling up. Requests whose (route, body hash)
+    matches a job already in flight await that job's result. Malformed
+    bodies and configs the engine rejects get 400. If a worker process
+    dies, the pool is recreated and the job retried once; a job that
+    breaks the new pool too fails alone.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, workers: Optional[int] = None,
+                 queue_size: int = 64, max_body: int = 16 * 1024 * 1024,
+                 executor: Optional[Executor] = None):
+        self.host, self.port = host, port
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_body = max_body
+        self.metrics = Metrics()
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._queue: Optional[asyncio.Queue] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._dispatchers: list = []
+
+    async def start(self) -> int:
+        """Bind and start serving; returns the bound port (use port=0 for an ephemeral one)."""
+        if self._executor is None:
+            self._executor = self._new_executor()
+        concurrency = 1 if self.workers == 0 else (self.workers or os.cpu_count() or 1)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(concurrency)]
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    def _new_executor(self) -> Executor:
+        # forkserver: forked workers would inherit open client sockets and hold them past close
+        return (ThreadPoolExecutor(1) if self.workers == 0 else ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("forkserver")))
+
+    def _restart_executor(self, broken: Executor) -> bool:
+        """Replace a broken pool we own (once per breakage); False if it isn't ours to replace."""
+        if not self._owns_executor:
+            return False
+        if self._executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+            self.metrics.pool_restarts += 1
+        return True
+
+    async def _run(self, job: Callable[[Dict[str, Any]], Tuple[bytes, str]], arg: Dict[str, Any]) -> Tuple[bytes, str]:
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, job, arg)
+        except BrokenProcessPool:
+            if not self._restart_executor(executor):
+                raise
+        # One retry on the fresh pool; a job that breaks it too fails on its own
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, job, arg)
+        except BrokenProcessPool:
+            self._restart_executor(executor)
+            raise
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._dispatchers:
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _dispatch(self) -> None:
+        while True:
+            job, arg, fut = await self._queue.get()
+            try:
+                fut.set_result(await self._run(job, arg))
+            except Exception as e:  # surfaced to every coalesced waiter
+                if not fut.done():
+                    fut.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    async def _submit(self, path: str, body: Dict[str, Any]) -> Tuple[bytes, str]:
+        job = ROUTES[path][0]
+        arg = _check_body(path, body)
+        key = path + ":" + config_key(arg)
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.metrics.coalesced += 1
+            return await asyncio.shield(fut)
+        fut = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((job, arg, fut))
+        except asyncio.QueueFull:
+            raise _HTTPError(503, "queue full")
+        self._inflight[key] = fut
+        fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(fut)
+
+    async def _route(self, method: str, path: str, raw: bytes) -> Tuple[int, bytes, str]:
+        if path == "/health":
+            return 200, b'{"ok": true}', JSON
+        if path == "/metrics":
+            snap = self.metrics.snapshot(self._queue.qsize(), len(self._inflight))
+            return 200, json.dumps(snap).encode("utf-8"), JSON
+        if path not in ROUTES:
+            raise _HTTPError(404, f"no route {path}")
+        if method != "POST":
+            raise _HTTPError(405, "use POST")
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError as e:
+            raise _HTTPError(400, f"invalid JSON: {e}")
+        if not isinstance(body, dict):
+            raise _HTTPError(400, "body must be a JSON object")
+        try:
+            payload, ctype = await self._submit(path, body)
+        except (ValueError, TypeError, KeyError) as e:
+            # Raised by the engine on bad config values (non-numeric fields, unknown tier or event kinds)
+            raise _HTTPError(400, f"invalid config: {e}")
+        return 200, payload, ctype
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, _ = line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                length = int(headers.get("content-length", "0") or 0)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                start = time.perf_counter()
+                path = target.split("?", 1)[0]
+                self.metrics.requests += 1
+                self.metrics.by_route[path] = self.metrics.by_route.get(path, 0) + 1
+                extra = {}
+                try:
+                    if length > self.max_body:
+                        raise _HTTPError(413, "body too large")
+                    raw = await reader.readexactly(length) if length else b""
+                    status, payload, ctype = await self._route(method, path, raw)
+                    self.metrics.completed += 1
+                except _HTTPError as e:
+                    status, payload, ctype = e.status, json.dumps({"error": e.message}).encode("utf-8"), JSON
+                    if status == 503:
+                        self.metrics.rejected += 1
+                        extra["Retry-After"] = "1"
+                    if status == 413:
+                        keep_alive = False
+                except Exception as e:
+                    self.metrics.errors += 1
+                    status, payload, ctype = 500, json.dumps({"error": str(e)}).encode("utf-8"), JSON
+                self.metrics.latencies.append(time.perf_counter() - start)
+                head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Type: {ctype}",
+                        f"Content-Length: {len(payload)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status, self.message = status, message
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Local Treehouse compute service.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--workers", type=int, default=None, help="process pool size (0 = single thread)")
+    p.add_argument("--queue-size", type=int, default=64)
+    args = p.parse_args(argv)
+    service = ComputeService(args.host, args.port, args.workers, args.queue_size)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
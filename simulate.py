@@ -0,0 +1,212 @@
+"""Monte Carlo risk engine on top of the batched array engine."""
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from engine import BATCH_KEYS, batch_inputs, evaluate, min_dscr, tile_inputs
+
+# Default input distributions, centred on the config's own point estimate.
+# `sd` / `spread` are in the input's units (percentage points or days).
+DEFAULT_DISTRIBUTIONS: Dict[str, Dict[str, Any]] = {
+    "sde_growth_pct": {"dist": "normal", "sd": 3.0},
+    "sba_rate": {"dist": "normal", "sd": 1.0, "low": 0.0},
+    "cogs_pct": {"dist": "normal", "sd": 3.0, "low": 0.0, "high": 100.0},
+    "nwc_days.ar": {"dist": "triangular", "spread": 15.0, "low": 0.0},
+    "nwc_days.ap": {"dist": "triangular", "spread": 10.0, "low": 0.0},
+    "nwc_days.inv": {"dist": "triangular", "spread": 10.0, "low": 0.0},
+}
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+def _draw(rng: np.random.Generator, spec: Dict[str, Any], center: float, n: int) -> np.ndarray:
+    """Draw n samples for one input; `mean`/`mode` default to the config value."""
+    kind = spec.get("dist", "normal")
+    if kind == "normal":
+        out = rng.normal(spec.get("mean", center), spec.get("sd", 0.0), n)
+    elif kind == "uniform":
+        out = rng.uniform(spec["low"], spec["high"], n)
+    elif kind == "triangular":
+        mode = spec.get("mode", center)
+        spread = spec.get("spread", 0.0)
+        lo, hi = spec.get("left", mode - spread), spec.get("right", mode + spread)
+        out = rng.triangular(lo, mode, hi, n) if hi > lo else np.full(n, float(mode))
+    elif kind == "fixed":
+        out = np.full(n, float(spec.get("value", center)))
+    else:
+        raise ValueError(f"Unknown distribution '{kind}'")
+    return np.clip(out, spec.get("low", -np.inf), spec.get("high", np.inf))
+
+
+@dataclass
+class Histogram:
+    """Fixed-bin streaming histogram; mergeable, so memory is independent of path count."""
+    lo: float
+    hi: float
+    bins: int = 1000
+    counts: np.ndarray = field(default=None)  # type: ignore[assignment]
+    underflow: int = 0
+    overflow: int = 0
+    n: int = 0
+    total: float = 0.0
+    min_seen: float = np.inf
+    max_seen: float = -np.inf
+
+    def __post_init__(self):
+        if self.hi <= self.lo:
+            self.hi = self.lo + 1.0
+        if self.counts is None:
+            self.counts = np.zeros(self.bins, np.int64)
+
+    def add(self, values: np.ndarray) -> None:
+        v = np.asarray(values, float).ravel()
+        v = v[np.isfinite(v)]
+        if not v.size:
+            return
+        self.n += v.size
+        self.total += float(v.sum())
+        self.min_seen = min(self.min_seen, float(v.min()))
+        self.max_seen = max(self.max_seen, float(v.max()))
+        self.underflow += int((v < self.lo).sum())
+        self.overflow += int((v >= self.hi).sum())
+        inside = v[(v >= self.lo) & (v < self.hi)]
+        idx = ((inside - self.lo) / (self.hi - self.lo) * self.bins).astype(np.int64)
+        self.counts += np.bincount(np.minimum(idx, self.bins - 1), minlength=self.bins)
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self.n += other.n
+        self.total += other.total
+        self.min_seen = min(self.min_seen, other.min_seen)
+        self.max_seen = max(self.max_seen, other.max_seen)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else float("nan")
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile, linear within a bin; exact at the tails seen."""
+        if not self.n:
+            return float("nan")
+        target = q * self.n
+        if target <= self.underflow:
+            return self.min_seen
+        cum = self.underflow + np.cumsum(self.counts)
+        i = int(np.searchsorted(cum, target))
+        if i >= self.bins:
+            return self.max_seen
+        before = cum[i] - self.counts[i]
+        frac = (target - before) / self.counts[i] if self.counts[i] else 0.0
+        width = (self.hi - self.lo) / self.bins
+        return float(min(max(self.lo + (i + frac) * width, self.min_seen), self.max_seen))
+
+    def summary(self, quantiles=QUANTILES) -> Dict[str, float]:
+        out = {"mean": self.mean, "min": self.min_seen, "max": self.max_seen}
+        out.update({f"p{round(q * 100):02d}": self.quantile(q) for q in quantiles})
+        return out
+
+
+def _empty_accumulators(ranges: Dict[str, Tuple[float, float]], names: List[str], bins: int) -> Dict[str, Any]:
+    return {
+        "breaches": 0,
+        "min_dscr": Histogram(*ranges["min_dscr"], bins),
+        "cash_floor": Histogram(*ranges["cash_floor"], bins),
+        "dividends": [Histogram(*ranges["dividends"], bins) for _ in names],
+    }
+
+
+def _run_chunk(task: Tuple) -> Dict[str, Any]:
+    """Simulate one chunk of paths and reduce it to histograms (runs in a worker)."""
+    base, dists, seed_seq, size, months, dscr_floor, ranges, bins = task
+    rng = np.random.default_rng(seed_seq)
+    x = tile_inputs(base, size)
+    for key in sorted(dists):
+        x[key] = _draw(rng, dists[key], float(base[key][0]), size)
+    res = evaluate(x, months)
+
+    # Years with no debt service cannot breach
+    lowest = min_dscr(res)
+    m = res["monthly"]
+
+    acc = _empty_accumulators(ranges, base["investor_names"][0], bins)
+    acc["breaches"] = int((lowest < dscr_floor).sum())
+    acc["min_dscr"].add(lowest)
+    acc["cash_floor"].add(m["Cash Balance"].min(axis=1))
+    for i, h in enumerate(acc["dividends"]):
+        h.add(res["dividends"][:, i, :].sum(axis=1))
+    return acc
+
+
+def _chunks(n_paths: int, chunk_size: int) -> Iterator[int]:
+    while n_paths > 0:
+        yield min(chunk_size, n_paths)
+        n_paths -= chunk_size
+
+
+def run_simulation(config: Dict[str, Any], distributions: Optional[Dict[str, Dict[str, Any]]] = None,
+                   paths: int = 100_000, chunk_size: int = 10_000, workers: Optional[int] = None,
+                   seed: int = 0, months: int = 60, dscr_floor: float = 1.25, bins: int = 2000) -> Dict[str, Any]:
+    """Simulate `paths` draws of the deal and summarise risk metrics.
+
+    Each chunk gets its own child of `SeedSequence(seed)` and chunks are
+    merged in order, so results depend only on `seed`, `paths` and
+    `chunk_size` — never on `workers`. `workers=0` runs in-process.
+    """
+    dists = DEFAULT_DISTRIBUTIONS if distributions is None else distributions
+    unknown = set(dists) - set(BATCH_KEYS)
+    if unknown:
+        raise ValueError(f"Cannot simulate {sorted(unknown)}; inputs must be among {BATCH_KEYS}")
+    if months < 12:
+        raise ValueError("Simulation horizon must cover at least one full year")
+
+    base = batch_inputs([config])
+    names = base["investor_names"][0]
+    # Histogram ranges are fixed up front from the deal's scale so chunks merge exactly
+    scale = max(float(base["purchase_price"][0] + base["closing_costs"][0]), 1.0)
+    ranges = {"min_dscr": (-2.0, 5.0), "cash_floor": (-2 * scale, 2 * scale), "dividends": (0.0, 2 * scale)}
+
+    sizes = list(_chunks(paths, chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(base, dists, s, size, months, dscr_floor, ranges, bins) for s, size in zip(seeds, sizes)]
+
+    total = _empty_accumulators(ranges, names, bins)
+
+    def fold(acc: Dict[str, Any]) -> None:
+        total["breaches"] += acc["breaches"]
+        total["min_dscr"].merge(acc["min_dscr"])
+        total["cash_floor"].merge(acc["cash_floor"])
+        for h, other in zip(total["dividends"], acc["dividends"]):
+            h.merge(other)
+
+    if workers == 0 or len(tasks) == 1:
+        for t in tasks:
+            fold(_run_chunk(t))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Bounded in-flight window keeps memory flat however many chunks there are
+            window = 2 * workers
+            pending = [pool.submit(_run_chunk, t) for t in tasks[:window]]
+            nxt = len(pending)
+            while pending:
+                fold(pending.pop(0).result())
+                if nxt < len(tasks):
+                    pending.append(pool.submit(_run_chunk, tasks[nxt]))
+                    nxt += 1
+
+    return {
+        "paths": paths,
+        "seed": seed,
+        "months": months,
+        "dscr_floor": dscr_floor,
+        "dscr_breach_prob": total["breaches"] / paths if paths else float("nan"),
+        "min_dscr": total["min_dscr"].summary(),
+        "cash_floor": total["cash_floor"].summary(),
+        "dividends": {name: h.summary() for name, h in zip(names, total["dividends"])},
+        "histograms": total,
+    }
@@ -0,0 +1,129 @@
+"""Goal-seek: boundary values of one deal input subject to DSCR and cash constraints."""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from engine import BATCH_KEYS, HORIZON_MONTHS, batch_inputs, evaluate, leverage_ratios, min_dscr, repeat_inputs
+from input_formats import iter_config_files
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+@dataclass
+class Constraints:
+    """A deal is feasible when every annual DSCR and every month-end cash balance clear these floors."""
+    min_dscr: float = 1.25
+    min_cash: float = 0.0
+
+
+def feasible(res: Dict[str, Any], constraints: Constraints) -> np.ndarray:
+    """(N,) bool: which evaluated scenarios satisfy the constraints."""
+    # Years without debt service cannot breach the DSCR floor
+    min_cash = res["monthly"]["Cash Balance"].min(axis=1)
+    return (min_dscr(res) >= constraints.min_dscr) & (min_cash >= constraints.min_cash)
+
+
+def solve_pipeline(configs: Sequence[Dict[str, Any]], key: str, lo: ArrayLike, hi: ArrayLike,
+                   maximize: bool = True, constraints: Optional[Constraints] = None,
+                   ties: Optional[Dict[str, ArrayLike]] = None, points: int = 17, tol: float = 1.0,
+                   max_iter: int = 20, months: int = HORIZON_MONTHS) -> Dict[str, Any]:
+    """Find, for every deal at once, the boundary of `key` in [lo, hi] where feasibility flips.
+
+    Each iteration evaluates `points` evenly spaced candidates per deal in a
+    single batched engine call and narrows every bracket to the sub-interval
+    containing the flip, so brackets shrink by (points - 1)x per call.
+    Feasibility is assumed monotone in `key`: with `maximize` the feasible
+    side is below the boundary, otherwise above it.
+
+    `ties` maps other batch keys to ratios that move with `key` (e.g.
+    `{"sba_principal": 0.6}` keeps SBA debt at 60% of the solved value).
+
+    `tol` is in the units of `key`. Returns per-deal `value` (the last
+    feasible point, NaN if none), `status` ("ok", "infeasible" or
+    "bounded" when the whole bracket is feasible) plus `iterations` and
+    `evaluations`.
+    """
+    if key not in BATCH_KEYS:
+        raise ValueError(f"Cannot solve for '{key}'; choose one of {BATCH_KEYS}")
+    if points < 3:
+        raise ValueError("points must be at least 3")
+    constraints = constraints or Constraints()
+    base = batch_inputs(configs)
+    n = len(configs)
+    lo = np.broadcast_to(np.asarray(lo, float), (n,)).copy()
+    hi = np.broadcast_to(np.asarray(hi, float), (n,)).copy()
+    tie_ratios = {k: np.broadcast_to(np.asarray(v, float), (n,)) for k, v in (ties or {}).items()}
+    unknown = set(tie_ratios) - set(BATCH_KEYS)
+    if unknown:
+        raise ValueError(f"Cannot tie {sorted(unknown)}; choose among {BATCH_KEYS}")
+
+    x = repeat_inputs(base, points)
+    frac = np.linspace(0.0, 1.0, points)
+    status = np.full(n, "ok", dtype=object)
+    active = np.ones(n, bool)
+    evaluations = iterations = 0
+
+    while active.any() and iterations < max_iter:
+        iterations += 1
+        pts = lo[:, None] + (hi - lo)[:, None] * frac[None, :]
+        x[key] = pts.ravel()
+        for k, ratio in tie_ratios.items():
+            x[k] = (ratio[:, None] * pts).ravel()
+        ok = feasible(evaluate(x, months), constraints).reshape(n, points)
+        evaluations += n * points
+
+        if iterations == 1:
+            edge_in, edge_out = (ok[:, 0], ok[:, -1]) if maximize else (ok[:, -1], ok[:, 0])
+            status[~edge_in] = "infeasible"
+            status[edge_in & edge_out] = "bounded"
+            active &= edge_in & ~edge_out
+
+        # First crossing from the feasible side
+        flip = np.argmax(~ok, axis=1) if maximize else np.argmax(ok, axis=1)
+        flip = np.clip(flip, 1, points - 1)
+        rows = np.nonzero(active)[0]
+        lo[rows] = pts[rows, flip[rows] - 1]
+        hi[rows] = pts[rows, flip[rows]]
+        active &= (hi - lo) > tol
+
+    value = np.where(status == "infeasible", np.nan, lo if maximize else hi)
+    value = np.where(status == "bounded", hi if maximize else lo, value)
+    return {"key": key, "value": value, "status": status.tolist(),
+            "iterations": iterations, "evaluations": evaluations}
+
+
+def solve_boundary(config: Dict[str, Any], key: str, lo: float, hi: float, **kwargs) -> Dict[str, Any]:
+    """Single-deal `solve_pipeline`; `value` and `status` are scalars."""
+    res = solve_pipeline([config], key, lo, hi, **kwargs)
+    res["value"] = float(res["value"][0])
+    res["status"] = res["status"][0]
+    return res
+
+
+def max_purchase_price(configs: Sequence[Dict[str, Any]], constraints: Optional[Constraints] = None,
+                       hi_multiple: float = 5.0, **kwargs) -> Dict[str, Any]:
+    """Highest purchase price per deal, holding each deal's SBA and seller leverage ratios."""
+    base = batch_inputs(configs)
+    hi = np.maximum(base["purchase_price"], 1.0) * hi_multiple
+    return solve_pipeline(configs, "purchase_price", 0.0, hi, True, constraints, leverage_ratios(base), **kwargs)
+
+
+def min_equity(configs: Sequence[Dict[str, Any]], constraints: Optional[Constraints] = None,
+               **kwargs) -> Dict[str, Any]:
+    """Smallest equity cheque per deal: the most SBA debt the constraints allow.
+
+    Equity required is total uses less seller note and the solved SBA principal.
+    """
+    base = batch_inputs(configs)
+    uses = base["purchase_price"] + base["closing_costs"] + base["wc_months"] * base["wc_monthly_opex"]
+    cap = np.maximum(uses - base["seller_principal"], 0.0)
+    res = solve_pipeline(configs, "sba_principal", 0.0, cap, True, constraints, **kwargs)
+    res["equity_required"] = uses - base["seller_principal"] - res["value"]
+    return res
+
+
+def load_pipeline(path: str) -> List[Dict[str, Any]]:
+    """Read deal configs from a JSON list or JSONL file; `{"config": ...}` envelopes are unwrapped."""
+    return [cfg for _, cfg in iter_config_files([path])]
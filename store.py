@@ -0,0 +1,121 @@
+"""Process-wide content-addressed store for scenarios and stage outputs.
+
+Configs are frozen into immutable nodes interned by content hash, so
+identical sub-configs (loan terms, investor lists, follow-ons) are one
+shared object however many sessions or saved scenarios use them. A
+session keeps a `Ref` (the key plus the shared frozen config) and a
+`ComputeSession(store=STORE)`, whose stage outputs live here too. The
+store evicts least recently used entries past its byte budget
+(TREEHOUSE_STORE_BYTES, default 64 MB); a value evicted while a `Ref`
+still points at it stays alive for that session and is simply no longer
+shared with new arrivals.
+
+    ref = put_config(cfg)        # in st.session_state
+    cfg = ref.get()              # a mutable copy to edit
+"""
+from __future__ import annotations
+import hashlib
+import os
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+from cache import ResultCache, normalize
+
+
+class FrozenDict(dict):
+    """A dict that refuses mutation; still a dict for `json`, `normalize` and the engine."""
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("stored configs are read-only; edit `Ref.get()` instead")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _readonly  # type: ignore[assignment]
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "FrozenDict":
+        return self
+
+
+def _leaf_digest(value: Any) -> str:
+    return repr(normalize(value))
+
+
+class ContentStore(ResultCache):
+    """ResultCache whose keys are content hashes, with `intern` for nested configs."""
+
+    def intern(self, value: Any) -> Tuple[Any, str]:
+        """(shared frozen copy, content key) of a JSON-like value.
+
+        Containers are hashed from their children's keys (a Merkle tree), so
+        each node is serialized once; equal numbers hash the same (3 == 3.0).
+        """
+        if isinstance(value, dict):
+            items = sorted((str(k), self.intern(v)) for k, v in value.items())
+            key = "node:" + _hash("{" + ",".join(f"{k!r}:{d}" for k, (_, d) in items) + "}")
+            build = lambda: FrozenDict((k, v) for k, (v, _) in items)
+        elif isinstance(value, (list, tuple)):
+            parts = [self.intern(v) for v in value]
+            key = "node:" + _hash("[" + ",".join(d for _, d in parts) + "]")
+            build = lambda: tuple(v for v, _ in parts)
+        else:
+            return value, _leaf_digest(value)
+        hit = self.get(key)
+        if hit is not None:
+            return hit, key
+        node = build()
+        self.put(key, node, _node_size(node))
+        return node, key
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _node_size(node: Any) -> int:
+    """Bytes this node adds: the container plus its scalar leaves (child nodes are counted separately)."""
+    children = node.values() if isinstance(node, dict) else node
+    keys = sum(sys.getsizeof(k) for k in node) if isinstance(node, dict) else 0
+    return sys.getsizeof(node) + keys + sum(sys.getsizeof(v) for v in children
+                                            if not isinstance(v, (dict, tuple)))
+
+
+def thaw(value: Any) -> Any:
+    """Plain mutable deep copy of a frozen value."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+
+class Ref:
+    """What a session keeps: the content key and the shared frozen config."""
+
+    __slots__ = ("key", "value")
+
+    def __init__(self, key: str, value: Any):
+        self.key, self.value = key, value
+
+    def get(self) -> Dict[str, Any]:
+        return thaw(self.value)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Ref) and other.key == self.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+
+STORE = ContentStore(
+    max_entries=int(os.getenv("TREEHOUSE_STORE_ENTRIES", "100000")),
+    max_bytes=int(os.getenv("TREEHOUSE_STORE_BYTES", str(64 * 1024 * 1024))),
+)
+
+
+def put_config(config: Dict[str, Any], store: Optional[ContentStore] = None) -> Ref:
+    value, key = (store or STORE).intern(config)
+    return Ref(key, value)
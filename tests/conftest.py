@@ -0,0 +1,15 @@
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def sample():
+    with open(os.path.join(ROOT, "sample_scenario.json"), encoding="utf-8") as fh:
+        return copy.deepcopy(json.load(fh))
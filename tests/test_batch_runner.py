@@ -0,0 +1,21 @@
+import sys
+
+import pytest
+
+from batch_runner import TableWriter, main, run
+
+
+def test_parquet_without_pyarrow_raises_import_error(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match="pip install pyarrow"):
+        TableWriter(str(tmp_path / "out.parquet"))
+
+
+def test_sheets_need_a_base(tmp_path):
+    sheet = tmp_path / "deals.csv"
+    sheet.write_text("Ask\n1000000\n")
+    with pytest.raises(ValueError, match="base config"):
+        run([str(sheet)], str(tmp_path / "summary.csv"), None, log=None)
+    with pytest.raises(SystemExit) as exc:
+        main([str(sheet), "--summary", str(tmp_path / "summary.csv")])
+    assert exc.value.code == 2
@@ -0,0 +1,34 @@
+from cache import ResultCache, config_key
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResultCache(max_entries=3, max_bytes=100)
+    for k in "abc":
+        cache.put(k, k.upper(), size=10)
+    assert cache.get("a") == "A"  # a is now most recent
+    cache.put("d", "D", size=10)
+    assert cache.get("b") is None
+    assert [cache.get(k) for k in "acd"] == ["A", "C", "D"]
+    cache.put("big", "X", size=95)
+    assert len(cache) == 1 and cache.get("big") == "X"
+    cache.put("huge", "Y", size=101)
+    assert cache.get("huge") is None and cache.get("big") == "X"
+    stats = cache.stats()
+    assert (stats["evictions"], stats["entries"], stats["bytes"]) == (4, 1, 95)
+
+
+def test_hit_and_miss_counts(sample):
+    cache = ResultCache()
+    calls = []
+
+    def fn(cfg):
+        calls.append(cfg)
+        return len(calls)
+
+    first = cache.get_or_compute(sample, fn)
+    again = cache.get_or_compute(dict(sample, purchase_price=int(sample["purchase_price"])), fn)
+    other = cache.get_or_compute(dict(sample, retain_pct=sample["retain_pct"] + 1), fn)
+    assert (first, again, other) == (1, 1, 2)
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert config_key(sample) != config_key(dict(sample, retain_pct=sample["retain_pct"] + 1))
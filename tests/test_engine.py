@@ -0,0 +1,132 @@
+import random
+
+import numpy as np
+
+from engine import DebtEvent, LoanSchedule, amortize, amortize_events, batch_inputs, compute_batch, compute_result
+from engine import evaluate, event_array, pmt
+from engine import _batch_result
+
+
+def reference_schedule(principal, rate_pct, term, io, standby, accrue, events, months):
+    """Month-by-month loop over a loan and its debt events: (payments, end balances)."""
+    bal, r = principal, rate_pct / 1200
+    s_left, io_left, n_left = standby, io, max(0, term - io - standby)
+    pay = None
+    by_month = {}
+    for e in sorted(events, key=lambda e: e.month):
+        by_month.setdefault(e.month, []).append(e)
+
+    def apply(month):
+        nonlocal bal, r, s_left, io_left, n_left, pay
+        for e in by_month.get(month, []):
+            if s_left + io_left + n_left == 0:
+                continue
+            bal = round(bal, 2)
+            if e.kind == "refinance":
+                r, s_left, io_left, n_left = e.rate_pct / 1200, 0, e.io_months, max(e.term_months - e.io_months, 0)
+            elif e.kind == "prepay":
+                bal = max(bal - e.amount, 0.0)
+            elif e.kind == "rate_reset":
+                r = e.rate_pct / 1200
+            else:
+                s_left += e.months
+            if bal <= 0:
+                s_left = io_left = n_left = 0
+            pay = None
+
+    payments, ends = [], []
+    apply(0)
+    for t in range(months):
+        active = bool(s_left or io_left or n_left)
+        if s_left:
+            payment, bal = 0.0, bal * (1 + r) if accrue else bal
+            s_left -= 1
+        elif io_left:
+            payment = bal * r
+            io_left -= 1
+        elif n_left:
+            if pay is None:
+                pay = pmt(r, n_left, bal)
+            interest = bal * r
+            principal_paid = min(pay - interest, bal)
+            payment, bal = interest + principal_paid, bal - principal_paid
+            n_left -= 1
+        else:
+            payment = 0.0
+        payments.append(payment)
+        ends.append(bal if active else 0.0)
+        apply(t + 1)
+    return np.array(payments), np.array(ends)
+
+
+def random_loans(n, seed=7):
+    rng = random.Random(seed)
+    loans = []
+    for _ in range(n):
+        events = [DebtEvent(rng.randint(0, 59), rng.choice(["refinance", "prepay", "rate_reset", "standby"]),
+                            rate_pct=rng.choice([0, 5, 7.5, 9]), term_months=rng.choice([24, 60, 120]),
+                            io_months=rng.choice([0, 0, 6]), amount=rng.choice([1e4, 1e5, 5e6]),
+                            months=rng.choice([1, 3, 6]))
+                  for _ in range(rng.randint(0, 4))]
+        loans.append((rng.choice([0, 1e5, 1.8e6]), rng.choice([0, 6, 10]), rng.choice([12, 60, 120]),
+                      rng.choice([0, 0, 6, 12]), rng.choice([0, 0, 12, 24]), rng.random() < 0.5, events))
+    return loans
+
+
+def test_event_engine_matches_month_loop():
+    loans = random_loans(203)
+    P, R, T, IO, S, A, E = (np.array(v) if k < 6 else v for k, v in enumerate(zip(*loans)))
+    out = amortize_events(P, R, T, IO, S, A, event_array(E), 60)
+    for i, loan in enumerate(loans):
+        payments, ends = reference_schedule(*loan, 60)
+        np.testing.assert_allclose(out["payment"][i], payments, rtol=1e-9, atol=1e-6)
+        np.testing.assert_allclose(out["end_balance"][i], ends, rtol=1e-9, atol=1e-6)
+        single = LoanSchedule("x", *loan[:6], events=tuple(loan[6])).build_columns(60)
+        assert np.array_equal(single.payment, out["payment"][i, :len(single)])
+
+
+def test_duplicate_investor_names_credit_follow_on_once(sample):
+    sample["investors"][2]["name"] = "Angel 1"
+    single = compute_result(sample)
+    batch = _batch_result(batch_inputs([sample]), evaluate(batch_inputs([sample])), 0)
+    contributed = single.investors[1]
+    assert contributed.tolist() == [470000.0, 200000.0, 105000.0]
+    assert np.array_equal(contributed, batch.investors[1])
+
+
+def test_negative_fcfe_draws_down_cash(sample):
+    from solver import Constraints, feasible
+
+    sample["sba_principal"] = 4_000_000.0
+    res = evaluate(batch_inputs([sample]))
+    fcfe = res["monthly"]["FCFE"][0]
+    cash = res["monthly"]["Cash Balance"][0]
+    wc_buf = res["working_cap_buffer"][0]
+    assert (fcfe < 0).any()
+    assert cash.min() < wc_buf
+    expected = wc_buf + np.cumsum(fcfe - res["monthly"]["Distributable"][0] + res["monthly"]["Follow-on Inflow"][0])
+    assert np.allclose(cash, expected)
+    assert np.array_equal(compute_result(sample).monthly_frame()["Cash Balance"].to_numpy(), cash)
+    assert not feasible(res, Constraints(min_dscr=0.0, min_cash=wc_buf))[0]
+    cents = compute_result(sample, money="cents").monthly_frame()["Cash Balance"].to_numpy()
+    assert np.abs(cents - cash).max() < 1.0
+
+
+def test_empty_batch():
+    for money in ("float", "cents"):
+        res = compute_batch([], months=24, money=money)
+        assert res["n"] == 0
+        assert res["monthly"]["Cash Balance"].shape == (0, 24)
+        assert res["dividends"].shape[0] == 0
+    assert amortize([], 6.0, 120)["payment"].shape == (0, 60)
+
+
+def test_follow_on_credit_follows_the_horizon(sample):
+    sample["follow_on"].append({"name": "Sponsor", "year": 7, "month": 1, "amount": 99_999.0})
+    for months in (24, 60, 120):
+        for money in ("float", "cents"):
+            res = compute_batch([sample], months=months, money=money)
+            contributed = res["investors"]["contributed"][0]
+            inflow = res["monthly"]["Follow-on Inflow"][0].sum()
+            assert contributed.sum() - 700_000 == inflow, (months, money)
+    assert list(compute_batch([sample], months=120)["investors"]["contributed"][0]) == [569_999, 200_000, 105_000]
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from importer import chunk_inputs, map_columns, parse_chunk
+
+
+def test_negative_amounts_are_cell_errors(sample):
+    df = pd.DataFrame({"Asking Price": ["$3.2M", "(100)", "-450K", "1,000,000"],
+                       "SDE": ["900K", "850K", "800K", "-5"],
+                       "Normalized Adj": ["(10,000)", "", "", ""],
+                       "AR Days": ["30", "-2", "", ""]})
+    chunk = parse_chunk(df, map_columns(df.columns, {"Normalized Adj": "normalized_adj"}), 2, "sheet.csv")
+    assert chunk.valid.tolist() == [True, False, False, False]
+    assert {(e.row, e.field) for e in chunk.errors} == {
+        (3, "purchase_price"), (3, "nwc_days.ar"), (4, "purchase_price"), (5, "hist_sde")}
+    assert all(e.message == "must not be negative" for e in chunk.errors)
+    assert chunk.values["normalized_adj"][0] == -10000.0
+
+    x = chunk_inputs(chunk, sample)
+    assert len(x["purchase_price"]) == 1
+    assert (x["sba_principal"] >= 0).all() and (x["purchase_price"] >= 0).all()
+    assert np.isclose(x["purchase_price"][0], 3.2e6)
+
+
+def test_chunk_inputs_hold_leverage(sample):
+    df = pd.DataFrame({"Asking Price": ["1,500,000", "6,000,000"], "Seller Note": ["", "400,000"]})
+    chunk = parse_chunk(df, map_columns(df.columns, {"Seller Note": "seller_principal"}), 2, "sheet.csv")
+    x = chunk_inputs(chunk, sample)
+    ratio = sample["sba_principal"] / sample["purchase_price"]
+    np.testing.assert_allclose(x["sba_principal"], [1.5e6 * ratio, 6e6 * ratio])
+    assert x["seller_principal"].tolist() == [sample["seller_principal"], 400_000.0]
+
+    x = chunk_inputs(chunk, dict(sample, purchase_price=0.0))
+    assert np.isfinite(x["sba_principal"]).all()
@@ -0,0 +1,18 @@
+import io
+
+import pytest
+
+from input_formats import iter_configs
+
+
+def test_iter_configs_array_and_envelopes():
+    text = '[{"a": 1}, {"config": {"b": 2}}]\n{"c": 3}'
+    assert list(iter_configs(io.StringIO(text), chunk_size=4)) == [{"a": 1}, {"b": 2}, {"c": 3}]
+
+
+def test_iter_configs_rejects_non_object_elements():
+    stream = io.StringIO('[{"a": 1}, "x", 3]')
+    configs = iter_configs(stream)
+    assert next(configs) == {"a": 1}
+    with pytest.raises(ValueError, match="Config #1 is a JSON str"):
+        next(configs)
@@ -0,0 +1,48 @@
+import copy
+
+import pytest
+
+from library import ScenarioLibrary
+
+
+@pytest.fixture
+def library(sample):
+    lib = ScenarioLibrary(":memory:")
+    all_cash = dict(copy.deepcopy(sample), sba_principal=0.0, seller_principal=0.0)
+    deals = [(f"deal {k:02d}", dict(copy.deepcopy(sample), purchase_price=1_000_000.0 + 50_000 * k,
+                                    sba_principal=sample["sba_principal"] + 10_000 * k)) for k in range(12)]
+    lib.save_many(deals + [("all cash", all_cash)])
+    yield lib
+    lib.close()
+
+
+def test_no_debt_deals_pass_dscr_floors(library):
+    assert library.list(filters={"min_dscr": (None, None)}, page_size=100)[0]["name"] == "all cash"
+    cash = [r for r in library.list(page_size=100) if r["name"] == "all cash"][0]
+    assert cash["min_dscr"] is None
+    floor = sorted(r["min_dscr"] for r in library.list(page_size=100) if r["min_dscr"] is not None)[5]
+    passing = library.list(filters={"min_dscr": (floor, None)}, page_size=100)
+    assert "all cash" in [r["name"] for r in passing]
+    assert all(r["min_dscr"] is None or r["min_dscr"] >= floor for r in passing)
+    assert library.count({"min_dscr": (floor, None)}) == len(passing) == 8
+    assert "all cash" not in [r["name"] for r in library.list(filters={"min_dscr": (None, 100.0)}, page_size=100)]
+
+
+def test_sort_treats_missing_dscr_as_highest(library):
+    up = [r["name"] for r in library.list(order_by="min_dscr", page_size=100)]
+    down = [r["name"] for r in library.list(order_by="min_dscr", descending=True, page_size=100)]
+    assert up[-1] == "all cash" and down[0] == "all cash"
+    prices = [r["purchase_price"] for r in library.list(order_by="purchase_price", descending=True, page_size=100)]
+    assert prices == sorted(prices, reverse=True)
+    with pytest.raises(ValueError):
+        library.list(order_by="config")
+
+
+def test_pages_and_name_search(library):
+    pages = [library.list(page=p, page_size=5) for p in range(4)]
+    assert [len(p) for p in pages] == [5, 5, 3, 0]
+    names = [r["name"] for p in pages for r in p]
+    assert names == sorted(names) and len(set(names)) == 13
+    assert library.count(name_like="deal 1") == 2
+    assert library.count(name_like="_") == 0
+    assert [n for n, _ in library.iter_configs(name_like="deal", chunk_size=4)] == [f"deal {k:02d}" for k in range(12)]
@@ -0,0 +1,15 @@
+import warnings
+
+import numpy as np
+
+from portfolio import irr, solve_rate
+
+
+def test_solve_rate_is_quiet_on_degenerate_rows():
+    flows = np.array([[-100.0, 0.0, 0.0], [0.0, 0.0, 0.0], [-100.0, 60.0, 60.0]])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        rates = solve_rate(flows, np.array([0.0, 1.0, 2.0]))
+    assert np.isnan(rates[:2]).all()
+    assert abs(rates[2] - irr(flows[2:], periods_per_year=1)[0]) < 1e-9
+    assert abs(-100 + 60 / (1 + rates[2]) + 60 / (1 + rates[2]) ** 2) < 1e-8
@@ -0,0 +1,19 @@
+import io
+import sys
+
+import pytest
+
+from engine import compute, compute_result
+from results import DealResult
+
+
+def test_npz_round_trip_and_legacy(sample):
+    result = compute_result(sample)
+    assert DealResult.from_npz(io.BytesIO(result.to_npz_bytes())) == result
+    assert result.legacy() == compute(sample)
+
+
+def test_arrow_without_pyarrow_raises_import_error(sample, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match="pip install pyarrow"):
+        compute_result(sample).to_arrow()
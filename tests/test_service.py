@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+import signal
+import threading
+import time
+
+import service as service_module
+from service import ComputeService
+
+
+async def _post(port, path, body, headers=False):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    raw = body if isinstance(body, bytes) else json.dumps(body).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(raw)}\r\nConnection: close\r\n\r\n".encode() + raw)
+    data = await reader.read()
+    writer.close()
+    head, _, payload = data.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    if headers:
+        return status, payload, dict(line.split(": ", 1) for line in head.decode().split("\r\n")[1:])
+    return status, payload
+
+
+def _serve(fn, workers=0, **kwargs):
+    async def main():
+        service = ComputeService(port=0, workers=workers, **kwargs)
+        port = await service.start()
+        try:
+            return await fn(service, port)
+        finally:
+            await service.stop()
+    return asyncio.run(main())
+
+
+def test_malformed_requests_get_400(sample):
+    bad_investor = dict(sample, investors=[{"name": "A", "pct": "lots", "contribution": 1}])
+
+    async def run(service, port):
+        return [await _post(port, path, body) for path, body in [
+            ("/compute_batch", {}),
+            ("/compute_batch", {"configs": ["x"]}),
+            ("/compute_batch", {"base": sample, "sweep": {"retain_pct": 5}}),
+            ("/compute_batch", {"configs": [sample], "months": "sixty"}),
+            ("/compute", {"config": 3}),
+            ("/compute", bad_investor),
+            ("/compute_batch", {"configs": [bad_investor]}),
+        ]] + [await _post(port, "/compute", sample)]
+
+    results = _serve(run)
+    assert [status for status, _ in results] == [400] * 7 + [200]
+    assert all("error" in json.loads(payload) for _, payload in results[:-1])
+
+
+def test_broken_process_pool_is_replaced(sample):
+    async def run(service, port):
+        assert (await _post(port, "/compute", sample))[0] == 200
+        for pid in list(service._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        time.sleep(0.5)
+        first = await _post(port, "/compute", dict(sample, retain_pct=20.0))
+        second = await _post(port, "/compute", dict(sample, retain_pct=30.0))
+        return first[0], second[0], service.metrics.pool_restarts
+
+    assert _serve(run, workers=1) == (200, 200, 1)
+
+
+def test_empty_batch():
+    async def run(service, port):
+        return await _post(port, "/compute_batch", {"configs": []})
+
+    status, payload = _serve(run)
+    assert status == 200
+    assert json.loads(payload)["n"] == 0
+
+
+def _gated_job(monkeypatch):
+    """Swap /compute for a job that blocks until the returned gate is set; `calls` counts runs."""
+    gate, calls = threading.Event(), []
+
+    def job(cfg):
+        calls.append(cfg)
+        gate.wait(10)
+        return json.dumps({"retain_pct": cfg["retain_pct"]}).encode(), service_module.JSON
+
+    monkeypatch.setitem(service_module.ROUTES, "/compute", (job, True))
+    return gate, calls
+
+
+async def _until(cond):
+    for _ in range(500):
+        if cond():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+def test_identical_requests_coalesce(sample, monkeypatch):
+    gate, calls = _gated_job(monkeypatch)
+
+    async def run(service, port):
+        posts = [asyncio.create_task(_post(port, "/compute", sample)) for _ in range(8)]
+        await _until(lambda: service.metrics.requests == 8 and calls)
+        gate.set()
+        return await asyncio.gather(*posts), service.metrics.coalesced
+
+    results, coalesced = _serve(run)
+    assert [status for status, _ in results] == [200] * 8
+    assert len({payload for _, payload in results}) == 1
+    assert len(calls) == 1 and coalesced == 7
+
+
+def test_full_queue_sheds_load(sample, monkeypatch):
+    gate, calls = _gated_job(monkeypatch)
+
+    async def run(service, port):
+        first = asyncio.create_task(_post(port, "/compute", dict(sample, retain_pct=0.0)))
+        await _until(lambda: calls)  # running, so the queue is empty
+        queued = [asyncio.create_task(_post(port, "/compute", dict(sample, retain_pct=float(k)), headers=True))
+                  for k in range(1, 5)]
+        await _until(lambda: service.metrics.rejected == 2)
+        gate.set()
+        return [await first] + await asyncio.gather(*queued), service.metrics.snapshot(0, 0)["rejected"]
+
+    results, rejected = _serve(run, queue_size=2)
+    statuses = sorted(r[0] for r in results)
+    assert statuses == [200, 200, 200, 503, 503] and rejected == 2
+    shed = [r for r in results if r[0] == 503]
+    assert all(r[2]["Retry-After"] == "1" and json.loads(r[1])["error"] == "queue full" for r in shed)
+    assert len(calls) == 3
@@ -0,0 +1,21 @@
+import numpy as np
+
+from simulate import run_simulation
+
+
+def _comparable(out):
+    hist = out.pop("histograms")
+    return out, [hist["min_dscr"].counts, hist["cash_floor"].counts] + [h.counts for h in hist["dividends"]]
+
+
+def test_results_do_not_depend_on_workers(sample):
+    runs = [_comparable(run_simulation(sample, paths=3_000, chunk_size=700, workers=w, seed=42, bins=200))
+            for w in (0, 1, 3)]
+    (summary, counts), rest = runs[0], runs[1:]
+    for other_summary, other_counts in rest:
+        assert repr(other_summary) == repr(summary)
+        for a, b in zip(counts, other_counts):
+            np.testing.assert_array_equal(a, b)
+    assert counts[0].sum() > 0
+    different = _comparable(run_simulation(sample, paths=3_000, chunk_size=700, workers=0, seed=43, bins=200))
+    assert repr(different[0]) != repr(summary)
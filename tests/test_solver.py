@@ -0,0 +1,17 @@
+import numpy as np
+
+from engine import compute_batch, min_dscr
+from solver import Constraints, feasible, solve_pipeline
+
+
+def test_min_dscr_without_year_columns(sample):
+    res = compute_batch([sample], months=6)
+    assert res["years"]["DSCR"].shape == (1, 0)
+    assert min_dscr(res).tolist() == [np.inf]
+    assert feasible(res, Constraints()).tolist() == [True]
+
+
+def test_short_horizon_solve(sample):
+    out = solve_pipeline([sample], "purchase_price", 500_000, 3_000_000, months=6)
+    assert out["status"] == ["bounded"]
+    assert out["value"].tolist() == [3_000_000]
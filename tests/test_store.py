@@ -0,0 +1,47 @@
+import copy
+import json
+import pickle
+
+import pytest
+
+from engine import ComputeSession, compute
+from store import ContentStore, FrozenDict, put_config
+
+
+def test_interning_shares_equal_subtrees(sample):
+    store = ContentStore()
+    a = put_config(sample, store)
+    other = copy.deepcopy(sample)
+    other["retain_pct"] = sample["retain_pct"] + 5
+    b = put_config(other, store)
+    same = put_config(json.loads(json.dumps(sample)), store)
+    assert same == a and same.value is a.value and a != b
+    # Only the changed leaf's parent differs; everything else is the same object
+    assert b.value["investors"] is a.value["investors"]
+    assert b.value["follow_on"][0] is a.value["follow_on"][0]
+    before = len(store)
+    put_config(dict(sample, purchase_price=int(sample["purchase_price"])), store)
+    assert len(store) == before  # 3 and 3.0 are the same content
+
+
+def test_frozen_configs_are_read_only(sample):
+    ref = put_config(sample, ContentStore())
+    assert isinstance(ref.value, FrozenDict)
+    with pytest.raises(TypeError):
+        ref.value["retain_pct"] = 0
+    with pytest.raises(TypeError):
+        ref.value.update(retain_pct=0)
+    assert copy.deepcopy(ref.value) is ref.value
+    assert pickle.loads(pickle.dumps(ref.value)) == ref.value
+    edited = ref.get()
+    edited["investors"][0]["pct"] = 1.0
+    assert ref.value["investors"][0]["pct"] == sample["investors"][0]["pct"]
+    assert compute(ref.value) == compute(sample)
+
+
+def test_sessions_share_stage_outputs(sample):
+    store = ContentStore()
+    first, second = ComputeSession(store), ComputeSession(store)
+    first.compute(put_config(sample, store).value)
+    second.compute(put_config(dict(sample, retain_pct=sample["retain_pct"] + 5), store).value)
+    assert "sba_schedule" in second.reused and "sba_schedule" in first.recomputed
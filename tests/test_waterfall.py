@@ -0,0 +1,150 @@
+import copy
+import random
+
+import numpy as np
+
+from cache import ResultCache
+from engine import HORIZON_MONTHS, ComputeSession, batch_inputs, compute_result, evaluate
+from engine import _batch_result
+from waterfall import TIER_KINDS, Tier, allocate, allocate_cents, tier_array, tier_flows
+
+
+def reference_flows(distributable, capital_in, tiers):
+    """Scalar month-by-month waterfall for one scenario: [capital, lp, gp, residual] per month."""
+    unreturned = lp_profit = gp_profit = 0.0
+    accrued = [0.0] * len(tiers)
+    out = []
+    for dist, paid_in in zip(distributable, capital_in):
+        for k, t in enumerate(tiers):
+            if t.kind == "pref":
+                accrued[k] += unreturned * t.rate_pct / 1200
+        unreturned += paid_in
+        cash, row = max(dist, 0.0), [0.0, 0.0, 0.0, 0.0]
+        for k, t in enumerate(tiers):
+            g = t.gp_pct / 100
+            if t.kind == "return_of_capital":
+                pay = min(cash, unreturned)
+                unreturned -= pay
+                row[0] += pay
+            elif t.kind == "pref":
+                pay = min(cash, accrued[k])
+                accrued[k] -= pay
+                lp_profit += pay
+                row[0] += pay
+            else:
+                pay = cash
+                if t.kind == "catch_up":
+                    # largest pay keeping the GP at or below target of pref + catch-up profits
+                    def over(x):
+                        gp_new = gp_profit + g * x
+                        return gp_new > t.target_pct / 100 * (lp_profit + x + gp_profit) + 1e-9
+                    if over(cash):
+                        lo, hi = 0.0, cash
+                        for _ in range(200):
+                            mid = (lo + hi) / 2
+                            lo, hi = (lo, mid) if over(mid) else (mid, hi)
+                        pay = lo
+                    lp_profit += pay * (1 - g)
+                    gp_profit += pay * g
+                row[1] += pay * (1 - g)
+                row[2] += pay * g
+            cash -= pay
+        row[3] = cash + min(dist, 0.0)
+        out.append(row)
+    return np.array(out).T
+
+
+def random_tiers(rng):
+    tiers = []
+    for _ in range(rng.randint(0, 5)):
+        kind = rng.choice(TIER_KINDS)
+        tiers.append(Tier(kind, rate_pct=rng.choice([0.0, 6.0, 8.0, 12.0]),
+                          gp_pct=rng.choice([0.0, 20.0, 50.0, 80.0, 100.0]),
+                          target_pct=rng.choice([0.0, 20.0, 30.0, 90.0])))
+    return tiers
+
+
+def test_tier_flows_match_brute_force():
+    rng = random.Random(7)
+    months = 36
+    tier_lists, dists, ins = [], [], []
+    for _ in range(300):
+        tier_lists.append(random_tiers(rng))
+        dists.append([rng.choice([0.0, -1_000.0, rng.uniform(0, 50_000)]) for _ in range(months)])
+        paid_in = [0.0] * months
+        paid_in[0] = rng.uniform(100_000, 1_000_000)
+        paid_in[rng.randrange(months)] += rng.choice([0.0, 50_000.0])
+        ins.append(paid_in)
+    flows = tier_flows(np.array(dists), np.array(ins), tier_array(tier_lists))
+    for n, tiers in enumerate(tier_lists):
+        np.testing.assert_allclose(flows[n], reference_flows(dists[n], ins[n], tiers), atol=1e-4, err_msg=str(tiers))
+
+
+def test_dividends_tie_out_to_distributable():
+    rng = np.random.default_rng(3)
+    n, investors, months = 200, 4, 24
+    pct = rng.dirichlet(np.ones(investors), size=n) * 100
+    capital = rng.uniform(0, 500_000, size=(n, investors))
+    gp = np.zeros((n, investors), bool)
+    gp[: n // 2, 0] = True
+    distributable = rng.uniform(-5_000, 60_000, size=(n, months))
+    capital_in = np.zeros((n, months))
+    capital_in[:, 0] = capital.sum(axis=1)
+    r = random.Random(5)
+    tiers = tier_array([random_tiers(r) for _ in range(n)])
+    paid = allocate(distributable, pct, capital, gp, capital_in, tiers)
+    np.testing.assert_allclose(paid.sum(axis=1), distributable, atol=1e-6)
+
+
+def cents_variants(sample, n=24):
+    rng = random.Random(11)
+    configs = []
+    for k in range(n):
+        cfg = copy.deepcopy(sample)
+        cfg["purchase_price"] = round(cfg["purchase_price"] * rng.uniform(0.8, 1.2), 2)
+        pcts = [33.33, 33.33, 33.34] if k % 3 else [7.0, 29.0, 64.0]
+        for inv, pct in zip(cfg["investors"], pcts):
+            inv["pct"] = pct
+        if k % 2:
+            cfg["investors"][0]["class"] = "gp"
+            cfg["waterfall"] = [{"kind": "return_of_capital"}, {"kind": "pref", "rate_pct": 8},
+                                {"kind": "catch_up", "gp_pct": 100, "target_pct": 20}, {"kind": "split", "gp_pct": 20}]
+        configs.append(cfg)
+    return configs
+
+
+def test_cents_results_do_not_depend_on_the_batch(sample):
+    configs = cents_variants(sample)
+    singles = [compute_result(cfg, "cents").legacy() for cfg in configs]
+    session, cache = ComputeSession(), ResultCache()
+    for cfg, single in zip(configs, singles):
+        assert session.compute(cfg, "cents") == single
+        assert cache.get_or_compute(cfg, lambda c: compute_result(c, "cents")).legacy() == single
+    for chunk in (1, 5, len(configs)):
+        for start in range(0, len(configs), chunk):
+            x = batch_inputs(configs[start:start + chunk])
+            res = evaluate(x, HORIZON_MONTHS, "cents")
+            for i in range(len(configs[start:start + chunk])):
+                assert _batch_result(x, res, i).legacy() == singles[start + i], (chunk, start + i)
+
+
+def test_allocate_cents_rows_match_alone_and_in_a_mixed_batch():
+    rng = np.random.default_rng(13)
+    n, investors, months = 400, 3, 12
+    pct = np.round(rng.dirichlet(np.ones(investors), size=n) * 100, 2)
+    pct[:, -1] = 100 - pct[:, :-1].sum(axis=1)
+    capital = rng.uniform(1_000, 500_000, size=(n, investors))
+    gp = np.zeros((n, investors), bool)
+    gp[:, 0] = True
+    distributable = rng.integers(-500_000, 5_000_000, size=(n, months))
+    capital_in = np.zeros((n, months))
+    capital_in[:, 0] = capital.sum(axis=1)
+    tiers = tier_array([[Tier("pref", rate_pct=8.0), Tier("split", gp_pct=20.0)] if k % 2 else []
+                        for k in range(n)])
+    mixed = allocate_cents(distributable, pct, capital, gp, capital_in, tiers)
+    for k in range(n):
+        row = slice(k, k + 1)
+        alone = allocate_cents(distributable[row], pct[row], capital[row], gp[row], capital_in[row],
+                               tier_array([[Tier("pref", rate_pct=8.0), Tier("split", gp_pct=20.0)]] if k % 2 else [[]]))
+        np.testing.assert_array_equal(mixed[k], alone[0], err_msg=f"row {k}")
+    np.testing.assert_array_equal(mixed.sum(axis=1), distributable)
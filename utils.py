@@ -1,38 +1,241 @@
 # utils.py
 import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
 import pandas as pd
-from typing import Dict
-from openpyxl import Workbook
-from reportlab.lib.pagesizes import LETTER
-from reportlab.pdfgen import canvas
-
-def to_excel_bytes(tabs: Dict[str, pd.DataFrame]) -> bytes:
-    wb = Workbook(); wb.remove(wb.active)
-    for name, df in tabs.items():
+from typing import BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from input_formats import fmt_money
+
+# openpyxl and reportlab are imported inside the functions that need them, so
+# importing utils (and app cold start) doesn't pay for either until an export runs.
+LETTER = (612.0, 792.0)  # reportlab.lib.pagesizes.LETTER, in points
+
+Frames = Union[pd.DataFrame, Iterable[pd.DataFrame]]
+
+def result_tables(outs: Dict) -> Dict[str, pd.DataFrame]:
+    """The app's three output tables from a `compute` dict or DealResult."""
+    if hasattr(outs, "tables"):
+        return outs.tables()
+    return {"Year1_Monthly": pd.DataFrame(outs["y1"]), "Years1_5_Annual": pd.DataFrame(outs["years"]),
+            "Investor_Summary": pd.DataFrame(outs["investors"])}
+
+def snapshot_metrics(outs: Dict) -> Dict[str, str]:
+    """Headline metrics for the PDF snapshot."""
+    return {
+        "Total Uses @ Close": fmt_money(outs["total_uses"], 0),
+        "Total Sources @ Close": fmt_money(outs["total_sources"], 0),
+        "Pro-forma SDE (Y1)": fmt_money(outs["proforma_sde_y1"], 0),
+    }
+
+def _number_format(name: str, kind: str) -> str:
+    if kind in "iu": return "0"
+    if "DSCR" in name or "Multiple" in name: return "0.00"
+    if "%" in name: return '0.00"%"'
+    return "#,##0.00"
+
+def _column_values(s: pd.Series) -> list:
+    """Column as Python scalars; NaN/NaT become empty cells."""
+    if s.dtype.kind in "iub": return s.tolist()
+    if s.dtype.kind == "f":
+        v = s.to_numpy(dtype=float)
+        return [None if x != x else x for x in v.tolist()] if np.isnan(v).any() else v.tolist()
+    return [None if pd.isna(x) else x for x in s.tolist()]
+
+def write_excel(tabs: Dict[str, Frames], target: Union[str, BinaryIO]) -> None:
+    """Stream tabs into a write-only workbook at `target` (path or binary stream).
+
+    Each tab is a DataFrame or an iterable of DataFrame chunks sharing the
+    first chunk's columns, so callers can generate rows lazily (e.g. one
+    chunk per scenario) without the workbook holding them in memory.
+    Numeric columns are written as typed cells with number formats.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    wb = Workbook(write_only=True)
+    for name, frames in tabs.items():
         ws = wb.create_sheet(title=name[:31])
-        ws.append(list(df.columns))
-        for _, row in df.iterrows():
-            ws.append(list(row.values))
-    bio = io.BytesIO(); wb.save(bio); return bio.getvalue()
+        if isinstance(frames, pd.DataFrame): frames = (frames,)
+        cells = None
+        for df in frames:
+            if cells is None:
+                ws.append([str(c) for c in df.columns])
+                cells = []
+                for c in df.columns:
+                    if df[c].dtype.kind in "iuf":
+                        cell = WriteOnlyCell(ws); cell.number_format = _number_format(str(c), df[c].dtype.kind)
+                        cells.append(cell)
+                    else:
+                        cells.append(None)
+            cols = [_column_values(df[c]) for c in df.columns]
+            # Styled cells are reused per column: write-only sheets serialize each row on append
+            for values in zip(*cols):
+                row = []
+                for cell, v in zip(cells, values):
+                    if cell is None or v is None: row.append(v)
+                    else: cell.value = v; row.append(cell)
+                ws.append(row)
+    wb.save(target)
+
+def to_excel_bytes(tabs: Dict[str, Frames]) -> bytes:
+    bio = io.BytesIO(); write_excel(tabs, bio); return bio.getvalue()
+
+@dataclass(frozen=True)
+class PdfLayout:
+    """Page geometry and fonts shared by every report a process renders."""
+    page: Tuple[float, float] = LETTER
+    margin: float = 40
+    top: float = 50
+    bottom: float = 60
+    body_font: str = "Helvetica"
+    bold_font: str = "Helvetica-Bold"
+    title_size: float = 14
+    heading_size: float = 12
+    text_size: float = 9
+    cell_size: float = 7.5
+    row_height: float = 10
+    col_pad: float = 6
+    max_col_width: float = 150
+
+    @property
+    def usable_width(self) -> float:
+        return self.page[0] - 2 * self.margin
+
+LAYOUT = PdfLayout()
+
+# A page is a list of (font, size, x, y, text, right_aligned) draw ops
+Page = List[Tuple[str, float, float, float, str, bool]]
+
+def _cell_text(v) -> str:
+    if v is None or (isinstance(v, float) and v != v): return ""
+    if isinstance(v, (bool, np.bool_)): return str(v)
+    if isinstance(v, (int, np.integer)): return str(v)
+    if isinstance(v, (float, np.floating)): return f"{v:,.2f}"
+    return str(v)
+
+def _fit(text: str, font: str, size: float, width: float) -> str:
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    if stringWidth(text, font, size) <= width: return text
+    while text and stringWidth(text + "…", font, size) > width: text = text[:-1]
+    return text + "…"
+
+def layout_report(title: str, metrics: Dict[str, str], tables: Dict[str, pd.DataFrame],
+                  layout: PdfLayout = LAYOUT) -> List[Page]:
+    """Paginate a report into draw ops: full tables, wide ones split into column groups.
+
+    The first column is repeated in every group and the header on every page.
+    """
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    L = layout; W, H = L.page
+    pages: List[Page] = []; page: Page = []; y = H - L.top
+
+    def new_page():
+        nonlocal page, y
+        pages.append(page); page = []; y = H - L.top
+
+    page.append((L.bold_font, L.title_size, L.margin, y, title, False)); y -= 20
+    for k, v in metrics.items():
+        page.append((L.body_font, L.text_size, L.margin, y, f"{k}: {v}", False)); y -= 12
+        if y < L.bottom: new_page()
 
-def to_pdf_bytes(title: str, metrics: Dict[str,str], tables: Dict[str, pd.DataFrame]) -> bytes:
-    bio = io.BytesIO(); c = canvas.Canvas(bio, pagesize=LETTER)
-    W, H = LETTER; y = H-50
-    c.setFont("Helvetica-Bold", 14); c.drawString(40, y, title); y -= 20
-    c.setFont("Helvetica", 9)
-    for k,v in metrics.items():
-        c.drawString(40, y, f"{k}: {v}"); y -= 12
-        if y < 80: c.showPage(); y = H-50
     for name, df in tables.items():
-        if y < 100: c.showPage(); y = H-50
-        c.setFont("Helvetica-Bold", 12); c.drawString(40, y, name); y -= 16
-        c.setFont("Helvetica", 8)
-        cols = list(df.columns)
-        header = " | ".join(str(x) for x in cols[:6])
-        c.drawString(40, y, header); y -= 12
-        for i in range(min(25, len(df))):
-            row = " | ".join(str(df.iloc[i, j]) for j in range(min(6, len(cols))))
-            c.drawString(40, y, row[:110]); y -= 10
-            if y < 80: c.showPage(); y = H-50
-        y -= 6
-    c.save(); return bio.getvalue()
+        cols = [str(c) for c in df.columns]
+        cells = [[_cell_text(v) for v in df[c].tolist()] for c in df.columns]
+        numeric = [df[c].dtype.kind in "iuf" for c in df.columns]
+        widths = [min(L.max_col_width, max([stringWidth(t, L.body_font, L.cell_size) for t in col + [h]]) + L.col_pad)
+                  for h, col in zip(cols, cells)]
+        groups, cur, used = [], [], widths[0] if widths else 0
+        for j in range(1, len(cols)):
+            if cur and used + widths[j] > L.usable_width:
+                groups.append(cur); cur, used = [], widths[0]
+            cur.append(j); used += widths[j]
+        groups.append(cur)
+        for g, group in enumerate(groups):
+            idx = [0] + group if cols else []
+            if y < L.bottom + 3 * L.row_height: new_page()
+            label = name if len(groups) == 1 else f"{name} ({g + 1}/{len(groups)})"
+            page.append((L.bold_font, L.heading_size, L.margin, y, label, False)); y -= 16
+
+            def header():
+                nonlocal y
+                x = L.margin
+                for j in idx:
+                    t = _fit(cols[j], L.bold_font, L.cell_size, widths[j] - L.col_pad)
+                    page.append((L.bold_font, L.cell_size, x + widths[j] - L.col_pad if numeric[j] else x, y, t, numeric[j]))
+                    x += widths[j]
+                y -= L.row_height + 2
+            header()
+            for i in range(len(df)):
+                if y < L.bottom: new_page(); header()
+                x = L.margin
+                for j in idx:
+                    t = _fit(cells[j][i], L.body_font, L.cell_size, widths[j] - L.col_pad)
+                    page.append((L.body_font, L.cell_size, x + widths[j] - L.col_pad if numeric[j] else x, y, t, numeric[j]))
+                    x += widths[j]
+                y -= L.row_height
+            y -= 8
+    pages.append(page)
+    return pages
+
+def _canvas(target: BinaryIO, layout: PdfLayout = LAYOUT):
+    from reportlab.pdfgen import canvas
+    return canvas.Canvas(target, pagesize=layout.page)
+
+def _draw_pages(c, pages: List[Page]) -> None:
+    for page in pages:
+        font = None
+        for face, size, x, y, text, right in page:
+            if font != (face, size): c.setFont(face, size); font = (face, size)
+            if right: c.drawRightString(x, y, text)
+            else: c.drawString(x, y, text)
+        c.showPage()
+
+def render_pages(pages: List[Page], layout: PdfLayout = LAYOUT) -> bytes:
+    bio = io.BytesIO(); c = _canvas(bio, layout)
+    _draw_pages(c, pages); c.save(); return bio.getvalue()
+
+def to_pdf_bytes(title: str, metrics: Dict[str,str], tables: Dict[str, pd.DataFrame]) -> bytes:
+    return render_pages(layout_report(title, metrics, tables))
+
+# (file name, title, metrics, tables)
+Report = Tuple[str, str, Dict[str, str], Dict[str, pd.DataFrame]]
+
+def _layout_job(report: Report) -> List[Page]:
+    return layout_report(*report[1:])
+
+def _render_job(report: Report) -> bytes:
+    return to_pdf_bytes(*report[1:])
+
+def batch_pdf_reports(reports: Sequence[Report], merged: bool = True, workers: Optional[int] = None) -> bytes:
+    """Render many reports in worker processes.
+
+    With `merged`, workers paginate and the parent draws every report into
+    one document (reportlab cannot concatenate finished PDFs); otherwise
+    workers render each PDF and the result is a zip of `<file name>.pdf`.
+    `workers=0` runs in-process.
+    """
+    job = _layout_job if merged else _render_job
+    if workers == 0 or len(reports) <= 1:
+        results = map(job, reports)
+        return _collect(reports, results, merged)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunk = max(1, len(reports) // (4 * workers))
+        return _collect(reports, pool.map(job, reports, chunksize=chunk), merged)
+
+def _collect(reports: Sequence[Report], results: Iterable, merged: bool) -> bytes:
+    bio = io.BytesIO()
+    if merged:
+        c = _canvas(bio)
+        for pages in results: _draw_pages(c, pages)
+        c.save()
+    else:
+        with zipfile.ZipFile(bio, "w", zipfile.ZIP_DEFLATED) as zf:
+            seen: Dict[str, int] = {}
+            for (name, *_), pdf in zip(reports, results):
+                base = name[:-4] if name.lower().endswith(".pdf") else name
+                n = seen[base] = seen.get(base, 0) + 1
+                zf.writestr(f"{base}.pdf" if n == 1 else f"{base} ({n}).pdf", pdf)
+    return bio.getvalue()
@@ -0,0 +1,203 @@
+"""Tiered distribution waterfall over investor matrices.
+
+A config's `waterfall` lists tiers applied in order to each month's
+distributable cash; investors marked `"class": "gp"` receive the GP side
+of catch-up and split tiers.
+
+    return_of_capital  all cash to investors until contributed capital is repaid
+    pref               pays preferred return accrued monthly at `rate_pct`/yr
+                       (simple, on unreturned capital)
+    catch_up           `gp_pct` of cash to the GP until the GP holds
+                       `target_pct` of pref + catch-up profits
+    split              all remaining cash, `gp_pct` to the GP
+
+Capital tiers pay investors by contributed capital (at close plus
+follow-ons); the LP side of catch-up and split pays non-GP investors by
+ownership %, and the GP side pays GP investors by ownership % (equally if
+those are all zero; to the LPs if there is no GP). Cash left after the
+last tier, or all of it with no tiers, is paid by ownership %, which is
+the plain pro-rata split.
+
+The month recurrence runs on per-scenario tier totals; investors only
+enter in one (N, I, buckets) x (N, buckets, months) product at the end,
+so cost grows with N x months x tiers plus one pass over the output.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from money import split_cents
+
+TIER_KINDS = ("return_of_capital", "pref", "catch_up", "split")
+TIER_FIELDS = ("kind", "rate_pct", "gp_pct", "target_pct")
+# Payment buckets, each with its own investor shares
+BUCKETS = ("capital", "lp", "gp", "residual")
+
+
+def _num(v: Any) -> float:
+    return float(v) if v not in (None, "") and v == v else 0.0
+
+
+@dataclass(frozen=True)
+class Tier:
+    kind: str
+    rate_pct: float = 0.0
+    gp_pct: float = 0.0
+    target_pct: float = 0.0
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Tier":
+        if d.get("kind") not in TIER_KINDS:
+            raise ValueError(f"Unknown waterfall tier '{d.get('kind')}'; choose among {TIER_KINDS}")
+        tier = cls(d["kind"], _num(d.get("rate_pct")), _num(d.get("gp_pct")), _num(d.get("target_pct")))
+        if not 0 <= tier.gp_pct <= 100 or not 0 <= tier.target_pct < 100:
+            raise ValueError(f"Waterfall tier {d}: gp_pct must be within 0–100 and target_pct within 0–<100")
+        return tier
+
+
+def config_tiers(cfg: Dict[str, Any]) -> List[Tier]:
+    return [Tier.from_dict(t) for t in cfg.get("waterfall") or []]
+
+
+def tier_array(tier_lists: Sequence[Sequence[Tier]]) -> np.ndarray:
+    """(N, T, len(TIER_FIELDS)) array of tiers in order; padding has kind -1."""
+    width = max(map(len, tier_lists), default=0)
+    out = np.zeros((len(tier_lists), width, len(TIER_FIELDS)))
+    out[:, :, 0] = -1
+    for n, tiers in enumerate(tier_lists):
+        for k, t in enumerate(tiers):
+            out[n, k] = (TIER_KINDS.index(t.kind), t.rate_pct, t.gp_pct, t.target_pct)
+    return out
+
+
+def _normalized(weights: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    """Rows of `weights` scaled to sum to 1; rows summing to zero use `fallback` instead."""
+    total = weights.sum(axis=-1, keepdims=True)
+    alt = fallback.sum(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, weights / total, np.where(alt > 0, fallback / alt, 0.0))
+
+
+def investor_shares(pct: np.ndarray, capital: np.ndarray, gp: np.ndarray) -> np.ndarray:
+    """(N, I, len(BUCKETS)) share of each bucket per investor; padded investors get zero."""
+    present = (pct != 0) | (capital != 0) | gp
+    lp_pct = np.where(gp, 0.0, pct)
+    lp = _normalized(lp_pct, present & ~gp)
+    gp_w = _normalized(np.where(gp, pct, 0.0), gp & present)
+    has_gp = gp_w.sum(axis=-1, keepdims=True) > 0
+    return np.stack([
+        _normalized(capital, pct),
+        lp,
+        np.where(has_gp, gp_w, lp),
+        pct / 100,
+    ], axis=-1)
+
+
+def tier_flows(distributable: np.ndarray, capital_in: np.ndarray, tiers: np.ndarray) -> np.ndarray:
+    """(N, len(BUCKETS), months) bucket payments from (N, months) cash and capital contributions.
+
+    `capital_in[:, t]` is capital paid in during month t+1 (capital at close
+    belongs in month 1); pref accrues on capital unreturned at the start of
+    each month.
+    """
+    n, months = distributable.shape
+    kind = tiers[:, :, 0].astype(np.int64)
+    rate = tiers[:, :, 1] / 1200
+    gp_frac = tiers[:, :, 2] / 100
+    target = tiers[:, :, 3] / 100
+    k_target = target / (1 - target)
+    # Per slot: (kind, rows with that kind or None for all rows) for each kind present
+    slots = []
+    for k in range(tiers.shape[1]):
+        kinds = [(kd, None if (kind[:, k] == kd).all() else kind[:, k] == kd)
+                 for kd in range(len(TIER_KINDS)) if (kind[:, k] == kd).any()]
+        slots.append(kinds)
+    pref_rate = np.where(kind == 1, rate, 0.0)
+    accrues = bool(pref_rate.any())
+    out = np.zeros((n, len(BUCKETS), months))
+    unreturned = np.zeros(n)
+    accrued = np.zeros(tiers.shape[:2])
+    lp_profit = np.zeros(n)
+    gp_profit = np.zeros(n)
+    for m in range(months):
+        if accrues:
+            accrued += unreturned[:, None] * pref_rate
+        unreturned = unreturned + capital_in[:, m]
+        cash = np.maximum(distributable[:, m], 0.0)
+        for k, kinds in enumerate(slots):
+            for kd, rows in kinds:
+                if kd == 0:
+                    pay = np.minimum(cash, unreturned)
+                elif kd == 1:
+                    pay = np.minimum(cash, accrued[:, k])
+                elif kd == 2:
+                    # stops once gp / (lp + gp) reaches target: solve gp + g x = t (lp + (1 - g) x)
+                    g, kt = gp_frac[:, k], k_target[:, k]
+                    denom = g - kt * (1 - g)
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        catch = np.where(denom > 0, np.maximum(kt * lp_profit - gp_profit, 0.0) / denom, np.inf)
+                    pay = np.minimum(cash, catch)
+                else:
+                    pay = cash
+                if rows is not None:
+                    pay = np.where(rows, pay, 0.0)
+                cash = cash - pay
+                if kd <= 1:
+                    out[:, 0, m] += pay
+                    if kd == 0:
+                        unreturned = unreturned - pay
+                    else:
+                        accrued[:, k] -= pay
+                        lp_profit = lp_profit + pay
+                else:
+                    to_gp = pay * gp_frac[:, k]
+                    out[:, 1, m] += pay - to_gp
+                    out[:, 2, m] += to_gp
+                    if kd == 2:
+                        lp_profit = lp_profit + (pay - to_gp)
+                        gp_profit = gp_profit + to_gp
+        out[:, 3, m] = cash + np.minimum(distributable[:, m], 0.0)
+    return out
+
+
+def allocate(distributable: np.ndarray, pct: np.ndarray, capital: np.ndarray, gp: np.ndarray,
+             capital_in: np.ndarray, tiers: np.ndarray) -> np.ndarray:
+    """(N, I, months) investor dividends for (N, months) distributable cash.
+
+    `pct`, `capital` and `gp` are (N, I) ownership %, contributed capital and
+    GP flags; `capital_in` is (N, months) and `tiers` a `tier_array`.
+    """
+    if tiers.shape[1] == 0 or not (tiers[:, :, 0] >= 0).any():
+        return distributable[:, None, :] * (pct / 100)[:, :, None]
+    flows = tier_flows(distributable, capital_in, tiers)
+    return np.matmul(investor_shares(pct, capital, gp.astype(bool)), flows)
+
+
+def allocate_cents(distributable: np.ndarray, pct: np.ndarray, capital: np.ndarray, gp: np.ndarray,
+                   capital_in: np.ndarray, tiers: np.ndarray) -> np.ndarray:
+    """`allocate` for (N, months) int64 distributable cents: (N, I, months) int64 cents.
+
+    `capital` and `capital_in` stay in dollars. Investors' shares are cut by
+    cumulative rounding (see money.py), so each month's dividends add up to
+    the cents the tiers paid out. Each row is cut the same way whatever
+    else is in the batch: rows without tiers by ownership % of their cents.
+    """
+    tiered = (tiers[:, :, 0] >= 0).any(axis=1)
+    if not tiered.any():
+        return _pro_rata_cents(distributable, pct)
+    if tiered.all():
+        return split_cents(allocate(distributable / 100, pct, capital, gp, capital_in, tiers), axis=1)
+    out = np.empty((*pct.shape, distributable.shape[1]), np.int64)
+    out[~tiered] = _pro_rata_cents(distributable[~tiered], pct[~tiered])
+    out[tiered] = split_cents(allocate(distributable[tiered] / 100, pct[tiered], capital[tiered], gp[tiered],
+                                       capital_in[tiered], tiers[tiered]), axis=1)
+    return out
+
+
+def _pro_rata_cents(distributable: np.ndarray, pct: np.ndarray) -> np.ndarray:
+    cum_pct = np.cumsum(np.pad(pct, ((0, 0), (1, 0))), axis=1) / 100
+    cum = distributable[:, None, :] * cum_pct[:, :, None]
+    np.rint(cum, out=cum)
+    return np.subtract(cum[:, 1:], cum[:, :-1], out=np.empty(cum[:, 1:].shape, np.int64), casting="unsafe")